@@ -0,0 +1,287 @@
+"""
+File:   anagram_index.py
+
+An alphagram index of the lexicon: every word filed under its letters in
+sorted order, so all the words a set of tiles spells are found with one hash
+lookup.
+"""
+
+import ctypes
+import struct
+import sys
+import zlib
+from array import array
+from itertools import combinations_with_replacement
+
+from mapped_image import (HEADER_PREFIX, file_digest, map_arrays, map_image,
+                          pack_header, write_image)
+from scrabble_dawg import (ALPHABET, LexiconImageError, compile_main,
+                          index_by_letter)
+
+#   Anagram index image layout: a fixed header, the hash table `slots`, then
+#   `key_offsets`, `word_offsets` and `completions` (int32), then the
+#   alphagrams and the words as ASCII text, in the byte order recorded in the
+#   header.
+INDEX_VERSION = 2
+#   HEADER_PREFIX, then slots, keys, completions, alphagram bytes, word
+#   bytes, source sha1
+INDEX_HEADER = struct.Struct(HEADER_PREFIX + 'IIIII20s')
+#   Marks an unused hash table slot
+EMPTY_SLOT = -1
+#   Slots of the completions table for every alphagram. Each alphagram
+#   files up to one entry per letter, so the table is roughly half full.
+COMPLETION_SLOTS_PER_KEY = 8
+
+
+def alphagram(letters):
+    """Get the letters of `letters` in sorted order, as ASCII bytes."""
+
+    return ''.join(sorted(letters)).encode('ascii')
+
+
+def slot_hash(key):
+    """Hash an alphagram to a hash table slot (before masking)."""
+
+    return zlib.crc32(key) & 0xffffffff
+
+
+class AnagramIndex(object):
+    """Every word of a lexicon, grouped by alphagram
+
+    The words are grouped under their alphagram (their letters sorted), and
+    the groups are found through an open-addressing hash table with linear
+    probing. Everything lives in four flat arrays and one block of text:
+
+        slots[h]            group number stored in slot h, or EMPTY_SLOT
+        key_offsets[g]      where group g's alphagram starts in the text
+        word_offsets[g]     where group g's words start in the text
+        completions[h]      letters completing the alphagrams hashed to h
+
+    Offsets are relative to `key_base` and `word_base` within `text`, and
+    group g's alphagram and words run up to the next group's offsets. The
+    anagrams of an alphagram all have its length, so the words of a group
+    are stored back to back without separators.
+
+    `completions` serves racks with blanks. Every alphagram less one of its
+    letters is hashed to a slot, and that letter's bit is set there, so the
+    letters a blank could be to spell a word with some other letters are
+    found with one lookup rather than 26. The table keeps no keys, so
+    alphagrams hashed to the same slot share their bits: a letter found
+    there may spell nothing, but one missing from there never does.
+
+    Like the lexicon graphs, an index is saved as a binary image and mapped
+    rather than read, so building the hash table never happens at startup.
+    """
+
+    image_magic = b'SCRBANAG'
+    image_extension = '.anagrams'
+
+    def __init__(self, slots, key_offsets, word_offsets, completions, text,
+                 key_base, word_base):
+        self.slots = slots
+        self.key_offsets = key_offsets
+        self.word_offsets = word_offsets
+        self.completions = completions
+        self.text = text
+        self.key_base = key_base
+        self.word_base = word_base
+        self.mask = len(slots) - 1
+        #   SHA-1 of the word list the index was built from, if known
+        self.source_digest = None
+        #   The mmap backing the arrays when loaded from an image
+        self.image = None
+
+    @classmethod
+    def from_file(cls, words_file):
+        """Build an index from a word list with one word per line."""
+
+        with open(words_file, 'r') as words:
+            index = cls.from_words(word.strip().lower() for word in words)
+        index.source_digest = file_digest(words_file)
+        return index
+
+    @classmethod
+    def from_words(cls, words):
+        """Build an index from an iterable of lowercase words."""
+
+        words_by_key = {}
+        for word in words:
+            if word:
+                words_by_key.setdefault(alphagram(word), set()).add(
+                    word.encode('ascii'))
+        keys = sorted(words_by_key)
+        key_text = b''.join(keys)
+        word_text = b''.join(b''.join(sorted(words_by_key[key]))
+                             for key in keys)
+        key_offsets = array('i', [0])
+        word_offsets = array('i', [0])
+        for key in keys:
+            key_offsets.append(key_offsets[-1] + len(key))
+            word_offsets.append(word_offsets[-1]
+                                + len(key) * len(words_by_key[key]))
+
+        #   At most half full, so probe sequences stay short
+        num_slots = 1
+        while num_slots < 2 * len(keys):
+            num_slots *= 2
+        slots = array('i', [EMPTY_SLOT]) * num_slots
+        mask = num_slots - 1
+        for group, key in enumerate(keys):
+            slot = slot_hash(key) & mask
+            while slots[slot] != EMPTY_SLOT:
+                slot = (slot + 1) & mask
+            slots[slot] = group
+
+        num_completions = 1
+        while num_completions < COMPLETION_SLOTS_PER_KEY * len(keys):
+            num_completions *= 2
+        completions = array('i', [0]) * num_completions
+        mask = num_completions - 1
+        for key in keys:
+            for i in range(len(key)):
+                letter = key[i:i + 1]
+                if i and key[i - 1:i] == letter:
+                    continue
+                slot = slot_hash(key[:i] + key[i + 1:]) & mask
+                completions[slot] |= 1 << index_by_letter[letter.decode(
+                    'ascii')]
+        return cls(slots, key_offsets, word_offsets, completions,
+                   key_text + word_text, 0, len(key_text))
+
+    def __len__(self):
+        """Return the number of alphagrams in the index."""
+
+        return len(self.key_offsets) - 1
+
+    def words(self, letters):
+        """Get every word spelled by exactly the tiles `letters`."""
+
+        key = alphagram(letters)
+        length = len(key)
+        slots = self.slots
+        key_offsets = self.key_offsets
+        text = self.text
+        key_base = self.key_base
+        mask = self.mask
+        slot = slot_hash(key) & mask
+        while True:
+            group = slots[slot]
+            if group == EMPTY_SLOT:
+                return []
+            start = key_offsets[group]
+            if (key_offsets[group + 1] - start == length
+                    and text[key_base + start:
+                             key_base + start + length] == key):
+                break
+            slot = (slot + 1) & mask
+        start = self.word_base + self.word_offsets[group]
+        end = self.word_base + self.word_offsets[group + 1]
+        block = text[start:end]
+        if not isinstance(block, str):
+            block = block.decode('ascii')
+        return [block[i:i + length] for i in range(0, end - start, length)]
+
+    def completion_mask(self, letters):
+        """Get a mask with the bit of every letter that may spell a word
+        with exactly the tiles `letters` and that letter.
+
+        Every such letter's bit is set, but a few others may be too.
+        """
+
+        completions = self.completions
+        return completions[slot_hash(alphagram(letters))
+                           & (len(completions) - 1)]
+
+    def blank_words(self, letters, blanks):
+        """Get every word spelled by the tiles `letters` and `blanks`
+        blanks, as (fill, words) pairs.
+
+        `fill` holds the letters the blanks are played as, in sorted order,
+        and `words` the words they spell with `letters`. Pairs are in order
+        of fill. All but the last blank are tried as every letter, and the
+        letters the last may be are then read from the completions table,
+        so one blank takes one lookup rather than 26 and two blanks 26
+        rather than 351.
+        """
+
+        if not blanks:
+            words = self.words(letters)
+            return [('', words)] if words else []
+        letters = list(letters)
+        pairs = []
+        for head in combinations_with_replacement(ALPHABET, blanks - 1):
+            mask = self.completion_mask(letters + list(head))
+            first = index_by_letter[head[-1]] if head else 0
+            mask >>= first
+            for label in range(first, len(ALPHABET)):
+                if not mask:
+                    break
+                if mask & 1:
+                    fill = ''.join(head) + ALPHABET[label]
+                    words = self.words(letters + list(fill))
+                    if words:
+                        pairs.append((fill, words))
+                mask >>= 1
+        return pairs
+
+    def save(self, image_file):
+        """Write the index to `image_file` as a binary image."""
+
+        key_text = self.text[self.key_base:self.word_base]
+        word_text = self.text[self.word_base:
+                              self.word_base + self.word_offsets[-1]]
+        header = pack_header(INDEX_HEADER, self.image_magic, INDEX_VERSION,
+                             len(self.slots), len(self),
+                             len(self.completions), len(key_text),
+                             len(word_text), self.source_digest or b'\0' * 20)
+        write_image(image_file, header, [
+            (self.slots, 'i'),
+            (self.key_offsets, 'i'),
+            (self.word_offsets, 'i'),
+            (self.completions, 'i'),
+            key_text,
+            word_text
+        ])
+
+    @classmethod
+    def load(cls, image_file):
+        """Map an anagram index image written by save().
+
+        Raises LexiconImageError if the file is not a usable image.
+        """
+
+        image, (num_slots, num_keys, num_completions, key_bytes, word_bytes,
+                digest) = map_image(image_file, INDEX_HEADER,
+                                    cls.image_magic, INDEX_VERSION,
+                                    LexiconImageError,
+                                    'an anagram index image')
+        layout = [
+            (ctypes.c_int32, num_slots),
+            (ctypes.c_int32, num_keys + 1),
+            (ctypes.c_int32, num_keys + 1),
+            (ctypes.c_int32, num_completions)
+        ]
+        slots, key_offsets, word_offsets, completions = map_arrays(
+            image, image_file, INDEX_HEADER.size, layout,
+            key_bytes + word_bytes, LexiconImageError)
+        key_base = INDEX_HEADER.size + 4 * sum(count for _, count in layout)
+
+        index = cls(slots, key_offsets, word_offsets, completions, image,
+                    key_base, key_base + key_bytes)
+        index.source_digest = digest
+        index.image = image
+        return index
+
+
+def main(argv):
+    """Compile a word list into an anagram index image.
+
+    Usage: python anagram_index.py [words_file [image_file]]
+    """
+
+    compile_main(argv, AnagramIndex,
+                 lambda index: "{} alphagrams".format(len(index)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,824 @@
+"""
+File:   benchmark.py
+
+Performance benchmarks for the Scrabble engine.
+
+Usage: python benchmark.py <benchmark> [options]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import lexicon
+from board_core import BOARD_SIZE
+from board_kernels import (HAVE_NUMPY, cross_tables, move_direction,
+                           score_moves)
+from cross_checks import ACROSS, DOWN
+from move_generator import GaddagMoveGenerator, MoveGenerator
+from move_ranking import top_moves
+from parallel_search import ParallelSearch
+from scrabble import ScrabbleBoard
+from scrabble_ai import (GENERATOR_ANCHOR, GENERATOR_DFS, GENERATOR_GADDAG,
+                         ScrabbleAI)
+from scrabble_dawg import ALPHABET
+from scrabble_dfa import DFA
+from self_play import DEFAULT_PLAYER, play_game
+from simulation import Simulator, remove_letters
+from tile import BLANK, ScrabbleTileBag
+
+#   Letters drawn for benchmark racks, weighted roughly like the tile bag
+RACK_LETTERS = 'eeeeeaaaaiiioooonnnrrrtttlllssuuddgbcmpfhvwykjxqz'
+
+#   The canonical positions the benchmark suite runs on
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'benchmark_positions.json')
+CORPUS_VERSION = 1
+
+#   Moves played before each corpus position is taken, from the empty board
+#   to late-game boards
+CORPUS_STAGES = [0, 1, 2, 4, 6, 8, 12, 16, 20, 24, 28, 32]
+CORPUS_SEEDS = [0, 1]
+
+#   The GUI's hardest difficulty, which all but always searches every anchor
+SUITE_THRESHOLD = 1000
+SUITE_MODES = [GENERATOR_DFS, GENERATOR_ANCHOR, GENERATOR_GADDAG]
+
+
+def time_per_call(func, repeat):
+    """Return the mean wall-clock seconds of `repeat` calls to `func`."""
+
+    start = time.time()
+    for _ in range(repeat):
+        func()
+    return (time.time() - start) / repeat
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return "{:.2f} s".format(seconds)
+    if seconds >= 1e-3:
+        return "{:.2f} ms".format(seconds * 1e3)
+    return "{:.1f} us".format(seconds * 1e6)
+
+
+def bench_board_construction(args):
+    """Compare per-game setup with a private DFA against the shared one."""
+
+    #   Make sure the image exists so the private-DFA case measures the
+    #   fastest possible rebuild rather than a full word-list parse
+    DFA()
+    lexicon.clear_lexicons()
+    first_shared = time_per_call(lexicon.get_lexicon, 1)
+
+    private = time_per_call(lambda: ScrabbleBoard(dfa=DFA()), args.private)
+    shared_lexicon = time_per_call(lexicon.get_lexicon, args.shared)
+    shared = time_per_call(ScrabbleBoard, args.shared)
+
+    print("Lexicon, first shared request:   {}".format(
+        format_seconds(first_shared)))
+    print("Lexicon, later shared requests:  {}".format(
+        format_seconds(shared_lexicon)))
+    print("ScrabbleBoard with private DFA:  {}".format(
+        format_seconds(private)))
+    print("ScrabbleBoard with shared DFA:   {}".format(
+        format_seconds(shared)))
+
+
+def object_bytes(objects):
+    """Add up the sizes of the distinct objects in `objects`, counting the
+    __dict__ of those that have one."""
+
+    distinct = dict((id(obj), obj) for obj in objects)
+    total = 0
+    for obj in distinct.values():
+        total += sys.getsizeof(obj)
+        if hasattr(obj, '__dict__'):
+            total += sys.getsizeof(obj.__dict__)
+    return len(distinct), total
+
+
+def bench_objects(args):
+    """Measure the per-game memory and time of squares, tiles and Words."""
+
+    board = ScrabbleBoard()
+    squares = [square for row in board.base_board for square in row]
+    tiles = ScrabbleTileBag().bag
+    words = []
+    cases = []
+    for _, position, rack in load_corpus(args.corpus):
+        board = ScrabbleBoard()
+        board.set_position(position)
+        moves = MoveGenerator(board).generate(rack)
+        words += moves
+        cases += [(board, move.get_letters_by_coord()) for move in moves]
+    for name, objects in (('squares', squares), ('tiles', tiles),
+                          ('words', words)):
+        count, size = object_bytes(objects)
+        print("{:<8} {:>6} objects, {:>6} distinct, {:>8} bytes".format(
+            name, len(objects), count, size))
+
+    setup = time_per_call(lambda: (ScrabbleBoard(), ScrabbleTileBag()),
+                          args.repeat)
+    start = time.time()
+    for board, letters_by_coord in cases:
+        board.get_hand_legality_by_score(letters_by_coord)
+    scoring = (time.time() - start) / len(cases)
+    start = time.time()
+    for seed in range(args.games):
+        play_game([DEFAULT_PLAYER, DEFAULT_PLAYER], seed)
+    game = (time.time() - start) / max(args.games, 1)
+    print("Board and tile bag setup:  {}".format(format_seconds(setup)))
+    print("Validating and scoring:    {} per move".format(
+        format_seconds(scoring)))
+    print("Self-play game:            {}".format(format_seconds(game)))
+
+
+def random_positions(count, seed, max_moves=20):
+    """Build `count` reproducible (board, rack) positions by random play."""
+
+    rnd = random.Random(seed)
+    positions = []
+    for i in range(count):
+        board = ScrabbleBoard()
+        generator = MoveGenerator(board)
+        for _ in range(i % (max_moves + 1)):
+            moves = generator.generate(
+                [rnd.choice(RACK_LETTERS) for _ in range(7)])
+            if moves:
+                board.play_hand(rnd.choice(moves).get_letters_by_coord())
+        positions.append((board, [rnd.choice(RACK_LETTERS)
+                                  for _ in range(7)]))
+    return positions
+
+
+def bench_generators(args):
+    """Compare moves per second of the DAWG and GADDAG generators.
+
+    The generators do not remember lines, so every repeat searches afresh.
+    """
+
+    positions = random_positions(args.positions, args.seed)
+    generator_classes = [('dawg', MoveGenerator),
+                         ('gaddag', GaddagMoveGenerator)]
+    for name, generator_class in generator_classes:
+        generators = [generator_class(board, memo_lines=False)
+                      for board, _ in positions]
+        num_moves = 0
+        start = time.time()
+        for _ in range(args.repeat):
+            for generator, (_, rack) in zip(generators, positions):
+                num_moves += len(generator.generate(rack))
+        elapsed = time.time() - start
+        print("{:<8} {:>8} moves in {}: {:.0f} moves/sec".format(
+            name, num_moves, format_seconds(elapsed), num_moves / elapsed))
+
+
+def bench_parallel(args):
+    """Compare serial top-K search with ParallelSearch."""
+
+    positions = random_positions(args.positions, args.seed)
+    start = time.time()
+    for board, rack in positions:
+        top_moves(MoveGenerator(board).generate(rack), args.k)
+    serial = time.time() - start
+    print("serial:     {} per position".format(
+        format_seconds(serial / len(positions))))
+
+    with ParallelSearch(args.workers) as search:
+        start = time.time()
+        for board, rack in positions:
+            search.find_best_words(board, rack, args.k)
+        parallel = time.time() - start
+    print("{} workers: {} per position ({:.2f}x)".format(
+        search.workers, format_seconds(parallel / len(positions)),
+        serial / parallel))
+
+
+def walk_runs(board):
+    """Measure the runs of tiles next to every empty square one probe at a
+    time, the way the searches did before the board kept bitmasks."""
+
+    total = 0
+    for row in range(BOARD_SIZE):
+        for col in range(BOARD_SIZE):
+            if board.is_played(row, col):
+                continue
+            for d_row, d_col in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+                r, c = row + d_row, col + d_col
+                while board.is_played(r, c):
+                    total += 1
+                    r, c = r + d_row, c + d_col
+    return total
+
+
+def count_runs(board):
+    """Measure the same runs as walk_runs() with the board's bitmasks."""
+
+    core = board.core
+    total = 0
+    for row in range(BOARD_SIZE):
+        for col in range(BOARD_SIZE):
+            if core.is_occupied(row, col):
+                continue
+            total += (core.run_left(row, col) + core.run_right(row, col)
+                      + core.run_up(row, col) + core.run_down(row, col))
+    return total
+
+
+def bench_runs(args):
+    """Compare probing runs of tiles square by square and with bitmasks."""
+
+    boards = []
+    for _, position, _ in load_corpus(args.corpus):
+        board = ScrabbleBoard()
+        board.set_position(position)
+        boards.append(board)
+    for name, measure in (('probes', walk_runs), ('bitmasks', count_runs)):
+        start = time.time()
+        for _ in range(args.repeat):
+            for board in boards:
+                measure(board)
+        elapsed = time.time() - start
+        print("{:<8} {} per board".format(
+            name, format_seconds(elapsed / (args.repeat * len(boards)))))
+
+
+def bench_blanks(args):
+    """Compare move generation latency for racks with and without blanks.
+
+    Each corpus rack is timed as it is, then with its last one and two
+    letters swapped for blanks, so the racks only differ by their blanks.
+    A blank multiplies the legal moves themselves, so the time per move is
+    reported along with the time per rack. Racks with one blank are also
+    timed the naive way, generating once for each letter the blank could
+    be.
+    """
+
+    boards = []
+    for _, position, rack in load_corpus(args.corpus):
+        board = ScrabbleBoard()
+        board.set_position(position)
+        boards.append((board, rack))
+    generator_classes = [('dawg', MoveGenerator),
+                         ('gaddag', GaddagMoveGenerator)]
+    for name, generator_class in generator_classes:
+        generators = [(generator_class(board, memo_lines=False), rack)
+                      for board, rack in boards]
+        runs = args.repeat * len(generators)
+        baseline = None
+        for blanks in range(3):
+            racks = [(generator, list(rack[:len(rack) - blanks])
+                      + [BLANK] * blanks)
+                     for generator, rack in generators]
+            num_moves = 0
+            start = time.time()
+            for _ in range(args.repeat):
+                for generator, letters in racks:
+                    num_moves += len(generator.generate(letters))
+            elapsed = time.time() - start
+            per_rack = elapsed / runs
+            per_move = elapsed / max(num_moves, 1)
+            if baseline is None:
+                baseline = per_rack, per_move
+            print("{:<8} {} blank(s): {} per rack ({:.2f}x), {:.0f} moves, "
+                  "{} per move ({:.2f}x)".format(
+                      name, blanks, format_seconds(per_rack),
+                      per_rack / baseline[0], float(num_moves) / runs,
+                      format_seconds(per_move), per_move / baseline[1]))
+            if blanks == 1:
+                start = time.time()
+                for _ in range(args.repeat):
+                    for generator, letters in racks:
+                        for letter in ALPHABET:
+                            generator.generate(letters[:-1] + [letter])
+                naive = (time.time() - start) / runs
+                print("{:<8} 1 blank(s), naive: {} per rack ({:.2f}x)".format(
+                    name, format_seconds(naive), naive / baseline[0]))
+
+
+def bench_cache(args):
+    """Compare repeated top-K queries with and without the position cache.
+
+    Every corpus position is asked for its top moves `queries` times, with
+    the rack's tiles shuffled each time, as a hint service asked again
+    after a reconnect would be. The generators do not remember lines, so
+    only the position cache is compared.
+    """
+
+    rnd = random.Random(args.seed)
+    boards = []
+    for _, position, rack in load_corpus(args.corpus):
+        board = ScrabbleBoard()
+        board.set_position(position)
+        boards.append((MoveGenerator(board, memo_lines=False), rack))
+    racks = []
+    for generator, rack in boards:
+        for _ in range(args.queries):
+            letters = list(rack)
+            rnd.shuffle(letters)
+            racks.append((generator, letters))
+
+    start = time.time()
+    for generator, letters in racks:
+        top_moves(generator.generate(letters), args.k)
+    uncached = (time.time() - start) / len(racks)
+    start = time.time()
+    for generator, letters in racks:
+        generator.cached_moves(letters, args.k)
+    cached = (time.time() - start) / len(racks)
+
+    hits = sum(generator.board.position_cache.hits for generator, _ in boards)
+    print("uncached: {} per query".format(format_seconds(uncached)))
+    print("cached:   {} per query ({:.2f}x), hit rate {:.2f}".format(
+        format_seconds(cached), uncached / cached,
+        float(hits) / len(racks)))
+
+
+def bench_lines(args):
+    """Compare searching every line with the per-line move memo.
+
+    Games are played out with the top scoring move, and after every move
+    both players' moves are generated again, as for a hint display showing
+    both seats. The player who just moved has a new rack, but the other's
+    rack is the one they had last time, so for them only the lines the move
+    changed have to be searched.
+    """
+
+    for memo_lines in (False, True):
+        elapsed = 0
+        searched = reused = 0
+        for game in range(args.games):
+            rnd = random.Random(args.seed + game)
+            board = ScrabbleBoard()
+            generator = MoveGenerator(board, memo_lines=memo_lines)
+            bag = ScrabbleTileBag(rnd=rnd)
+            racks = [bag.draw_letters(7), bag.draw_letters(7)]
+            for turn in range(args.turns):
+                start = time.time()
+                moves = [generator.generate(rack) for rack in racks]
+                elapsed += time.time() - start
+                player = turn % 2
+                if not moves[player]:
+                    break
+                letters_by_coord = top_moves(
+                    moves[player], 1)[0].get_letters_by_coord()
+                board.play_hand(letters_by_coord)
+                remove_letters(racks[player], letters_by_coord.values())
+                racks[player] += bag.draw_letters(7 - len(racks[player]))
+            searched += generator.lines_searched
+            reused += generator.lines_reused
+        if memo_lines:
+            print("memo:    {} ({:.2f}x), {} lines searched, {} reused".format(
+                format_seconds(elapsed), baseline / elapsed, searched,
+                reused))
+        else:
+            baseline = elapsed
+            print("no memo: {}".format(format_seconds(elapsed)))
+
+
+def bench_kernels(args):
+    """Compare the whole-board kernels with and without NumPy.
+
+    Times recomputing every cross-check of the corpus boards square by
+    square, as CrossCheckTable.refresh() used to, and with cross_tables();
+    then scoring every move found on them one by one with MoveScorer, and
+    as one batch with score_moves().
+    """
+
+    boards = []
+    for _, position, rack in load_corpus(args.corpus):
+        board = ScrabbleBoard()
+        board.set_position(position)
+        moves = MoveGenerator(board, memo_lines=False).generate(rack)
+        batch = [(word.get_letters_by_coord(),
+                  move_direction(board, word.get_letters_by_coord()))
+                 for word in moves]
+        boards.append((board, batch))
+    backends = [False, True] if HAVE_NUMPY else [False]
+    if not HAVE_NUMPY:
+        print("NumPy is not installed; only the Python kernels are timed")
+
+    def refresh_squares():
+        for board, _ in boards:
+            table = board.cross_checks
+            for row in range(BOARD_SIZE):
+                for col in range(BOARD_SIZE):
+                    table.refresh_square(row, col, ACROSS)
+                    table.refresh_square(row, col, DOWN)
+    print("cross-checks, by square:  {} per board".format(format_seconds(
+        time_per_call(refresh_squares, args.repeat) / len(boards))))
+    for use_numpy in backends:
+        def refresh_board():
+            for board, _ in boards:
+                for direction in (ACROSS, DOWN):
+                    cross_tables(board, direction,
+                                 board.cross_checks.compute_mask, use_numpy)
+        print("cross-checks, {:<11} {} per board".format(
+            'numpy:' if use_numpy else 'python:', format_seconds(
+                time_per_call(refresh_board, args.repeat) / len(boards))))
+
+    num_moves = sum(len(batch) for _, batch in boards)
+    for use_numpy in backends:
+        def score_batches():
+            for board, batch in boards:
+                score_moves(board, batch, use_numpy)
+        print("scoring, {:<16} {} per move".format(
+            'numpy:' if use_numpy else 'python:', format_seconds(
+                time_per_call(score_batches, args.repeat) / num_moves)))
+
+
+def bench_hands(args):
+    """Compare validating hands one by one with validating them in a batch.
+
+    The hands on each corpus position are every move found there, legal,
+    and each of them moved one square to the right, mostly illegal. Moved
+    hands that run off the board or onto a tile are left out, since the
+    batch rejects those outright while get_hand_legality_by_score() does
+    not check for them. Each batch is checked with
+    get_hand_legality_by_score() hand by hand and with one
+    get_hands_legality_by_score() call.
+    """
+
+    boards = []
+    for _, position, rack in load_corpus(args.corpus):
+        board = ScrabbleBoard()
+        board.set_position(position)
+        hands = [word.get_letters_by_coord()
+                 for word in MoveGenerator(board).generate(rack)]
+        for letters_by_coord in list(hands):
+            moved = dict(((row, col + 1), letter)
+                         for (row, col), letter in letters_by_coord.items())
+            if all(col < BOARD_SIZE and not board.core.is_occupied(row, col)
+                   for row, col in moved):
+                hands.append(moved)
+        boards.append((board, hands))
+    num_hands = sum(len(hands) for _, hands in boards)
+
+    def one_by_one():
+        return [[board.get_hand_legality_by_score(letters_by_coord)
+                 for letters_by_coord in hands] for board, hands in boards]
+
+    def batched():
+        return [board.get_hands_legality_by_score(hands)
+                for board, hands in boards]
+
+    mismatches = sum(
+        1 for one_scores, batch_scores in zip(one_by_one(), batched())
+        for one, batch in zip(one_scores, batch_scores) if one != batch)
+    single = time_per_call(one_by_one, args.repeat) / num_hands
+    batch = time_per_call(batched, args.repeat) / num_hands
+    print("{} hands, {} mismatches".format(num_hands, mismatches))
+    print("one by one: {} per hand".format(format_seconds(single)))
+    print("batch:      {} per hand ({:.2f}x)".format(format_seconds(batch),
+                                                    single / batch))
+
+
+def bench_simulation(args):
+    """Measure Monte Carlo rollouts per second on the corpus positions."""
+
+    corpus = load_corpus(args.corpus)[::args.stride]
+    board = ScrabbleBoard()
+    generator = MoveGenerator(board)
+    with Simulator(args.workers, args.iterations, args.plies) as simulator:
+        num_rollouts = 0
+        start = time.time()
+        for _, position, rack in corpus:
+            board.set_position(position)
+            candidates = top_moves(generator.generate(rack), args.candidates)
+            simulator.simulate(board, rack, candidates)
+            num_rollouts += len(candidates) * args.iterations
+        elapsed = time.time() - start
+    print("{} workers: {} rollouts in {}: {:.1f} rollouts/sec".format(
+        args.workers, num_rollouts, format_seconds(elapsed),
+        num_rollouts / elapsed))
+
+
+def build_corpus(seeds=CORPUS_SEEDS, stages=CORPUS_STAGES):
+    """Build the canonical positions by greedy play from random racks.
+
+    Every seed plays one game, always taking the top scoring move, and the
+    board is recorded with a fresh rack after each of `stages` moves.
+    """
+
+    positions = []
+    for seed in seeds:
+        rnd = random.Random(seed)
+        board = ScrabbleBoard()
+        generator = MoveGenerator(board)
+        played = 0
+        for stage in stages:
+            while played < stage:
+                best = top_moves(generator.generate(
+                    [rnd.choice(RACK_LETTERS) for _ in range(7)]), 1)
+                if best:
+                    board.play_hand(best[0].get_letters_by_coord())
+                played += 1
+            positions.append({
+                'name': 'seed{}-move{}'.format(seed, stage),
+                'position': list(board.get_position()),
+                'rack': ''.join(rnd.choice(RACK_LETTERS) for _ in range(7))
+            })
+    return {'version': CORPUS_VERSION, 'positions': positions}
+
+
+def load_corpus(corpus_file=CORPUS_FILE):
+    """Read the positions of a corpus file, as (name, position, rack)."""
+
+    with open(corpus_file) as f:
+        corpus = json.load(f)
+    if corpus.get('version') != CORPUS_VERSION:
+        raise ValueError("{} is not a version {} corpus".format(
+            corpus_file, CORPUS_VERSION))
+    return [(entry['name'], tuple(str(row) for row in entry['position']),
+             [str(letter) for letter in entry['rack']])
+            for entry in corpus['positions']]
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Get the nearest-rank percentiles of `values`, keyed 'p50' etc."""
+
+    values = sorted(values)
+    result = {}
+    for point in points:
+        rank = max(int(-(-point * len(values) // 100)) - 1, 0)
+        result['p{}'.format(point)] = values[rank]
+    result['max'] = values[-1]
+    return result
+
+
+def peak_rss_kb():
+    """The peak resident set size of this process so far, in KB."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #   macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def forget_lines(generator):
+    """Empty the line memo of `generator`, if it has one, so that its
+    next search is timed in full."""
+
+    if generator is not None and generator.line_memo is not None:
+        generator.line_memo.clear()
+
+
+def run_suite_mode(mode, corpus_file, repeat):
+    """Benchmark one AI generator mode on the corpus, in this process.
+
+    The AI's find_acceptable_word() is timed on every position; for the
+    modes that enumerate moves, their generator's throughput is measured
+    too. The generator's line memo is emptied before every timed call, so
+    repeats search as much as the first. Load times are only cold if this
+    process has not loaded the lexicon yet.
+    """
+
+    corpus = load_corpus(corpus_file)
+    start = time.time()
+    dfa = lexicon.get_lexicon()
+    if mode == GENERATOR_GADDAG:
+        dfa.get_gaddag()
+    load_seconds = time.time() - start
+
+    board = ScrabbleBoard(dfa)
+    ai = ScrabbleAI(board, ScrabbleTileBag(), dfa, SUITE_THRESHOLD,
+                    generator=mode, verbose=False)
+    latencies = []
+    num_moves = 0
+    generate_seconds = 0.0
+    for _, position, rack in corpus:
+        board.set_position(position)
+        for _ in range(repeat):
+            forget_lines(ai.move_generator)
+            start = time.time()
+            ai.find_acceptable_word(rack)
+            latencies.append(time.time() - start)
+            if ai.move_generator is not None:
+                forget_lines(ai.move_generator)
+                start = time.time()
+                num_moves += len(ai.move_generator.generate(rack))
+                generate_seconds += time.time() - start
+
+    result = {
+        'lexicon_load_seconds': round(load_seconds, 6),
+        'searches': len(latencies),
+        'latency_seconds': dict(
+            (key, round(value, 6))
+            for key, value in percentiles(latencies).items()),
+        'mean_latency_seconds': round(sum(latencies) / len(latencies), 6),
+        'moves': num_moves if ai.move_generator is not None else None,
+        'moves_per_sec': (round(num_moves / generate_seconds, 1)
+                          if generate_seconds else None),
+        'peak_rss_kb': peak_rss_kb()
+    }
+    return result
+
+
+def run_suite_validator(corpus_file, repeat):
+    """Benchmark ScrabbleBoard.get_hand_legality_by_score() on the corpus.
+
+    Every move the anchor generator finds on each position is validated.
+    """
+
+    board = ScrabbleBoard()
+    generator = MoveGenerator(board)
+    latencies = []
+    for _, position, rack in load_corpus(corpus_file):
+        board.set_position(position)
+        for word in generator.generate(rack):
+            letters_by_coord = word.get_letters_by_coord()
+            for _ in range(repeat):
+                start = time.time()
+                board.get_hand_legality_by_score(letters_by_coord)
+                latencies.append(time.time() - start)
+    return {
+        'calls': len(latencies),
+        'calls_per_sec': round(len(latencies) / sum(latencies), 1),
+        'latency_seconds': dict(
+            (key, round(value, 8))
+            for key, value in percentiles(latencies).items())
+    }
+
+
+def bench_corpus(args):
+    """Rebuild the canonical position corpus file."""
+
+    corpus = build_corpus()
+    with open(args.corpus, 'w') as f:
+        json.dump(corpus, f, indent=1, separators=(',', ': '),
+                  sort_keys=True)
+        f.write('\n')
+    print("Wrote {} positions to {}".format(len(corpus['positions']),
+                                             args.corpus))
+
+
+def bench_suite(args):
+    """Run the benchmark suite and write its results as JSON.
+
+    Each mode runs in a fresh interpreter so that its lexicon load time and
+    peak RSS are its own.
+    """
+
+    if args.in_process:
+        results = {'modes': {}}
+        for mode in args.mode:
+            results['modes'][mode] = run_suite_mode(mode, args.corpus,
+                                                    args.repeat)
+        if args.validator:
+            results['validator'] = run_suite_validator(args.corpus,
+                                                       args.repeat)
+        json.dump(results, sys.stdout, sort_keys=True)
+        return
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': os.path.basename(args.corpus),
+        'positions': len(load_corpus(args.corpus)),
+        'repeat': args.repeat,
+        'modes': {}
+    }
+    command = [sys.executable, os.path.abspath(__file__), 'suite',
+               '--in-process', '--corpus', args.corpus,
+               '--repeat', str(args.repeat)]
+    for mode in args.mode:
+        output = subprocess.check_output(command + ['--mode', mode])
+        results['modes'].update(json.loads(output.decode())['modes'])
+    output = subprocess.check_output(command + ['--mode', GENERATOR_ANCHOR,
+                                                '--validator'])
+    results['validator'] = json.loads(output.decode())['validator']
+
+    text = json.dumps(results, indent=2, separators=(',', ': '),
+                      sort_keys=True)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+BENCHMARKS = {
+    'boards': bench_board_construction,
+    'generators': bench_generators,
+    'parallel': bench_parallel,
+    'corpus': bench_corpus,
+    'suite': bench_suite,
+    'simulation': bench_simulation,
+    'runs': bench_runs,
+    'objects': bench_objects,
+    'blanks': bench_blanks,
+    'cache': bench_cache,
+    'lines': bench_lines,
+    'kernels': bench_kernels,
+    'hands': bench_hands
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    subparsers = parser.add_subparsers(dest='benchmark')
+
+    boards = subparsers.add_parser(
+        'boards', help="per-game lexicon and board construction cost")
+    boards.add_argument('--private', type=int, default=20,
+                        help="boards built with their own DFA")
+    boards.add_argument('--shared', type=int, default=2000,
+                        help="boards built with the shared lexicon")
+
+    generators = subparsers.add_parser(
+        'generators', help="DAWG vs GADDAG move generation throughput")
+    generators.add_argument('--positions', type=int, default=40)
+    generators.add_argument('--repeat', type=int, default=3)
+    generators.add_argument('--seed', type=int, default=0)
+
+    parallel = subparsers.add_parser(
+        'parallel', help="serial vs process pool top-K search")
+    parallel.add_argument('--workers', type=int,
+                          default=multiprocessing.cpu_count())
+    parallel.add_argument('--positions', type=int, default=40)
+    parallel.add_argument('--k', type=int, default=10)
+    parallel.add_argument('--seed', type=int, default=0)
+
+    corpus = subparsers.add_parser(
+        'corpus', help="rebuild the canonical benchmark positions")
+    corpus.add_argument('--corpus', default=CORPUS_FILE)
+
+    suite = subparsers.add_parser(
+        'suite', help="AI search and validator benchmarks as JSON")
+    suite.add_argument('--corpus', default=CORPUS_FILE)
+    suite.add_argument('--mode', action='append', choices=SUITE_MODES,
+                       help="generator mode to run (default: all)")
+    suite.add_argument('--repeat', type=int, default=3)
+    suite.add_argument('--output', default='-',
+                       help="file to write the results to (default: stdout)")
+    suite.add_argument('--in-process', action='store_true',
+                       help=argparse.SUPPRESS)
+    suite.add_argument('--validator', action='store_true',
+                       help=argparse.SUPPRESS)
+
+    simulation = subparsers.add_parser(
+        'simulation', help="Monte Carlo rollouts per second")
+    simulation.add_argument('--corpus', default=CORPUS_FILE)
+    simulation.add_argument('--stride', type=int, default=4,
+                            help="simulate every n-th corpus position")
+    simulation.add_argument('--workers', type=int,
+                            default=multiprocessing.cpu_count())
+    simulation.add_argument('--candidates', type=int, default=8)
+    simulation.add_argument('--iterations', type=int, default=16)
+    simulation.add_argument('--plies', type=int, default=2)
+
+    runs = subparsers.add_parser(
+        'runs', help="runs of tiles probed square by square vs bitmasks")
+    runs.add_argument('--corpus', default=CORPUS_FILE)
+    runs.add_argument('--repeat', type=int, default=20)
+
+    objects = subparsers.add_parser(
+        'objects', help="per-game memory and time of squares, tiles and Words")
+    objects.add_argument('--corpus', default=CORPUS_FILE)
+    objects.add_argument('--repeat', type=int, default=200)
+    objects.add_argument('--games', type=int, default=2)
+
+    blanks = subparsers.add_parser(
+        'blanks', help="move generation latency with blanks on the rack")
+    blanks.add_argument('--corpus', default=CORPUS_FILE)
+    blanks.add_argument('--repeat', type=int, default=1)
+
+    cache = subparsers.add_parser(
+        'cache', help="repeated top-K queries through the position cache")
+    cache.add_argument('--corpus', default=CORPUS_FILE)
+    cache.add_argument('--queries', type=int, default=5,
+                       help="times each position is asked about")
+    cache.add_argument('--k', type=int, default=10)
+    cache.add_argument('--seed', type=int, default=0)
+
+    lines = subparsers.add_parser(
+        'lines', help="move generation with and without the per-line memo")
+    lines.add_argument('--games', type=int, default=2)
+    lines.add_argument('--turns', type=int, default=20)
+    lines.add_argument('--seed', type=int, default=0)
+
+    kernels = subparsers.add_parser(
+        'kernels', help="whole-board cross-checks and batch scoring")
+    kernels.add_argument('--corpus', default=CORPUS_FILE)
+    kernels.add_argument('--repeat', type=int, default=3)
+
+    hands = subparsers.add_parser(
+        'hands', help="validating hands one by one vs in a batch")
+    hands.add_argument('--corpus', default=CORPUS_FILE)
+    hands.add_argument('--repeat', type=int, default=3)
+
+    args = parser.parse_args()
+    if args.benchmark == 'suite' and not args.mode:
+        args.mode = SUITE_MODES
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+File:   board_core.py
+
+The tiles on a Scrabble board, kept as bitmasks of the occupied squares and a
+flat array of letters, so that the searches can probe the board without
+going through a ScrabbleSquare for every square.
+"""
+
+import random
+import string
+
+#   Squares along each side of the board
+BOARD_SIZE = 15
+#   The letter code of an empty square
+EMPTY = 0
+#   The letter of every letter code, '' for EMPTY
+LETTER_BY_CODE = [''] + [chr(code) for code in range(1, 256)]
+
+#   Seeds the Zobrist keys, so a position hashes the same in every process
+ZOBRIST_SEED = 0x5c7a8b1e
+#   A random 64-bit key for each letter code on each square, indexed
+#   [code][square]. Blanks are stored as uppercase letters, so they get keys
+#   of their own.
+ZOBRIST_KEYS = [None] * 256
+_zobrist_random = random.Random(ZOBRIST_SEED)
+for _letter in string.ascii_lowercase + string.ascii_uppercase:
+    ZOBRIST_KEYS[ord(_letter)] = [_zobrist_random.getrandbits(64)
+                                  for _ in range(BOARD_SIZE * BOARD_SIZE)]
+
+
+def _to_str(data):
+    """Turn a bytearray of letters into a native string."""
+
+    if str is bytes:
+        return str(data)
+    return data.decode('ascii')
+
+
+def trailing_ones(mask):
+    """Count the set bits at the bottom of `mask` before its first clear
+    bit."""
+
+    #   x ^ (x + 1) sets every bit up to and including the lowest clear one
+    return (mask ^ (mask + 1)).bit_length() - 1
+
+
+def leading_ones(mask, width):
+    """Count the set bits at the top of the `width` bit `mask` before its
+    first clear bit."""
+
+    clear = ~mask & ((1 << width) - 1)
+    return width - clear.bit_length()
+
+
+class BoardCore(object):
+    """Occupancy bitmasks and letters of the tiles on a board
+
+    Bit `col` of `row_masks[row]` and bit `row` of `col_masks[col]` are set
+    when (row, col) holds a tile, and the tile's letter is at
+    `letters[row * BOARD_SIZE + col]` as a byte, EMPTY for an empty square.
+    The row and column masks describe the same squares twice, so that runs of
+    tiles can be measured in either direction with a few integer operations
+    instead of a loop over the squares.
+
+    `position_hash` is the Zobrist hash of the tiles: the XOR of the
+    ZOBRIST_KEYS of every tile's letter and square. Placing or removing a
+    tile XORs its key in or out, so the hash follows every change to the
+    board in O(1) and two boards holding the same tiles hash the same,
+    however they got there.
+
+    Coordinates must be on the board; nothing here checks them.
+    """
+
+    def __init__(self):
+        self.row_masks = [0] * BOARD_SIZE
+        self.col_masks = [0] * BOARD_SIZE
+        self.letters = bytearray(BOARD_SIZE * BOARD_SIZE)
+        self.position_hash = 0
+
+    def copy(self):
+        core = BoardCore.__new__(BoardCore)
+        core.row_masks = list(self.row_masks)
+        core.col_masks = list(self.col_masks)
+        core.letters = bytearray(self.letters)
+        core.position_hash = self.position_hash
+        return core
+
+    def place(self, row, col, letter):
+        """Put a tile with `letter` on (row, col)."""
+
+        square = row * BOARD_SIZE + col
+        if self.letters[square]:
+            self.position_hash ^= ZOBRIST_KEYS[self.letters[square]][square]
+        self.row_masks[row] |= 1 << col
+        self.col_masks[col] |= 1 << row
+        self.letters[square] = ord(letter)
+        self.position_hash ^= ZOBRIST_KEYS[self.letters[square]][square]
+
+    def remove(self, row, col):
+        """Take the tile off (row, col)."""
+
+        square = row * BOARD_SIZE + col
+        if self.letters[square]:
+            self.position_hash ^= ZOBRIST_KEYS[self.letters[square]][square]
+        self.row_masks[row] &= ~(1 << col)
+        self.col_masks[col] &= ~(1 << row)
+        self.letters[square] = EMPTY
+
+    def clear(self):
+        """Take every tile off the board."""
+
+        self.row_masks[:] = [0] * BOARD_SIZE
+        self.col_masks[:] = [0] * BOARD_SIZE
+        self.letters[:] = bytearray(BOARD_SIZE * BOARD_SIZE)
+        self.position_hash = 0
+
+    def is_empty(self):
+        return not any(self.row_masks)
+
+    def is_occupied(self, row, col):
+        return (self.row_masks[row] >> col) & 1 == 1
+
+    def letter(self, row, col):
+        """Get the letter on (row, col), or '' if the square is empty."""
+
+        return LETTER_BY_CODE[self.letters[row * BOARD_SIZE + col]]
+
+    def occupied(self):
+        """Get the coordinates of every tile, row by row."""
+
+        coords = []
+        for row, mask in enumerate(self.row_masks):
+            while mask:
+                low = mask & -mask
+                coords.append((row, low.bit_length() - 1))
+                mask ^= low
+        return coords
+
+    def row_string(self, row, empty):
+        """Get the letters of `row`, with `empty` for every empty square."""
+
+        start = row * BOARD_SIZE
+        line = self.letters[start:start + BOARD_SIZE]
+        return _to_str(line.replace(b'\0', empty.encode('ascii')))
+
+    #   The length of the run of tiles next to (row, col) in each direction,
+    #   not counting (row, col) itself
+
+    def run_left(self, row, col):
+        return leading_ones(self.row_masks[row], col)
+
+    def run_right(self, row, col):
+        return trailing_ones(self.row_masks[row] >> (col + 1))
+
+    def run_up(self, row, col):
+        return leading_ones(self.col_masks[col], row)
+
+    def run_down(self, row, col):
+        return trailing_ones(self.col_masks[col] >> (row + 1))
+
+    #   The letters of those runs, in reading order
+
+    def letters_left(self, row, col):
+        end = row * BOARD_SIZE + col
+        return _to_str(self.letters[end - self.run_left(row, col):end])
+
+    def letters_right(self, row, col):
+        start = row * BOARD_SIZE + col + 1
+        return _to_str(self.letters[start:start + self.run_right(row, col)])
+
+    def letters_up(self, row, col):
+        end = row * BOARD_SIZE + col
+        start = end - self.run_up(row, col) * BOARD_SIZE
+        return _to_str(self.letters[start:end:BOARD_SIZE])
+
+    def letters_down(self, row, col):
+        start = (row + 1) * BOARD_SIZE + col
+        end = start + self.run_down(row, col) * BOARD_SIZE
+        return _to_str(self.letters[start:end:BOARD_SIZE])
+
+
+class LetterRows(object):
+    """The letters of a BoardCore as rows of strings
+
+    This stands in for the board's old list of lists of letters, so that
+    `rows[row][col]` still reads (and writes) the letter on a square, with
+    '' for an empty square.
+    """
+
+    def __init__(self, core):
+        self.rows = [LetterRow(core, row) for row in range(BOARD_SIZE)]
+
+    def __getitem__(self, row):
+        return self.rows[row]
+
+    def __len__(self):
+        return BOARD_SIZE
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class LetterRow(object):
+    """One row of a LetterRows view"""
+
+    def __init__(self, core, row):
+        self.core = core
+        self.row = row
+
+    def __getitem__(self, col):
+        if col < 0:
+            col += BOARD_SIZE
+        if not 0 <= col < BOARD_SIZE:
+            raise IndexError(col)
+        return self.core.letter(self.row, col)
+
+    def __setitem__(self, col, letter):
+        if col < 0:
+            col += BOARD_SIZE
+        if not 0 <= col < BOARD_SIZE:
+            raise IndexError(col)
+        if letter:
+            self.core.place(self.row, col, letter)
+        else:
+            self.core.remove(self.row, col)
+
+    def __len__(self):
+        return BOARD_SIZE
+
+    def __iter__(self):
+        core = self.core
+        return iter([core.letter(self.row, col) for col in range(BOARD_SIZE)])
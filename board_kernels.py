@@ -0,0 +1,287 @@
+"""
+File:   board_kernels.py
+
+Whole-board passes over the tiles and premium squares: cross-word scores,
+cross-check masks, and the scores of a batch of moves. The cross-check
+passes work on NumPy arrays when NumPy is installed, and fall back to plain
+Python when it is not; scoring only uses NumPy when asked to. Both give the
+same results.
+"""
+
+from board_core import BOARD_SIZE
+from cross_checks import ACROSS, DOWN, NO_CROSS_WORD
+from move_scorer import MoveScorer
+from scrabble_dawg import ALL_LETTERS_MASK
+from tile import value_by_code, value_by_letter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#   Whether the NumPy kernels can be used
+HAVE_NUMPY = numpy is not None
+
+#   Indexes past the last square, for padding batches of lines
+OFF_BOARD = BOARD_SIZE * BOARD_SIZE
+
+#   premium_arrays() by the ids of the multiplier lists they were made from
+premium_arrays_by_layout = {}
+
+if HAVE_NUMPY:
+    #   Face value of each letter code, as an array to index with a board
+    VALUE_BY_CODE = numpy.array(value_by_code, dtype=numpy.int32)
+
+
+def board_arrays(board):
+    """Get the letter codes and tile values of `board` as 15x15 arrays.
+
+    Needs NumPy. Empty squares have code 0 and value 0.
+    """
+
+    letters = numpy.frombuffer(bytes(board.core.letters), dtype=numpy.uint8)
+    letters = letters.reshape(BOARD_SIZE, BOARD_SIZE)
+    return letters, VALUE_BY_CODE[letters]
+
+
+def premium_arrays(board):
+    """Get the letter and word multiplier of every square as flat arrays,
+    with a last entry of 1 for OFF_BOARD. Needs NumPy.
+
+    The multipliers are the same for every board of a layout, so the arrays
+    are made once per layout and shared.
+    """
+
+    key = (id(board.letter_multipliers), id(board.word_multipliers))
+    try:
+        return premium_arrays_by_layout[key]
+    except KeyError:
+        arrays = premium_arrays_by_layout[key] = tuple(
+            numpy.array(list(multipliers) + [1], dtype=numpy.int32)
+            for multipliers in (board.letter_multipliers,
+                                board.word_multipliers))
+        return arrays
+
+
+def empty_before(occupied):
+    """Get the last empty square strictly before every square along axis 0,
+    or -1 where there is none."""
+
+    index = numpy.arange(BOARD_SIZE)[:, None]
+    last_empty = numpy.maximum.accumulate(numpy.where(occupied, -1, index),
+                                          axis=0)
+    empty = numpy.empty_like(last_empty)
+    empty[0] = -1
+    empty[1:] = last_empty[:-1]
+    return empty
+
+
+def run_lengths(occupied, axis=0):
+    """Count the tiles directly before and after every square along `axis`
+    of a 15x15 array. Returns (before, after)."""
+
+    if axis:
+        before, after = run_lengths(occupied.T)
+        return before.T, after.T
+
+    def lengths_before(occupied):
+        return (numpy.arange(BOARD_SIZE)[:, None] - 1
+                - empty_before(occupied))
+
+    return (lengths_before(occupied),
+            lengths_before(occupied[::-1])[::-1])
+
+
+def run_sums(occupied, values, axis=0):
+    """Sum the runs of tiles directly before and after every square.
+
+    The runs lie along `axis` of the 15x15 arrays. Returns (before, after).
+    The run before a square starts after the last empty square before it,
+    so its sum is the difference of two prefix sums of the line.
+    """
+
+    if axis:
+        before, after = run_sums(occupied.T, values.T)
+        return before.T, after.T
+
+    def sums_before(occupied, values):
+        #   prefix[i] is the sum of the first i squares of each line
+        prefix = numpy.zeros((BOARD_SIZE + 1, BOARD_SIZE), dtype=values.dtype)
+        numpy.cumsum(values, axis=0, out=prefix[1:])
+        return prefix[:-1] - numpy.take_along_axis(
+            prefix, empty_before(occupied) + 1, axis=0)
+
+    return (sums_before(occupied, values),
+            sums_before(occupied[::-1], values[::-1])[::-1])
+
+
+def perpendicular_blocks(board, direction):
+    """Get the function giving the letters on either side of a square,
+    across `direction` (see CrossCheckTable.perpendicular_blocks())."""
+
+    core = board.core
+    if direction == ACROSS:
+        return lambda row, col: (core.letters_up(row, col),
+                                 core.letters_down(row, col))
+    return lambda row, col: (core.letters_left(row, col),
+                             core.letters_right(row, col))
+
+
+def cross_tables(board, direction, compute_mask, use_numpy=HAVE_NUMPY):
+    """Compute the cross-check masks and cross scores of the whole board.
+
+    Returns (masks, scores), lists by square index in the format of
+    CrossCheckTable. `compute_mask(before, after)` is called once for
+    every distinct pair of perpendicular blocks, however many squares
+    share it.
+
+    With NumPy, the cross scores and the squares that form perpendicular
+    words are found in a few passes over the whole board. Looking the
+    masks up in the lexicon cannot be vectorized, so it is only done for
+    those squares.
+    """
+
+    blocks = perpendicular_blocks(board, direction)
+    mask_by_blocks = {}
+
+    def mask_of(before, after):
+        try:
+            return mask_by_blocks[before, after]
+        except KeyError:
+            mask = mask_by_blocks[before, after] = compute_mask(before,
+                                                                after)
+            return mask
+
+    if not use_numpy:
+        core = board.core
+        masks = [0] * (BOARD_SIZE * BOARD_SIZE)
+        scores = [NO_CROSS_WORD] * (BOARD_SIZE * BOARD_SIZE)
+        for row in range(BOARD_SIZE):
+            for col in range(BOARD_SIZE):
+                if core.is_occupied(row, col):
+                    continue
+                idx = row * BOARD_SIZE + col
+                before, after = blocks(row, col)
+                if before or after:
+                    masks[idx] = mask_of(before, after)
+                    scores[idx] = sum(value_by_letter[letter]
+                                      for letter in before + after)
+                else:
+                    masks[idx] = ALL_LETTERS_MASK
+        return masks, scores
+
+    letters, values = board_arrays(board)
+    occupied = letters != 0
+    #   Words across ACROSS moves run down the columns, along axis 0
+    before, after = run_sums(occupied, values, direction)
+    lines = occupied if direction == ACROSS else occupied.T
+    touching = numpy.zeros_like(lines)
+    touching[1:] |= lines[:-1]
+    touching[:-1] |= lines[1:]
+    if direction != ACROSS:
+        touching = touching.T
+    forms_word = touching & ~occupied
+    scores = numpy.where(forms_word, before + after, NO_CROSS_WORD)
+    masks = numpy.where(occupied, 0, ALL_LETTERS_MASK)
+
+    masks = masks.ravel().tolist()
+    for row, col in numpy.argwhere(forms_word).tolist():
+        masks[row * BOARD_SIZE + col] = mask_of(*blocks(row, col))
+    return masks, scores.ravel().tolist()
+
+
+def move_direction(board, letters_by_coord):
+    """Get the direction a legal move is scored along.
+
+    This is the line its tiles are on. A single tile is scored ACROSS if
+    it has a tile to its left or right, and DOWN otherwise, as the move
+    generators record it.
+    """
+
+    coords = sorted(letters_by_coord)
+    if len(coords) > 1:
+        return ACROSS if coords[0][0] == coords[-1][0] else DOWN
+    row, col = coords[0]
+    core = board.core
+    if core.run_left(row, col) or core.run_right(row, col):
+        return ACROSS
+    return DOWN
+
+
+def score_moves(board, moves, use_numpy=False):
+    """Score a batch of moves that are already known to be legal.
+
+    `moves` is a list of (letters_by_coord, direction) pairs. Returns the
+    score of each move, the same as MoveScorer.score() gives.
+
+    With `use_numpy`, every move's main word is laid out as a row of square
+    indexes, padded with OFF_BOARD, and the tile values, multipliers and
+    cross scores of the whole batch are gathered and combined with the
+    MoveScorer formula in one pass. On the benchmark corpus this is at
+    best 1.4x faster than MoveScorer from a few hundred moves up, and
+    slower below that, so it is only used when asked for.
+    """
+
+    if not use_numpy:
+        scorer = MoveScorer(board)
+        return [scorer.score(letters_by_coord, direction)
+                for letters_by_coord, direction in moves]
+    if not moves:
+        return []
+
+    #   The placed tiles of the whole batch are flattened into one list,
+    #   and each move's main word is found from its first and last tile and
+    #   the runs of tiles around the board's squares, all as whole arrays
+    letters, values = board_arrays(board)
+    occupied = letters != 0
+    runs = [run_lengths(occupied, 1 - direction)
+            for direction in (ACROSS, DOWN)]
+    runs_before = numpy.array([before.ravel() for before, _ in runs])
+    runs_after = numpy.array([after.ravel() for _, after in runs])
+
+    tiles = [tile for letters_by_coord, _ in moves
+             for tile in letters_by_coord.items()]
+    tile_squares = numpy.array([row * BOARD_SIZE + col
+                                for (row, col), _ in tiles])
+    tile_letter_values = [value_by_letter[letter] for _, letter in tiles]
+    num_tiles = numpy.array([len(letters_by_coord)
+                             for letters_by_coord, _ in moves])
+    directions = numpy.array([direction for _, direction in moves])
+    tile_moves = numpy.repeat(numpy.arange(len(moves)), num_tiles)
+    offsets = numpy.cumsum(num_tiles) - num_tiles
+
+    #   Along a line, square indexes grow with the row or column
+    first = numpy.minimum.reduceat(tile_squares, offsets)
+    last = numpy.maximum.reduceat(tile_squares, offsets)
+    steps = numpy.where(directions == ACROSS, 1, BOARD_SIZE)
+    before = runs_before[directions, first]
+    starts = first - before * steps
+    lengths = (last - first) // steps + 1 + before \
+        + runs_after[directions, last]
+    positions = numpy.arange(BOARD_SIZE)
+    squares = starts[:, None] + steps[:, None] * positions
+    squares[positions >= lengths[:, None]] = OFF_BOARD
+    tile_positions = (tile_squares - starts[tile_moves]) // steps[tile_moves]
+    placed_values = numpy.zeros((len(moves), BOARD_SIZE), dtype=numpy.int32)
+    placed_values[tile_moves, tile_positions] = tile_letter_values
+    placed = numpy.zeros((len(moves), BOARD_SIZE), dtype=bool)
+    placed[tile_moves, tile_positions] = True
+
+    letter_multipliers, word_multipliers = premium_arrays(board)
+    #   Each table gets one more entry, for OFF_BOARD
+    tile_values = numpy.append(values.ravel(), 0)
+    cross_scores = numpy.full((2, OFF_BOARD + 1), NO_CROSS_WORD,
+                              dtype=numpy.int32)
+    cross_scores[:, :OFF_BOARD] = board.cross_checks.scores
+
+    placed_values = placed_values * letter_multipliers[squares]
+    square_multipliers = word_multipliers[squares]
+    crossing = cross_scores[directions[:, None], squares]
+    #   Squares with a newly placed tile are empty on the board, so their
+    #   tile value is 0 and the two sums do not overlap
+    main_sums = (tile_values[squares] + placed_values).sum(axis=1)
+    word_multiplier = numpy.where(placed, square_multipliers, 1).prod(axis=1)
+    cross_sums = numpy.where(placed & (crossing != NO_CROSS_WORD),
+                             (crossing + placed_values) * square_multipliers,
+                             0).sum(axis=1)
+    return (main_sums * word_multiplier + cross_sums).tolist()
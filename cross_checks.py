@@ -0,0 +1,186 @@
+"""
+File:   cross_checks.py
+
+Cross-check sets for the empty squares of a Scrabble board.
+"""
+
+from scrabble_dawg import ALL_LETTERS_MASK, NO_STATE, index_by_letter
+from tile import value_by_letter
+
+#   Some useful 'constants'
+BOARD_SIZE = 15
+#   Move directions. A move in one direction is constrained by the words it
+#   forms in the other direction.
+ACROSS = 0
+DOWN = 1
+#   Cross score of a square that forms no perpendicular word
+NO_CROSS_WORD = -1
+
+
+class CrossCheckTable(object):
+    """Cross-check masks for every square of a board, per direction
+
+    `masks[direction][row * BOARD_SIZE + col]` is a 26-bit mask of the letters
+    that may be placed on the empty square (row, col) by a move played in
+    `direction` without forming an illegal word in the other direction.
+    Squares with no perpendicular neighbours allow every letter.
+
+    `scores[direction][row * BOARD_SIZE + col]` is the summed face value of
+    the tiles in that perpendicular word (the partial score a tile placed on
+    the square adds to), or NO_CROSS_WORD if no perpendicular word is formed.
+
+    The table is kept current by calling update() with the coordinates of
+    each hand played, which only touches the squares at the ends of the
+    words those tiles are part of.
+    """
+
+    def __init__(self, board, dawg):
+        self.board = board
+        self.dawg = dawg
+        #   These defaults are exact for an empty board
+        self.masks = ([ALL_LETTERS_MASK] * (BOARD_SIZE * BOARD_SIZE),
+                      [ALL_LETTERS_MASK] * (BOARD_SIZE * BOARD_SIZE))
+        self.scores = ([NO_CROSS_WORD] * (BOARD_SIZE * BOARD_SIZE),
+                       [NO_CROSS_WORD] * (BOARD_SIZE * BOARD_SIZE))
+        if not board.core.is_empty():
+            self.refresh()
+
+    def refresh(self):
+        """Recompute the cross-checks of every square.
+
+        The whole board is done in one pass per direction by
+        board_kernels.cross_tables(), with NumPy if it is installed.
+        """
+
+        #   Imported here because board_kernels imports this module: it
+        #   takes ACROSS, DOWN and NO_CROSS_WORD from here as it loads, so
+        #   a module-level import either way round would find this module
+        #   half initialized
+        from board_kernels import cross_tables
+        for direction in (ACROSS, DOWN):
+            masks, scores = cross_tables(self.board, direction,
+                                         self.compute_mask)
+            #   Filled in place, so every holder of the lists sees the
+            #   new entries
+            self.masks[direction][:] = masks
+            self.scores[direction][:] = scores
+
+    def copy(self, board):
+        """Get a copy of the table for `board`, a copy of this one's board."""
+
+        table = CrossCheckTable.__new__(CrossCheckTable)
+        table.board = board
+        table.dawg = self.dawg
+        table.masks = (list(self.masks[ACROSS]), list(self.masks[DOWN]))
+        table.scores = (list(self.scores[ACROSS]), list(self.scores[DOWN]))
+        return table
+
+    def update(self, coords, journal=None):
+        """Bring the table up to date after tiles were placed on `coords`.
+
+        Only the empty squares at either end of the runs of tiles through
+        each placed tile can have changed: the first empty squares above and
+        below it (for ACROSS moves) and to its left and right (for DOWN
+        moves).
+
+        Keyword Arguments:
+        journal -- A list to append (direction, index, mask, score) to for
+            every entry before it is changed, so that restore() can undo
+            the update
+        """
+
+        core = self.board.core
+        stale = set()
+        for row, col in coords:
+            idx = row * BOARD_SIZE + col
+            if journal is not None:
+                for direction in (ACROSS, DOWN):
+                    journal.append((direction, idx, self.masks[direction][idx],
+                                    self.scores[direction][idx]))
+            self.masks[ACROSS][idx] = self.masks[DOWN][idx] = 0
+            self.scores[ACROSS][idx] = self.scores[DOWN][idx] = NO_CROSS_WORD
+            #   A vertical run constrains ACROSS moves at its ends, and a
+            #   horizontal run constrains DOWN moves at its ends.
+            top = row - core.run_up(row, col) - 1
+            if top >= 0:
+                stale.add((top, col, ACROSS))
+            bottom = row + core.run_down(row, col) + 1
+            if bottom < BOARD_SIZE:
+                stale.add((bottom, col, ACROSS))
+            left = col - core.run_left(row, col) - 1
+            if left >= 0:
+                stale.add((row, left, DOWN))
+            right = col + core.run_right(row, col) + 1
+            if right < BOARD_SIZE:
+                stale.add((row, right, DOWN))
+        for row, col, direction in stale:
+            if journal is not None:
+                idx = row * BOARD_SIZE + col
+                journal.append((direction, idx, self.masks[direction][idx],
+                                self.scores[direction][idx]))
+            self.refresh_square(row, col, direction)
+
+    def restore(self, journal):
+        """Undo the update that filled `journal`."""
+
+        for direction, idx, mask, score in reversed(journal):
+            self.masks[direction][idx] = mask
+            self.scores[direction][idx] = score
+
+    def refresh_square(self, row, col, direction):
+        """Recompute the cross-check of (row, col) for moves in `direction`."""
+
+        idx = row * BOARD_SIZE + col
+        if self.board.core.is_occupied(row, col):
+            #   Occupied squares cannot be played on
+            self.masks[direction][idx] = 0
+            self.scores[direction][idx] = NO_CROSS_WORD
+            return
+        before, after = self.perpendicular_blocks(row, col, direction)
+        self.masks[direction][idx] = self.compute_mask(before, after)
+        if before or after:
+            self.scores[direction][idx] = sum(value_by_letter[letter]
+                                              for letter in before + after)
+        else:
+            self.scores[direction][idx] = NO_CROSS_WORD
+
+    def perpendicular_blocks(self, row, col, direction):
+        """Get the letters on either side of (row, col) across `direction`.
+
+        For an ACROSS move these are the contiguous letters directly above
+        and below the square; for a DOWN move, those to its left and right.
+        """
+
+        core = self.board.core
+        if direction == ACROSS:
+            return core.letters_up(row, col), core.letters_down(row, col)
+        return core.letters_left(row, col), core.letters_right(row, col)
+
+    def compute_mask(self, before, after):
+        """Get the mask of letters L for which `before` + L + `after` is a word.
+
+        Returns a mask allowing every letter if both blocks are empty, since
+        no perpendicular word is formed. Blanks in the blocks are uppercase
+        letters, and are read as their lowercase letter.
+        """
+
+        if not before and not after:
+            return ALL_LETTERS_MASK
+        dawg = self.dawg
+        before = before.lower()
+        after = after.lower()
+        state = dawg.walk(before)
+        if state == NO_STATE:
+            return 0
+        mask = 0
+        for label, target in dawg.edges(state):
+            end = dawg.walk(after, target)
+            if end != NO_STATE and dawg.is_accept(end):
+                mask |= 1 << label
+        return mask
+
+    def allows(self, row, col, letter, direction):
+        """Check whether `letter` may be played at (row, col)."""
+
+        mask = self.masks[direction][row * BOARD_SIZE + col]
+        return bool(mask & (1 << index_by_letter[letter.lower()]))
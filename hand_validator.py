@@ -0,0 +1,139 @@
+"""
+File:   hand_validator.py
+
+Validates and scores many candidate hands on one board at once, sharing the
+work that does not depend on the hand.
+"""
+
+from board_core import BOARD_SIZE
+from board_kernels import move_direction, score_moves
+from cross_checks import ACROSS, DOWN, NO_CROSS_WORD
+from scrabble_dawg import index_by_letter
+
+
+class HandValidator(object):
+    """Checks batches of hands against one board
+
+    ScrabbleBoard.get_hand_legality_by_score() walks every word a hand
+    forms, square by square, and looks each one up in the lexicon. Over a
+    batch of hands on the same board most of that work is repeated, so
+    here it is done once:
+
+    - The perpendicular word a tile forms is checked against the board's
+      CrossCheckTable, which already holds the letters each empty square
+      allows, so it is one mask test instead of a walk and a lookup.
+    - Whether a main word is in the lexicon is remembered by word for the
+      life of the validator, since many hands form the same word.
+    - The hands found legal are scored together by
+      board_kernels.score_moves().
+
+    The results are the same as get_hand_legality_by_score() gives, except
+    that hands with a tile off the board or on a square that already holds
+    a tile are always illegal. The validator must not outlive a change to
+    the board.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        #   Whether each main word looked up so far is in the lexicon
+        self.legal_words = {}
+
+    def is_word(self, word):
+        """Check whether `word` is in the lexicon, remembering the answer."""
+
+        try:
+            return self.legal_words[word]
+        except KeyError:
+            legal = self.legal_words[word] = self.board.dfa.accepts(word)
+            return legal
+
+    def direction(self, letters_by_coord):
+        """Get the direction a hand is played in, or None if it is illegal.
+
+        A single tile is given the direction move_direction() gives it, the
+        same as the move generators record; either way it scores the same.
+        """
+
+        board = self.board
+        core = board.core
+        letters = core.letters
+        coords = sorted(letters_by_coord)
+        if not coords:
+            return None
+        for row, col in coords:
+            if (not (0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE)
+                    or letters[row * BOARD_SIZE + col]):
+                return None
+        anchor_coords = board.anchor_coords
+        if not any(coord in anchor_coords for coord in coords):
+            return None
+
+        (first_row, first_col), (last_row, last_col) = coords[0], coords[-1]
+        if len(coords) == 1:
+            direction = move_direction(board, letters_by_coord)
+        elif first_row == last_row:
+            direction = ACROSS
+        elif all(col == first_col for _, col in coords):
+            direction = DOWN
+        else:
+            return None
+
+        #   The squares from the first tile to the last must all be filled,
+        #   by the hand or the board
+        if direction == ACROSS:
+            filled = core.row_masks[first_row]
+            first, last = first_col, last_col
+            for _, col in coords:
+                filled |= 1 << col
+            start = first_col - core.run_left(first_row, first_col)
+            end = last_col + core.run_right(last_row, last_col)
+            squares = range(first_row * BOARD_SIZE + start,
+                            first_row * BOARD_SIZE + end + 1)
+        else:
+            filled = core.col_masks[first_col]
+            first, last = first_row, last_row
+            for row, _ in coords:
+                filled |= 1 << row
+            start = first_row - core.run_up(first_row, first_col)
+            end = last_row + core.run_down(last_row, last_col)
+            squares = range(start * BOARD_SIZE + first_col,
+                            (end + 1) * BOARD_SIZE + first_col, BOARD_SIZE)
+        span = ((1 << (last - first + 1)) - 1) << first
+        if filled & span != span or end == start:
+            return None
+
+        masks = board.cross_checks.masks[direction]
+        cross_scores = board.cross_checks.scores[direction]
+        for (row, col), letter in letters_by_coord.items():
+            square = row * BOARD_SIZE + col
+            if (cross_scores[square] != NO_CROSS_WORD
+                    and not (masks[square]
+                             >> index_by_letter[letter.lower()]) & 1):
+                return None
+
+        word = ''.join(chr(letters[square]) if letters[square]
+                       else letters_by_coord[divmod(square, BOARD_SIZE)]
+                       for square in squares)
+        if not self.is_word(word):
+            return None
+        return direction
+
+    def scores(self, hands):
+        """Get the score of each of `hands`, or 0 for those that are illegal.
+
+        `hands` is a list of letters_by_coord dicts, as passed to
+        get_hand_legality_by_score().
+        """
+
+        moves = []
+        indexes = []
+        for index, letters_by_coord in enumerate(hands):
+            direction = self.direction(letters_by_coord)
+            if direction is not None:
+                moves.append((letters_by_coord, direction))
+                indexes.append(index)
+
+        scores = [0] * len(hands)
+        for index, score in zip(indexes, score_moves(self.board, moves)):
+            scores[index] = score
+        return scores
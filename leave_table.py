@@ -0,0 +1,311 @@
+"""
+File:   leave_table.py
+
+Values of the tiles kept on a rack after a move (the move's "leave"), so that
+moves can be judged by equity, their score plus the value of their leave,
+rather than by score alone.
+"""
+
+import ctypes
+import hashlib
+import itertools
+import os
+import struct
+import sys
+import threading
+from array import array
+
+from mapped_image import (HEADER_PREFIX, ImageError, load_image, map_arrays,
+                          map_image, pack_header, write_image)
+from scrabble_dawg import ALPHABET
+from tile import tile_letter
+
+#   The tiles a leave may hold, the blank last
+LEAVE_SYMBOLS = ALPHABET + ' '
+#   A move places at least one tile, so at most 6 of a 7 tile rack are left
+MAX_LEAVE = 6
+#   Values are stored in hundredths of a point
+LEAVE_SCALE = 100
+
+index_by_symbol = dict((symbol, i) for i, symbol in enumerate(LEAVE_SYMBOLS))
+
+LEAVES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'standard.leaves')
+
+#   Leave table image layout: a fixed header followed by one int16 value per
+#   leave, indexed by LeaveTable.rank(), in the byte order of the header.
+TABLE_VERSION = 1
+TABLE_MAGIC = b'SCRBLEAV'
+#   HEADER_PREFIX, then max leave, symbols, padding, values, model sha1
+TABLE_HEADER = struct.Struct(HEADER_PREFIX + 'BBxxI20s')
+
+#   The leave model: the value of keeping one of each tile, in points
+tile_values = {
+    'a': 1.0, 'b': -2.0, 'c': 0.5, 'd': 0.5, 'e': 4.0, 'f': -2.0, 'g': -2.0,
+    'h': 1.0, 'i': -0.5, 'j': -1.5, 'k': -1.0, 'l': -0.5, 'm': 0.5,
+    'n': 0.5, 'o': -1.0, 'p': -0.5, 'q': -7.0, 'r': 1.5, 's': 8.0, 't': 0.5,
+    'u': -3.0, 'v': -5.5, 'w': -3.5, 'x': 3.5, 'y': -0.5, 'z': 3.0,
+    ' ': 25.0
+}
+VOWELS = 'aeiou'
+#   Extra copies of a tile are worth this fraction of the first copy...
+DUPLICATE_WORTH = 0.5
+#   ...less this much for every pair of copies
+DUPLICATE_PENALTY = 3.0
+#   Ideal share of vowels among the letters left, and the penalty for each
+#   squared vowel away from it
+VOWEL_SHARE = 0.4
+BALANCE_PENALTY = 1.5
+#   Keeping a U along with a Q
+QU_BONUS = 5.0
+
+
+class LeaveTableError(ImageError):
+    """Exception that may be raised when loading a leave table image
+
+    Raise this exception when a file is not a leave table image, or was
+    written by a different version of this module or for a different byte
+    order or table size.
+    """
+    pass
+
+
+def model_value(counts):
+    """Value a leave with the leave model, in points.
+
+    `counts` holds the number of each LEAVE_SYMBOLS symbol in the leave.
+    """
+
+    value = 0.0
+    vowels = 0
+    letters = 0
+    for symbol, count in zip(LEAVE_SYMBOLS, counts):
+        if not count:
+            continue
+        value += tile_values[symbol] * (1 + DUPLICATE_WORTH * (count - 1))
+        value -= DUPLICATE_PENALTY * count * (count - 1) / 2
+        if symbol in VOWELS:
+            vowels += count
+        if symbol != ' ':
+            letters += count
+    if letters > 1:
+        value -= BALANCE_PENALTY * (vowels - VOWEL_SHARE * letters) ** 2
+    if counts[index_by_symbol['q']] and counts[index_by_symbol['u']]:
+        value += QU_BONUS
+    return value
+
+
+def model_digest():
+    """The SHA-1 digest of the leave model's parameters."""
+
+    parameters = (sorted(tile_values.items()), VOWELS, DUPLICATE_WORTH,
+                  DUPLICATE_PENALTY, VOWEL_SHARE, BALANCE_PENALTY, QU_BONUS)
+    return hashlib.sha1(repr(parameters).encode('ascii')).digest()
+
+
+class LeaveTable(object):
+    """The value of every leave of up to MAX_LEAVE tiles
+
+    A leave is a multiset of tiles, so it is identified by its tiles in
+    sorted order. Sorted leaves of k tiles drawn from n symbols correspond
+    one-to-one with k-combinations of n + k - 1 items (add i to the i-th
+    smallest tile), and the combinatorial number system ranks those densely.
+    Leaves of each size are ranked after all smaller leaves, which numbers
+    all 1,107,568 leaves of up to 6 tiles from 0 without gaps, so the table
+    is a flat int16 array: 2 MB on disk, mapped rather than read.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        #   The model the values were built with, and the image they were
+        #   loaded from, if any
+        self.model_digest = None
+        self.image = None
+        self.image_file = None
+        #   binomials[n][k] for every n and k rank() needs
+        num_symbols = len(LEAVE_SYMBOLS)
+        num_items = num_symbols + MAX_LEAVE
+        self.binomials = [[0] * (MAX_LEAVE + 1) for _ in range(num_items)]
+        for n in range(num_items):
+            self.binomials[n][0] = 1
+            for k in range(1, min(n, MAX_LEAVE) + 1):
+                self.binomials[n][k] = (self.binomials[n - 1][k - 1]
+                                        + self.binomials[n - 1][k])
+        #   offsets[k] is the number of leaves smaller than k tiles
+        self.offsets = [0]
+        for k in range(MAX_LEAVE + 1):
+            self.offsets.append(self.offsets[-1]
+                                + self.binomials[num_symbols + k - 1][k])
+
+    @classmethod
+    def size(cls):
+        """The number of leaves of up to MAX_LEAVE tiles."""
+
+        return LeaveTable(()).offsets[-1]
+
+    @classmethod
+    def build(cls):
+        """Value every leave with the leave model."""
+
+        table = cls(array('h', [0]) * cls.size())
+        values = table.values
+        limit = (1 << 15) - 1
+        num_symbols = len(LEAVE_SYMBOLS)
+        for k in range(MAX_LEAVE + 1):
+            for labels in itertools.combinations_with_replacement(
+                    range(num_symbols), k):
+                counts = [0] * num_symbols
+                for label in labels:
+                    counts[label] += 1
+                value = int(round(model_value(counts) * LEAVE_SCALE))
+                values[table.rank(labels)] = max(-limit, min(limit, value))
+        table.model_digest = model_digest()
+        return table
+
+    def rank(self, labels):
+        """Get the index of the leave whose sorted symbol indexes are
+        `labels`."""
+
+        binomials = self.binomials
+        rank = self.offsets[len(labels)]
+        for i, label in enumerate(labels):
+            rank += binomials[label + i][i + 1]
+        return rank
+
+    def value(self, letters):
+        """Get the value, in points, of keeping `letters` on the rack.
+
+        Blanks are ' '. Raises ValueError for leaves of more than MAX_LEAVE
+        tiles.
+        """
+
+        if len(letters) > MAX_LEAVE:
+            raise ValueError("Leaves hold at most {} tiles, not {}".format(
+                MAX_LEAVE, len(letters)))
+        labels = sorted(index_by_symbol[letter] for letter in letters)
+        return float(self.values[self.rank(labels)]) / LEAVE_SCALE
+
+    def __len__(self):
+        return len(self.values)
+
+    def save(self, image_file):
+        """Write the table to `image_file` as a binary image."""
+
+        header = pack_header(TABLE_HEADER, TABLE_MAGIC, TABLE_VERSION,
+                             MAX_LEAVE, len(LEAVE_SYMBOLS), len(self),
+                             self.model_digest or b'\0' * 20)
+        write_image(image_file, header, [(self.values, 'h')])
+
+    @classmethod
+    def load(cls, image_file):
+        """Map a leave table image written by save().
+
+        Raises LeaveTableError if the file is not a usable image.
+        """
+
+        image, (max_leave, num_symbols, num_values, digest) = map_image(
+            image_file, TABLE_HEADER, TABLE_MAGIC, TABLE_VERSION,
+            LeaveTableError, 'a leave table image')
+        if ((max_leave, num_symbols, num_values)
+                != (MAX_LEAVE, len(LEAVE_SYMBOLS), cls.size())):
+            raise LeaveTableError(
+                "'{}' is for a different table size".format(image_file))
+        values, = map_arrays(image, image_file, TABLE_HEADER.size,
+                             [(ctypes.c_int16, num_values)],
+                             error=LeaveTableError)
+
+        table = cls(values)
+        table.model_digest = digest
+        table.image = image
+        table.image_file = image_file
+        return table
+
+    def __reduce__(self):
+        #   A mapped table is sent to other processes by name, and they map
+        #   the same image
+        if self.image_file is not None:
+            return (get_leave_table, (self.image_file,))
+        return (LeaveTable, (array('h', self.values),))
+
+
+class Equity(object):
+    """Values moves by their score plus the value of their leave
+
+    An Equity is made for one rack, and can be passed as the `evaluate`
+    function of move_ranking.top_moves() and ScrabbleAI. Moves using the same
+    tiles share a leave, so each leave is only looked up once.
+    """
+
+    def __init__(self, table, rack):
+        self.table = table
+        self.rack = list(rack)
+        self.value_by_placed = {}
+
+    def leave_value(self, word):
+        """Get the value of the tiles `word` leaves on the rack."""
+
+        placed = tuple(sorted(tile_letter(letter) for letter
+                              in word.get_letters_by_coord().values()))
+        try:
+            return self.value_by_placed[placed]
+        except KeyError:
+            pass
+        leave = list(self.rack)
+        for letter in placed:
+            leave.remove(letter)
+        value = self.value_by_placed[placed] = self.table.value(leave)
+        return value
+
+    def __call__(self, word):
+        return word.get_score() + self.leave_value(word)
+
+
+def load_leave_table(image_file=LEAVES_FILE):
+    """Load the leave table, preferring its prebuilt image.
+
+    The image is used only if it was built with the current leave model.
+    A missing, corrupt or stale image is rebuilt and rewritten in place when
+    the directory is writable.
+    """
+
+    digest = model_digest()
+    return load_image(image_file, LeaveTable.load,
+                      lambda table: table.model_digest == digest,
+                      LeaveTable.build, remap=True)
+
+
+_table_by_file = {}
+_table_lock = threading.Lock()
+
+
+def get_leave_table(image_file=LEAVES_FILE):
+    """Return the process-wide leave table for `image_file`.
+
+    Like lexicon.get_lexicon(), the table is loaded once per process.
+    """
+
+    key = os.path.abspath(image_file)
+    try:
+        return _table_by_file[key]
+    except KeyError:
+        pass
+    with _table_lock:
+        if key not in _table_by_file:
+            _table_by_file[key] = load_leave_table(image_file)
+        return _table_by_file[key]
+
+
+def main(argv):
+    """Build the leave table image.
+
+    Usage: python leave_table.py [image_file]
+    """
+
+    image_file = argv[1] if len(argv) > 1 else LEAVES_FILE
+    table = LeaveTable.build()
+    table.save(image_file)
+    print("Wrote {} ({} leaves)".format(image_file, len(table)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,51 @@
+"""
+File:   lexicon.py
+
+A process-wide registry of lexicons.
+
+Building or even mapping a lexicon is far more expensive than setting up a
+game, so every ScrabbleBoard, ScrabbleAI and headless engine in a process
+should take its lexicon from here instead of constructing its own DFA.
+"""
+
+import os
+import threading
+
+from scrabble_dfa import DFA, WORDS_FILE
+
+_lexicon_by_key = {}
+_registry_lock = threading.Lock()
+
+
+def get_lexicon(words_file=WORDS_FILE):
+    """Return the shared DFA for `words_file`.
+
+    The DFA is built the first time a word list is requested and every later
+    call returns that same instance. Concurrent first calls from several
+    threads build it exactly once.
+    """
+
+    key = os.path.abspath(words_file)
+    try:
+        #   Fast path: no locking once the lexicon exists
+        return _lexicon_by_key[key]
+    except KeyError:
+        pass
+    with _registry_lock:
+        if key not in _lexicon_by_key:
+            _lexicon_by_key[key] = DFA(words_file)
+        return _lexicon_by_key[key]
+
+
+def register_lexicon(dfa, words_file=WORDS_FILE):
+    """Make `dfa` the shared lexicon for `words_file`."""
+
+    with _registry_lock:
+        _lexicon_by_key[os.path.abspath(words_file)] = dfa
+
+
+def clear_lexicons():
+    """Forget every shared lexicon so the next request rebuilds it."""
+
+    with _registry_lock:
+        _lexicon_by_key.clear()
@@ -0,0 +1,149 @@
+"""
+File:   mapped_image.py
+
+Binary images of the engine's large read-only tables (the lexicon graphs, the
+anagram index and the leave table), written once and then mapped rather than
+read, so that loading one costs no parsing and every process shares its
+pages.
+
+Every image starts with a header packed with a struct format beginning with
+HEADER_PREFIX: an 8 byte magic identifying the kind of image, a format
+version and whether it was written little-endian. The rest of the header and
+the arrays after it are up to each kind of image.
+"""
+
+import ctypes
+import hashlib
+import mmap
+import os
+import sys
+from array import array
+
+#   magic, version, little-endian flag, padding
+HEADER_PREFIX = '<8sHBx'
+#   Fields of HEADER_PREFIX, which map_image() does not return
+PREFIX_FIELDS = 3
+
+
+class ImageError(ValueError):
+    """Exception that may be raised when mapping an image
+
+    Raise this exception when a file is not an image of the expected kind,
+    or was written by a different version of its module or for a different
+    byte order.
+    """
+    pass
+
+
+def array_bytes(values):
+    """Get the bytes of an array.array, on any Python version."""
+
+    try:
+        return values.tobytes()
+    except AttributeError:
+        return values.tostring()
+
+
+def file_digest(path):
+    """Return the SHA-1 digest of the contents of `path`."""
+
+    with open(path, 'rb') as source:
+        return hashlib.sha1(source.read()).digest()
+
+
+def write_image(image_file, header, sections):
+    """Write an image of `header` followed by `sections`.
+
+    `header` is the packed header. Each section is either bytes, or a pair
+    (values, typecode) written as an array.array of that type. The image is
+    written to a temporary file and renamed into place, so processes mapping
+    it concurrently never see a partial file.
+    """
+
+    temp_file = '{}.{}.tmp'.format(image_file, os.getpid())
+    with open(temp_file, 'wb') as image:
+        image.write(header)
+        for section in sections:
+            if isinstance(section, tuple):
+                values, typecode = section
+                section = array_bytes(array(typecode, values))
+            image.write(section)
+    os.rename(temp_file, image_file)
+
+
+def pack_header(header, magic, version, *fields):
+    """Pack an image header: HEADER_PREFIX's fields, then `fields`."""
+
+    return header.pack(magic, version, sys.byteorder == 'little', *fields)
+
+
+def map_image(image_file, header, magic, version, error=ImageError,
+              kind='image'):
+    """Map `image_file` copy-on-write and check its header.
+
+    Returns (image, fields), the mmap and the header's fields after
+    HEADER_PREFIX. Raises `error`, naming the image a `kind`, if the file is
+    too short, has the wrong magic or version, or was written for the other
+    byte order.
+    """
+
+    with open(image_file, 'rb') as image_fd:
+        image = mmap.mmap(image_fd.fileno(), 0, access=mmap.ACCESS_COPY)
+    if len(image) < header.size:
+        raise error("'{}' is truncated".format(image_file))
+    fields = header.unpack_from(image, 0)
+    if fields[0] != magic:
+        raise error("'{}' is not {}".format(image_file, kind))
+    if fields[1] != version:
+        raise error("'{}' has version {}, expected {}".format(
+            image_file, fields[1], version))
+    if bool(fields[2]) != (sys.byteorder == 'little'):
+        raise error("'{}' has the wrong byte order".format(image_file))
+    return image, fields[PREFIX_FIELDS:]
+
+
+def map_arrays(image, image_file, offset, layout, trailing=0,
+               error=ImageError):
+    """Get ctypes arrays over `image`, one for each (ctype, count) of
+    `layout`, laid out back to back from `offset`.
+
+    The image must end exactly `trailing` bytes after the last array;
+    `error` is raised if it does not.
+    """
+
+    size = offset + sum(ctypes.sizeof(ctype) * count
+                        for ctype, count in layout)
+    if len(image) != size + trailing:
+        raise error("'{}' is truncated".format(image_file))
+    arrays = []
+    for ctype, count in layout:
+        arrays.append((ctype * count).from_buffer(image, offset))
+        offset += ctypes.sizeof(ctype) * count
+    return arrays
+
+
+def load_image(image_file, load, is_current, build, remap=False):
+    """Load the table stored in `image_file`, rebuilding it if it is stale.
+
+    `load(image_file)` maps the image, and `is_current(table)` checks that
+    it was built from the current source. A missing, corrupt or stale image
+    is replaced by `build()`, which is saved back in place when the
+    directory is writable. With `remap`, the saved image is then mapped and
+    returned in place of the table built.
+    """
+
+    try:
+        table = load(image_file)
+    except (IOError, OSError, ValueError):
+        #   ValueError covers ImageError and mmap's refusal to map an empty
+        #   file
+        table = None
+    if table is not None and is_current(table):
+        return table
+
+    table = build()
+    try:
+        table.save(image_file)
+    except (IOError, OSError):
+        return table
+    return load(image_file) if remap else table
@@ -0,0 +1,748 @@
+"""
+File:   move_generator.py
+
+Anchor-based move generation (Appel & Jacobson, "The World's Fastest
+Scrabble Program", 1988), and its bidirectional GADDAG variant (Gordon,
+"A Faster Scrabble Move Generation Algorithm", 1994).
+"""
+
+import time
+from itertools import combinations, product
+
+from cross_checks import ACROSS, BOARD_SIZE, DOWN, NO_CROSS_WORD
+from move_ranking import top_moves
+from move_scorer import BLANK_FLAG, MoveScorer, value_by_label
+from position_cache import PositionCache, position_key
+from scrabble_dawg import ALPHABET, NO_STATE, index_by_letter
+from scrabble_gaddag import SEPARATOR_LABEL
+from search_stats import (CountingAccept, CountingGraph, count_calls,
+                          time_anchor)
+from tile import BLANK
+from word import Word
+
+#   Where a rack's blanks are counted, after its letters
+BLANK_LABEL = len(ALPHABET)
+
+#   The label of the tile stored as each letter code on the board, or -1 for
+#   an empty square. A blank is stored as its letter in uppercase.
+label_by_code = [-1] * 256
+for label, letter in enumerate(ALPHABET):
+    label_by_code[ord(letter)] = label_by_code[ord(letter.upper())] = label
+
+#   The letter played for each placed label, in uppercase for a blank
+letter_by_placed = (list(ALPHABET) + [''] * (BLANK_FLAG - len(ALPHABET))
+                    + [letter.upper() for letter in ALPHABET])
+
+#   Line states whose moves a MoveGenerator remembers, least recently used
+#   forgotten first
+LINE_MEMO_ENTRIES = 1024
+#   Racks whose moves are remembered for each line state
+LINE_MEMO_RACKS = 4
+
+
+def all_lines():
+    """Get the (direction, line) pair of every row and column."""
+
+    return [(direction, line)
+            for direction in (ACROSS, DOWN)
+            for line in range(BOARD_SIZE)]
+
+
+def tile_needs(word):
+    """Get the rack tiles a move places, as (label, count) pairs.
+
+    Blanks are counted at BLANK_LABEL.
+    """
+
+    counts = {}
+    for letter in word.get_letters_by_coord().values():
+        label = BLANK_LABEL if letter.isupper() else index_by_letter[letter]
+        counts[label] = counts.get(label, 0) + 1
+    return tuple(counts.items())
+
+
+def blank_choices(letters_by_coord, blanks):
+    """Get every way of playing `letters_by_coord` with blanks as `blanks`.
+
+    `blanks` holds the letter each blank is played as, and each must be
+    among the letters of `letters_by_coord`. Yields a copy of
+    `letters_by_coord` with the letters of the blanks in uppercase for every
+    choice of squares for them.
+    """
+
+    if not blanks:
+        yield letters_by_coord
+        return
+    coords_by_letter = {}
+    for coord, letter in sorted(letters_by_coord.items()):
+        coords_by_letter.setdefault(letter, []).append(coord)
+    options = [combinations(coords_by_letter[letter], blanks.count(letter))
+               for letter in sorted(set(blanks))]
+    for choice in product(*options):
+        played = dict(letters_by_coord)
+        for coords in choice:
+            for coord in coords:
+                played[coord] = played[coord].upper()
+        yield played
+
+
+class MoveGenerator(object):
+    """Enumerates every legal move on a ScrabbleBoard in one pass
+
+    Every row and column is treated as a line of 15 squares. Within a line,
+    each anchor (an empty square in the board's `anchor_coords`) starts the
+    moves whose leftmost newly placed tile is on that anchor:
+
+        1.  If the square before the anchor holds a tile, the existing
+            letters before the anchor are the fixed left part of the word.
+        2.  Otherwise a left part is built from the rack on the empty,
+            non-anchor squares before the anchor, up to the left-part limit.
+
+    Each left part is then extended rightwards through the lexicon graph,
+    placing only letters that are in the rack and in the square's
+    cross-check mask, and stepping over tiles already on the board. Since
+    letters are only ever tried along existing edges of the graph, dead ends
+    are never explored.
+
+    Moves are scored as they are built, using the running sums described in
+    MoveScorer, so no move is re-validated once found.
+
+    A blank on the rack is not tried as each of the 26 letters in turn.
+    Where one can be placed, it is played along every edge of the graph
+    state whose letter the square's cross-check allows, so a blank only
+    opens up words that actually continue from the letters before it.
+    Blanks are placed as their letter in uppercase, and score nothing.
+
+    Between turns only the lines the last move touched change, so generate()
+    remembers the moves it found on each line in `line_memo`, under the
+    line's state: its tiles, cross-checks, cross scores and anchors. A line
+    whose state comes up again is searched again only if the rack holds a
+    tile that the remembered racks for it do not. Otherwise its moves are
+    those remembered for a rack holding every tile of this one, less the
+    moves needing tiles this rack lacks. Filtering loses nothing: every move
+    this rack can make on the line, a larger rack can make too.
+    """
+
+    def __init__(self, board, dfa=None, memo_lines=True):
+        """
+        Keyword Arguments:
+        dfa -- The lexicon to search. Defaults to the board's.
+        memo_lines -- Remember the moves found on each line between calls
+            to generate()
+        """
+
+        self.board = board
+        self.dfa = dfa if dfa is not None else board.dfa
+        self.dawg = self.dfa.dawg
+        self.scorer = MoveScorer(board)
+        self.line_memo = (PositionCache(LINE_MEMO_ENTRIES) if memo_lines
+                          else None)
+        #   Lines generate() searched, and lines it took from the memo
+        self.lines_searched = 0
+        self.lines_reused = 0
+
+    def rack_counts(self, letters):
+        """Count the letters of a rack, indexed by label, and its blanks at
+        BLANK_LABEL."""
+
+        rack = [0] * (len(ALPHABET) + 1)
+        for letter in letters:
+            if letter == BLANK:
+                rack[BLANK_LABEL] += 1
+            else:
+                rack[index_by_letter[letter]] += 1
+        return rack
+
+    def generate(self, letters, lines=None, stats=None):
+        """Return a Word for every legal move playable with `letters`.
+
+        Keyword Arguments:
+        lines -- (direction, line) pairs to restrict generation to, for
+            searching parts of the board separately. Defaults to every row
+            (ACROSS) and every column (DOWN).
+        stats -- A SearchStats to count the search's work into
+        """
+
+        rack = self.rack_counts(letters)
+        if lines is None:
+            lines = all_lines()
+        cross_checks = self.board.cross_checks
+        moves = []
+        for direction, line in lines:
+            if self.line_memo is not None and stats is None:
+                #   Counting a search's work needs the search itself
+                moves += self.memo_line(direction, line, rack, len(letters),
+                                        cross_checks.masks[direction])
+            else:
+                self.generate_line(direction, line, rack, len(letters),
+                                   cross_checks.masks[direction], moves,
+                                   stats)
+        if stats is not None:
+            stats.moves += len(moves)
+        return moves
+
+    def line_state(self, direction, line):
+        """Get everything the moves along a line depend on, as a key."""
+
+        board = self.board
+        cross_checks = board.cross_checks
+        if direction == ACROSS:
+            start, stop, step = line * BOARD_SIZE, (line + 1) * BOARD_SIZE, 1
+            coords = [(line, pos) for pos in range(BOARD_SIZE)]
+        else:
+            start, stop, step = line, BOARD_SIZE * BOARD_SIZE, BOARD_SIZE
+            coords = [(pos, line) for pos in range(BOARD_SIZE)]
+        anchor_coords = board.anchor_coords
+        return (direction, line,
+                bytes(board.core.letters[start:stop:step]),
+                tuple(cross_checks.masks[direction][start:stop:step]),
+                tuple(cross_checks.scores[direction][start:stop:step]),
+                tuple(coord in anchor_coords for coord in coords))
+
+    def memo_line(self, direction, line, rack, num_tiles, masks):
+        """Get the moves along one line, from `line_memo` if it can."""
+
+        key = self.line_state(direction, line)
+        #   Each entry is [rack counts, moves, tile_needs() of each move],
+        #   the needs only worked out once the moves are first filtered
+        racks = self.line_memo.get(key)
+        if racks is not None:
+            for entry in racks:
+                held, moves = entry[0], entry[1]
+                if all(have >= count for have, count in zip(held, rack)):
+                    self.lines_reused += 1
+                    if tuple(rack) == held:
+                        return list(moves)
+                    if entry[2] is None:
+                        entry[2] = [tile_needs(word) for word in moves]
+                    return [word for needs, word in zip(entry[2], moves)
+                            if all(rack[label] >= count
+                                   for label, count in needs)]
+        self.lines_searched += 1
+        found = []
+        self.generate_line(direction, line, rack, num_tiles, masks, found)
+        entry = [tuple(rack), found, None]
+        if racks is None:
+            self.line_memo.put(key, [entry])
+        else:
+            racks.insert(0, entry)
+            del racks[LINE_MEMO_RACKS:]
+        return found
+
+    def cached_moves(self, letters, k=None):
+        """Return the moves playable with `letters`, through the board's
+        position cache.
+
+        With `k`, only the top `k` moves by score are returned, as by
+        move_ranking.top_moves(). Asking again on the same position with a
+        rack holding the same tiles returns the stored result instead of
+        searching. The list returned is the caller's own, but the Words in
+        it are shared with the cache, which is bounded by the moves it holds.
+        Entries are kept apart by generator class and by lexicon, so
+        generators searching other word lists on the same board never see
+        each other's moves.
+        """
+
+        cache = self.board.position_cache
+        key = position_key(self.board, letters, type(self).__name__,
+                           self.dfa.words_file, k)
+        moves = cache.get(key)
+        if moves is None:
+            moves = self.generate(letters)
+            if k is not None:
+                moves = top_moves(moves, k)
+            cache.put(key, moves, len(moves))
+        return list(moves)
+
+    def generate_by_anchor(self, letters, stats=None):
+        """Generate moves one anchor at a time, most promising anchors first.
+
+        Yields a list of the moves found from each anchor in turn, so the
+        caller can stop the search whenever it has seen enough. Anchors are
+        ordered by MoveScorer.anchor_payoff(). The board must not change
+        until the search is finished or abandoned.
+        """
+
+        rack = self.rack_counts(letters)
+        cross_checks = self.board.cross_checks
+        moves = []
+        searches = []
+        for direction, line in all_lines():
+            anchors, search_anchor = self.line_search(
+                direction, line, rack, len(letters),
+                cross_checks.masks[direction], moves, stats)
+            for anchor in anchors:
+                row, col = ((line, anchor) if direction == ACROSS
+                            else (anchor, line))
+                payoff = self.scorer.anchor_payoff(row, col, direction,
+                                                   len(letters))
+                searches.append((payoff, anchor, search_anchor))
+        #   The sort is stable, so anchors of equal payoff stay in board order
+        searches.sort(key=lambda search: search[0], reverse=True)
+        for _, anchor, search_anchor in searches:
+            del moves[:]
+            search_anchor(anchor)
+            if stats is not None:
+                stats.moves += len(moves)
+            yield list(moves)
+
+    def find_bingos(self, letters, deadline=None):
+        """Return a Word for every legal move that plays all of `letters`.
+
+        With a full rack these are the bingos. Rather than searching the
+        lexicon graph, each lane of the board that could hold such a move is
+        looked up in the anagram index. A lane is a stretch of a line with
+        exactly len(letters) empty squares, not touching a tile at either
+        end, that holds a tile or an anchor. The words spelled by the rack
+        plus the lane's tiles are then only checked against those tiles and
+        the lane's cross-checks. Lanes holding the same tiles share one
+        lookup.
+
+        The letters blanks may be are found with AnagramIndex.blank_words(),
+        and a word is played once for every choice of squares for its blanks.
+
+        Given a deadline (a time.time() value), the lines of the board are
+        looked at until it passes, and only the moves found by then are
+        returned.
+        """
+
+        num_tiles = len(letters)
+        if num_tiles < 2:
+            return []
+        anagrams = self.dfa.get_anagrams()
+        rack_letters = [letter for letter in letters if letter != BLANK]
+        blanks = num_tiles - len(rack_letters)
+        #   The words spelled by each set of lane tiles with the rack
+        spellings_by_key = {}
+        moves = []
+        for direction, line in all_lines():
+            if deadline is not None and time.time() >= deadline:
+                break
+            masks = self.board.cross_checks.masks[direction]
+            coords, tiles, is_anchor = self.line_squares(direction, line)
+            for start in range(BOARD_SIZE - num_tiles + 1):
+                if start > 0 and tiles[start - 1] != -1:
+                    continue
+                fixed = []
+                empty = 0
+                connected = False
+                pos = start
+                while pos < BOARD_SIZE and empty < num_tiles:
+                    if tiles[pos] == -1:
+                        empty += 1
+                        connected = connected or is_anchor[pos]
+                    else:
+                        fixed.append(pos)
+                    pos += 1
+                if empty < num_tiles:
+                    #   Lanes starting further along are even shorter
+                    break
+                while pos < BOARD_SIZE and tiles[pos] != -1:
+                    fixed.append(pos)
+                    pos += 1
+                if not (connected or fixed):
+                    continue
+
+                fixed_letters = [ALPHABET[tiles[p]] for p in fixed]
+                empties = [p for p in range(start, pos) if tiles[p] == -1]
+                key = ''.join(sorted(fixed_letters))
+                if key not in spellings_by_key:
+                    spellings_by_key[key] = anagrams.blank_words(
+                        rack_letters + fixed_letters, blanks)
+                for fill, words in spellings_by_key[key]:
+                    for word in words:
+                        if any(word[p - start] != ALPHABET[tiles[p]]
+                               for p in fixed):
+                            continue
+                        letters_by_coord = {}
+                        for p in empties:
+                            label = index_by_letter[word[p - start]]
+                            row, col = coords[p]
+                            if not (masks[row * BOARD_SIZE + col]
+                                    & (1 << label)):
+                                break
+                            letters_by_coord[row, col] = word[p - start]
+                        else:
+                            for played in blank_choices(letters_by_coord,
+                                                        fill):
+                                moves.append(Word(
+                                    word, played,
+                                    self.scorer.score(played, direction)))
+        return moves
+
+    def line_squares(self, direction, line):
+        """Get the coordinates, tiles and anchors along a line.
+
+        Returns (coords, tiles, is_anchor), each indexed by position along the
+        line. `tiles` holds the label of the tile on each square, or -1; a
+        blank has the label of the letter it was played as.
+        """
+
+        board = self.board
+        letters = board.core.letters
+        if direction == ACROSS:
+            coords = [(line, pos) for pos in range(BOARD_SIZE)]
+            squares = range(line * BOARD_SIZE, (line + 1) * BOARD_SIZE)
+        else:
+            coords = [(pos, line) for pos in range(BOARD_SIZE)]
+            squares = range(line, BOARD_SIZE * BOARD_SIZE, BOARD_SIZE)
+        tiles = [label_by_code[letters[square]] for square in squares]
+        is_anchor = [tiles[pos] == -1 and coords[pos] in board.anchor_coords
+                     for pos in range(BOARD_SIZE)]
+        return coords, tiles, is_anchor
+
+    def recorder(self, direction, coords, tiles, moves):
+        """Get a function that appends the move on a line to `moves`.
+
+        The function takes the first position of the word, the position after
+        its last letter, a list of (position, label) for the placed tiles, and
+        the move's score. Blanks are placed with BLANK_FLAG set on their
+        label.
+        """
+
+        row_masks = self.board.core.row_masks
+
+        def record(start, end, placed, score):
+            if direction == DOWN and len(placed) == 1:
+                #   A single tile forming words both ways is the same move
+                #   in both directions; the ACROSS pass already found it
+                #   if it has horizontal neighbours.
+                row, col = coords[placed[0][0]]
+                mask = row_masks[row]
+                if ((mask << 1) | (mask >> 1)) >> col & 1:
+                    return
+            letters_by_coord = {}
+            word = [tiles[pos] for pos in range(start, end)]
+            for pos, label in placed:
+                letters_by_coord[coords[pos]] = letter_by_placed[label]
+                word[pos - start] = label % BLANK_FLAG
+            moves.append(Word(''.join(ALPHABET[label] for label in word),
+                              letters_by_coord, score))
+        return record
+
+    def instrument(self, search, stats, graph, rack, masks, squares, tiles):
+        """Wrap a search step to count its work into `stats`.
+
+        `search` is called with a graph state and a position along the line,
+        followed by any other arguments. Each call is counted as a node, and
+        when the position is empty, as one edge list read, and each rack
+        letter on the state's edges (every letter, with a blank on the rack)
+        as a cross-check hit or miss at the position.
+        """
+
+        edge_offsets = graph.edge_offsets
+        edge_labels = graph.edge_labels
+        num_letters = len(ALPHABET)
+
+        def counted(state, pos, *args):
+            stats.nodes += 1
+            if pos < BOARD_SIZE and tiles[pos] == -1:
+                stats.lookups += 1
+                allowed = masks[squares[pos]]
+                for edge in range(edge_offsets[state],
+                                  edge_offsets[state + 1]):
+                    label = edge_labels[edge]
+                    if label < num_letters and (rack[label]
+                                                or rack[BLANK_LABEL]):
+                        if allowed & (1 << label):
+                            stats.cross_check_hits += 1
+                        else:
+                            stats.cross_check_misses += 1
+            return search(state, pos, *args)
+        return counted
+
+    def generate_line(self, direction, line, rack, num_tiles, masks, moves,
+                      stats=None):
+        """Append the moves along one row (ACROSS) or column (DOWN)."""
+
+        anchors, search_anchor = self.line_search(direction, line, rack,
+                                                  num_tiles, masks, moves,
+                                                  stats)
+        for anchor in anchors:
+            search_anchor(anchor)
+
+    def line_search(self, direction, line, rack, num_tiles, masks, moves,
+                    stats=None):
+        """Set up the search of one row (ACROSS) or column (DOWN).
+
+        Returns (anchors, search_anchor): the positions of the line's anchors,
+        and a function that appends the moves from one of them to `moves`.
+        `rack` is shared with the search and must hold the rack's letters
+        whenever search_anchor() is called.
+        """
+
+        dawg = self.dawg
+        edge_offsets = dawg.edge_offsets
+        edge_labels = dawg.edge_labels
+        edge_targets = dawg.edge_targets
+        edge_masks = dawg.edge_masks
+        accept = dawg.accept
+
+        coords, tiles, is_anchor = self.line_squares(direction, line)
+        squares = [row * BOARD_SIZE + col for row, col in coords]
+        record = self.recorder(direction, coords, tiles, moves)
+        letter_multipliers, word_multipliers, cross_scores, tile_values = (
+            self.scorer.line_tables(direction, squares))
+
+        def extend_right(state, pos, start, anchor, placed,
+                         main_sum, word_multiplier, cross_sum):
+            if pos == BOARD_SIZE or tiles[pos] == -1:
+                if pos > anchor and accept[state] and pos - start > 1:
+                    record(start, pos, placed,
+                           main_sum * word_multiplier + cross_sum)
+                if pos == BOARD_SIZE:
+                    return
+                allowed = masks[squares[pos]]
+                square_multiplier = word_multipliers[pos]
+                cross_score = cross_scores[pos]
+                for edge in range(edge_offsets[state],
+                                  edge_offsets[state + 1]):
+                    label = edge_labels[edge]
+                    if rack[label] and allowed & (1 << label):
+                        value = value_by_label[label] * letter_multipliers[pos]
+                        rack[label] -= 1
+                        placed.append((pos, label))
+                        extend_right(edge_targets[edge], pos + 1,
+                                     start, anchor, placed,
+                                     main_sum + value,
+                                     word_multiplier * square_multiplier,
+                                     cross_sum if cross_score == NO_CROSS_WORD
+                                     else cross_sum + (cross_score + value)
+                                     * square_multiplier)
+                        placed.pop()
+                        rack[label] += 1
+                if rack[BLANK_LABEL] and edge_masks[state] & allowed:
+                    #   A blank scores nothing, so only the word multiplier
+                    #   of its square counts
+                    rack[BLANK_LABEL] -= 1
+                    for edge in range(edge_offsets[state],
+                                      edge_offsets[state + 1]):
+                        label = edge_labels[edge]
+                        if allowed & (1 << label):
+                            placed.append((pos, label | BLANK_FLAG))
+                            extend_right(edge_targets[edge], pos + 1,
+                                         start, anchor, placed, main_sum,
+                                         word_multiplier * square_multiplier,
+                                         cross_sum
+                                         if cross_score == NO_CROSS_WORD
+                                         else cross_sum + cross_score
+                                         * square_multiplier)
+                            placed.pop()
+                    rack[BLANK_LABEL] += 1
+            else:
+                state = dawg.next_state(state, tiles[pos])
+                if state != NO_STATE:
+                    extend_right(state, pos + 1, start, anchor, placed,
+                                 main_sum + tile_values[pos],
+                                 word_multiplier, cross_sum)
+
+        def left_part(state, anchor, limit, prefix):
+            #   `prefix` holds the labels placed on the squares just before
+            #   `anchor`, in order. Its squares depend on its final length,
+            #   so it is scored here rather than while it is built.
+            if edge_masks[state] & masks[squares[anchor]]:
+                #   Only extend left parts that can continue on the anchor
+                start = anchor - len(prefix)
+                placed = []
+                main_sum = 0
+                word_multiplier = 1
+                for pos, label in enumerate(prefix, start):
+                    #   Left-part squares are never anchors, so they form no
+                    #   perpendicular words
+                    placed.append((pos, label))
+                    main_sum += value_by_label[label] * letter_multipliers[pos]
+                    word_multiplier *= word_multipliers[pos]
+                extend_right(state, anchor, start, anchor, placed,
+                             main_sum, word_multiplier, 0)
+            if limit == 0:
+                return
+            blanks = rack[BLANK_LABEL]
+            for edge in range(edge_offsets[state], edge_offsets[state + 1]):
+                label = edge_labels[edge]
+                if rack[label]:
+                    rack[label] -= 1
+                    prefix.append(label)
+                    left_part(edge_targets[edge], anchor, limit - 1, prefix)
+                    prefix.pop()
+                    rack[label] += 1
+                if blanks:
+                    rack[BLANK_LABEL] -= 1
+                    prefix.append(label | BLANK_FLAG)
+                    left_part(edge_targets[edge], anchor, limit - 1, prefix)
+                    prefix.pop()
+                    rack[BLANK_LABEL] += 1
+
+        def search_anchor(anchor):
+            if anchor > 0 and tiles[anchor - 1] != -1:
+                #   The left part is the tiles already on the board
+                start = anchor - 1
+                while start > 0 and tiles[start - 1] != -1:
+                    start -= 1
+                state = dawg.root
+                main_sum = 0
+                for pos in range(start, anchor):
+                    state = dawg.next_state(state, tiles[pos])
+                    if state == NO_STATE:
+                        break
+                    main_sum += tile_values[pos]
+                if state != NO_STATE:
+                    extend_right(state, anchor, start, anchor, [],
+                                 main_sum, 1, 0)
+            else:
+                #   The left part may use the empty non-anchor squares
+                #   before the anchor, keeping one tile for the anchor
+                limit = 0
+                pos = anchor - 1
+                while (pos >= 0 and tiles[pos] == -1 and not is_anchor[pos]
+                       and limit < num_tiles - 1):
+                    limit += 1
+                    pos -= 1
+                left_part(dawg.root, anchor, limit, [])
+
+        if stats is not None:
+            #   The closures look these names up when they run, so
+            #   rebinding them instruments every step of the search
+            extend_right = self.instrument(extend_right, stats, dawg, rack,
+                                           masks, squares, tiles)
+            left_part = count_calls(left_part, stats, 'nodes')
+            dawg = CountingGraph(dawg, stats)
+            accept = CountingAccept(accept, stats)
+            search_anchor = time_anchor(
+                search_anchor, stats,
+                lambda anchor: coords[anchor] + (direction,))
+
+        return ([anchor for anchor in range(BOARD_SIZE) if is_anchor[anchor]],
+                search_anchor)
+
+
+class GaddagMoveGenerator(MoveGenerator):
+    """Enumerates every legal move by growing words outwards from anchors
+
+    Each move is read from the GADDAG starting with the tile on its leftmost
+    anchor: leftwards through tiles and empty non-anchor squares, then across
+    the separator and rightwards from the anchor. There is no left-part
+    enumeration to restart, and no prefix is ever extended unless some word
+    contains it around the anchor.
+    """
+
+    def __init__(self, board, dfa=None, memo_lines=True):
+        super(GaddagMoveGenerator, self).__init__(board, dfa, memo_lines)
+        self.gaddag = self.dfa.get_gaddag()
+
+    def line_search(self, direction, line, rack, num_tiles, masks, moves,
+                    stats=None):
+        """Set up the search of one row (ACROSS) or column (DOWN).
+
+        See MoveGenerator.line_search().
+        """
+
+        gaddag = self.gaddag
+        edge_offsets = gaddag.edge_offsets
+        edge_labels = gaddag.edge_labels
+        edge_targets = gaddag.edge_targets
+        accept = gaddag.accept
+
+        coords, tiles, is_anchor = self.line_squares(direction, line)
+        squares = [row * BOARD_SIZE + col for row, col in coords]
+        record = self.recorder(direction, coords, tiles, moves)
+        letter_multipliers, word_multipliers, cross_scores, tile_values = (
+            self.scorer.line_tables(direction, squares))
+
+        def place(state, pos, placed, score, then, *args):
+            """Cover `pos` with its tile, or with each playable rack tile.
+
+            `score` is the (main_sum, word_multiplier, cross_sum) of the
+            letters read so far. `then` is called with the state and score
+            after each letter, followed by `args`.
+            """
+
+            main_sum, word_multiplier, cross_sum = score
+            if tiles[pos] != -1:
+                state = gaddag.next_state(state, tiles[pos])
+                if state != NO_STATE:
+                    then(state, (main_sum + tile_values[pos],
+                                 word_multiplier, cross_sum), *args)
+                return
+            allowed = masks[squares[pos]]
+            square_multiplier = word_multipliers[pos]
+            cross_score = cross_scores[pos]
+            for edge in range(edge_offsets[state], edge_offsets[state + 1]):
+                label = edge_labels[edge]
+                if (label != SEPARATOR_LABEL and rack[label]
+                        and allowed & (1 << label)):
+                    value = value_by_label[label] * letter_multipliers[pos]
+                    rack[label] -= 1
+                    placed.append((pos, label))
+                    then(edge_targets[edge],
+                         (main_sum + value,
+                          word_multiplier * square_multiplier,
+                          cross_sum if cross_score == NO_CROSS_WORD
+                          else cross_sum + (cross_score + value)
+                          * square_multiplier),
+                         *args)
+                    placed.pop()
+                    rack[label] += 1
+            if rack[BLANK_LABEL]:
+                #   As in MoveGenerator.line_search()
+                rack[BLANK_LABEL] -= 1
+                for edge in range(edge_offsets[state],
+                                  edge_offsets[state + 1]):
+                    label = edge_labels[edge]
+                    if label != SEPARATOR_LABEL and allowed & (1 << label):
+                        placed.append((pos, label | BLANK_FLAG))
+                        then(edge_targets[edge],
+                             (main_sum,
+                              word_multiplier * square_multiplier,
+                              cross_sum if cross_score == NO_CROSS_WORD
+                              else cross_sum + cross_score
+                              * square_multiplier),
+                             *args)
+                        placed.pop()
+                rack[BLANK_LABEL] += 1
+
+        def after_left(state, score, start, anchor, placed):
+            #   The word read so far covers start..anchor
+            left_free = start == 0 or tiles[start - 1] == -1
+            if (accept[state] and left_free and anchor > start
+                    and (anchor == BOARD_SIZE - 1
+                         or tiles[anchor + 1] == -1)):
+                record(start, anchor + 1, placed,
+                       score[0] * score[1] + score[2])
+            if start > 0 and (tiles[start - 1] != -1
+                              or not is_anchor[start - 1]):
+                place(state, start - 1, placed, score,
+                      after_left, start - 1, anchor, placed)
+            if left_free and anchor < BOARD_SIZE - 1:
+                state = gaddag.next_state(state, SEPARATOR_LABEL)
+                if state != NO_STATE:
+                    place(state, anchor + 1, placed, score,
+                          after_right, start, anchor + 1, placed)
+
+        def after_right(state, score, start, end, placed):
+            #   The word read so far covers start..end
+            if end == BOARD_SIZE - 1 or tiles[end + 1] == -1:
+                if accept[state]:
+                    record(start, end + 1, placed,
+                           score[0] * score[1] + score[2])
+                if end == BOARD_SIZE - 1:
+                    return
+            place(state, end + 1, placed, score,
+                  after_right, start, end + 1, placed)
+
+        def search_anchor(anchor):
+            placed = []
+            place(gaddag.root, anchor, placed, (0, 1, 0),
+                  after_left, anchor, anchor, placed)
+
+        if stats is not None:
+            #   As in MoveGenerator.line_search()
+            place = self.instrument(place, stats, gaddag, rack, masks,
+                                    squares, tiles)
+            gaddag = CountingGraph(gaddag, stats)
+            accept = CountingAccept(accept, stats)
+            search_anchor = time_anchor(
+                search_anchor, stats,
+                lambda anchor: coords[anchor] + (direction,))
+
+        return ([anchor for anchor in range(BOARD_SIZE) if is_anchor[anchor]],
+                search_anchor)
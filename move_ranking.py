@@ -0,0 +1,46 @@
+"""
+File:   move_ranking.py
+
+Ranking generated moves by score or by any other evaluation.
+"""
+
+import heapq
+
+
+def score_of(word):
+    """The default evaluation: a move's immediate score."""
+
+    return word.get_score()
+
+
+def placement_key(word):
+    """A key identifying a move by where its tiles go."""
+
+    return tuple(sorted(word.get_letters_by_coord().items()))
+
+
+def top_moves(moves, k, evaluate=None):
+    """Return the `k` highest-valued moves in `moves`, best first.
+
+    Moves are valued with `evaluate(word)`, which defaults to the move's
+    score. Only a heap of `k` moves is kept while `moves` is consumed, so it
+    may be any iterable, however long. Moves of equal value are ordered by
+    placement_key(), which makes the result independent of the order moves
+    were generated in.
+    """
+
+    if k <= 0:
+        return []
+    if evaluate is None:
+        evaluate = score_of
+    heap = []
+    for word in moves:
+        value = evaluate(word)
+        if len(heap) < k:
+            heapq.heappush(heap, (value, placement_key(word), word))
+        elif value >= heap[0][0]:
+            #   Only build the tie-break key for moves that may get in
+            heapq.heappushpop(heap, (value, placement_key(word), word))
+    heap.sort(reverse=True)
+    return [word for _, _, word in heap]
+
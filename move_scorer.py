@@ -0,0 +1,131 @@
+"""
+File:   move_scorer.py
+
+Incremental move scoring for the move generators.
+"""
+
+from cross_checks import ACROSS, BOARD_SIZE, NO_CROSS_WORD
+from scrabble_dawg import ALPHABET
+from tile import value_by_code, value_by_letter
+
+#   Set on the label of a tile placed as a blank
+BLANK_FLAG = 32
+#   Face value of each letter, indexed by label. Labels with BLANK_FLAG set,
+#   and the rack's blank label len(ALPHABET), are blanks and score nothing.
+value_by_label = ([value_by_letter[letter] for letter in ALPHABET]
+                  + [0] * (2 * BLANK_FLAG - len(ALPHABET)))
+
+
+class MoveScorer(object):
+    """Tables for scoring a move while it is being generated
+
+    A move played in one direction scores
+
+        main_sum * word_multiplier + cross_sum
+
+    where `main_sum` adds up the main word's letters (newly placed tiles
+    times their letter multiplier, tiles already on the board at face value),
+    `word_multiplier` is the product of the word multipliers under the newly
+    placed tiles, and `cross_sum` adds, for every placed tile that forms a
+    perpendicular word, that word's score:
+
+        (cross score of the square + placed letter value) * square's word
+        multiplier
+
+    with the cross score taken from the board's CrossCheckTable. A blank
+    adds nothing to `main_sum` and only its square's word multiplier to its
+    perpendicular word. Each term
+    only depends on the square and the letter placed on it, so a generator
+    can carry the three running values down its search and score every move
+    it reaches in O(1), matching ScrabbleBoard.get_hand_legality_by_score()
+    without re-walking any word.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.letter_multipliers = board.letter_multipliers
+        self.word_multipliers = board.word_multipliers
+
+    def line_tables(self, direction, squares):
+        """Get per-position scoring tables for a line of squares.
+
+        Returns (letter_multipliers, word_multipliers, cross_scores,
+        tile_values), each a list parallel to `squares` (square indexes
+        row * BOARD_SIZE + col). `tile_values` holds the face value of the
+        tile already on each square, 0 for empty squares and blanks.
+        """
+
+        cross_scores = self.board.cross_checks.scores[direction]
+        letters = self.board.core.letters
+        return ([self.letter_multipliers[square] for square in squares],
+                [self.word_multipliers[square] for square in squares],
+                [cross_scores[square] for square in squares],
+                [value_by_code[letters[square]] for square in squares])
+
+    def anchor_payoff(self, row, col, direction, reach):
+        """Estimate how much a move through an anchor might score.
+
+        Adds up, over the squares within `reach` of the anchor along
+        `direction`, the face value of tiles already there, and for empty
+        squares a weight for their premium (1 for a double letter up to 6
+        for a triple word) plus the cross score of any perpendicular word
+        they would form. This only orders anchors for searches that may stop
+        early; it plays no part in scoring.
+        """
+
+        letters = self.board.core.letters
+        cross_scores = self.board.cross_checks.scores[direction]
+        d_row, d_col = (0, 1) if direction == ACROSS else (1, 0)
+        payoff = 0
+        for step in range(-reach, reach + 1):
+            r, c = row + step * d_row, col + step * d_col
+            if not (0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE):
+                continue
+            square = r * BOARD_SIZE + c
+            if letters[square]:
+                payoff += value_by_code[letters[square]]
+                continue
+            payoff += (self.letter_multipliers[square] - 1
+                       + 3 * (self.word_multipliers[square] - 1))
+            if cross_scores[square] != NO_CROSS_WORD:
+                payoff += cross_scores[square]
+        return payoff
+
+    def score(self, letters_by_coord, direction):
+        """Score a move along `direction` without validating it.
+
+        This is the incremental formula applied in one go, for moves that are
+        already known to be legal.
+        """
+
+        core = self.board.core
+        letters = core.letters
+        cross_scores = self.board.cross_checks.scores[direction]
+        row, col = min(letters_by_coord)
+        if direction == ACROSS:
+            d_row, d_col = 0, 1
+            col -= core.run_left(row, col)
+        else:
+            d_row, d_col = 1, 0
+            row -= core.run_up(row, col)
+
+        main_sum = 0
+        word_multiplier = 1
+        cross_sum = 0
+        while row < BOARD_SIZE and col < BOARD_SIZE:
+            square = row * BOARD_SIZE + col
+            if letters[square]:
+                main_sum += value_by_code[letters[square]]
+            elif (row, col) in letters_by_coord:
+                value = (value_by_letter[letters_by_coord[row, col]]
+                         * self.letter_multipliers[square])
+                main_sum += value
+                word_multiplier *= self.word_multipliers[square]
+                if cross_scores[square] != NO_CROSS_WORD:
+                    cross_sum += ((cross_scores[square] + value)
+                                  * self.word_multipliers[square])
+            else:
+                break
+            row, col = row + d_row, col + d_col
+        return main_sum * word_multiplier + cross_sum
+
@@ -0,0 +1,109 @@
+"""
+File:   parallel_search.py
+
+Move generation spread across a pool of worker processes.
+"""
+
+import multiprocessing
+
+import lexicon
+from move_generator import MoveGenerator, all_lines
+from move_ranking import top_moves
+from scrabble import ScrabbleBoard
+from scrabble_dfa import WORDS_FILE
+
+#   Each worker gets this many shards of the board per search, so a worker
+#   that finishes early can pick up another shard
+SHARDS_PER_WORKER = 2
+
+#   The board and generator of a worker process, set up by init_worker()
+worker_state = {}
+
+
+def init_worker(words_file, generator_class):
+    """Set up a worker process's board and move generator.
+
+    The lexicon comes from the registry, so a worker forked from a process
+    that already loaded it shares the parent's copy, and one that has to
+    load it maps the same image pages as every other process.
+    """
+
+    dfa = lexicon.get_lexicon(words_file)
+    board = ScrabbleBoard(dfa)
+    worker_state['board'] = board
+    worker_state['position'] = board.get_position()
+    worker_state['generator'] = generator_class(board, dfa)
+
+
+def search_shard(task):
+    """Return the top moves within one shard of the board's lines.
+
+    `task` is (position, letters, lines, k, evaluate). The worker's board is
+    only rebuilt when the position differs from the one it last searched.
+    """
+
+    position, letters, lines, k, evaluate = task
+    if position != worker_state['position']:
+        worker_state['board'].set_position(position)
+        worker_state['position'] = position
+    moves = worker_state['generator'].generate(letters, lines)
+    return top_moves(moves, k, evaluate)
+
+
+class ParallelSearch(object):
+    """Finds the best moves on a board with a pool of worker processes
+
+    Given a fixed board, the moves along each row and column can be
+    generated independently, so the 30 lines of the board are dealt out
+    round-robin into shards, every shard is searched for its own top K in a
+    worker process, and the shards' results are merged into the overall
+    top K.
+
+    Evaluation functions passed to find_best_words() are sent to the workers,
+    so they must be picklable (defined at module level).
+    """
+
+    def __init__(self, workers=None, generator_class=MoveGenerator,
+                 words_file=WORDS_FILE):
+        """
+        Keyword Arguments:
+        workers -- Number of worker processes. Defaults to one per CPU.
+        generator_class -- MoveGenerator or a subclass of it
+        words_file -- The word list of the lexicon, as in get_lexicon()
+        """
+
+        self.workers = workers or multiprocessing.cpu_count()
+        #   Load the lexicon before the pool forks, so that the workers
+        #   inherit it instead of loading it themselves
+        lexicon.get_lexicon(words_file)
+        self.pool = multiprocessing.Pool(self.workers, init_worker,
+                                         (words_file, generator_class))
+        lines = all_lines()
+        num_shards = min(len(lines), self.workers * SHARDS_PER_WORKER)
+        self.shards = [lines[i::num_shards] for i in range(num_shards)]
+
+    def find_best_words(self, board, letters, k, evaluate=None):
+        """Return the `k` best moves on `board` for `letters`, best first.
+
+        See move_ranking.top_moves() for how moves are valued and ordered.
+        """
+
+        position = board.get_position()
+        letters = list(letters)
+        rankings = self.pool.map(search_shard,
+                                 [(position, letters, shard, k, evaluate)
+                                  for shard in self.shards])
+        return top_moves((word for ranking in rankings for word in ranking),
+                         k, evaluate)
+
+    def close(self):
+        """Shut the worker processes down."""
+
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,3 +1,5 @@
+from tile import OutOfTilesError, tile_letter
+
 class Player(object):
     """The base class of a Scrabble player.
 
@@ -36,9 +38,13 @@ class Player(object):
         return self.score
 
     def draw_tiles(self, amount):
-        """Draw `amount` tiles from the tile bag."""
+        """Draw `amount` tiles from the tile bag, or as many as are left."""
 
-        self.tiles += self.tile_bag.draw_tiles(amount)
+        try:
+            self.tiles += self.tile_bag.draw_tiles(amount)
+        except OutOfTilesError:
+            #   Once the bag is empty, players keep playing from their racks
+            pass
 
     def increment_score(self, score):
         """Increase the score."""
@@ -48,8 +54,10 @@ class Player(object):
     def release_and_draw_tiles(self, letters):
         """Remove used tiles and draw from the tile bag."""
 
-        #   Remove the tiles corresponding to the letters used in a hand
+        #   Remove the tiles corresponding to the letters used in a hand; a
+        #   blank is played as an uppercase letter
         for letter in letters:
+            letter = tile_letter(letter)
             for tile in self.tiles:
                 if letter == tile.get_letter():
                     self.tiles.remove(tile)
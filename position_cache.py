@@ -0,0 +1,127 @@
+"""
+File:   position_cache.py
+
+A transposition cache for move queries: results are stored under the board's
+Zobrist hash and the rack, so asking again about the same board and rack
+costs a dictionary lookup instead of a search.
+"""
+
+from collections import OrderedDict
+
+#   Positions kept by default before the least recently used is evicted
+DEFAULT_MAX_ENTRIES = 256
+#   Total size of the entries kept by default. A board's cache holds move
+#   lists sized by their moves, and a rack with blanks can have tens of
+#   thousands, so this bounds the cache's memory to some tens of MB.
+DEFAULT_MAX_SIZE = 50000
+
+
+def rack_key(letters):
+    """Get the canonical key of a rack: its letters in sorted order.
+
+    Racks holding the same tiles in any order get the same key.
+    """
+
+    return ''.join(sorted(letters))
+
+
+def position_key(board, letters, *extra):
+    """Get the cache key of `letters` on `board`.
+
+    The key is the board's Zobrist hash (see BoardCore), the rack's key and
+    `extra`, which tells apart different queries on the same position.
+    """
+
+    return (board.core.position_hash, rack_key(letters)) + extra
+
+
+class PositionCache(object):
+    """A size-bounded LRU cache of results by position
+
+    Entries are kept from least to most recently used, and once more than
+    `max_entries` are stored, or their sizes add up to more than
+    `max_size`, the least recently used are evicted. Each entry's size is
+    given when it is stored, such as the number of moves in a move list;
+    an entry larger than `max_size` on its own is not stored. `hits`,
+    `misses`, `evictions` and `invalidations` count what the cache has done
+    since it was made; stats() returns them along with the hit rate.
+
+    A ScrabbleBoard owns one of these and clears it whenever play_hand()
+    changes the board for good, so entries for positions that can no
+    longer come up do not linger. Moves made with make_move() change the
+    board's hash too, so they never see entries of another position, but
+    do not clear the cache: the position comes back with unmake_move().
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_size=DEFAULT_MAX_SIZE):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        #   (value, size) by key
+        self.entries = OrderedDict()
+        #   Total size of the entries
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """Get the entry stored under `key`, counting a hit or a miss."""
+
+        try:
+            entry = self.entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        #   Reinserting the entry makes it the most recently used
+        self.entries[key] = entry
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, size=1):
+        """Store `value`, of size `size`, under `key`, evicting the least
+        recently used entries beyond `max_entries` or `max_size`."""
+
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        if size > self.max_size:
+            return
+        self.entries[key] = (value, size)
+        self.size += size
+        while (len(self.entries) > self.max_entries
+               or self.size > self.max_size):
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry."""
+
+        if self.entries:
+            self.entries.clear()
+            self.size = 0
+            self.invalidations += 1
+
+    def stats(self):
+        """Get the cache's counters as a dict."""
+
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'size': self.size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0
+        }
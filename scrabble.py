@@ -3,16 +3,33 @@ Author: Chad Lewis
 File:   scrabble.py
 """
 
-from tile import ScrabbleTile
-from scrabble_dfa import DFA
+from collections import namedtuple
+from tile import value_by_letter
+from board_core import BOARD_SIZE, BoardCore, LetterRows
+from lexicon import get_lexicon
+from cross_checks import CrossCheckTable
+from hand_validator import HandValidator
+from position_cache import PositionCache
 import scrabble_ai
 #   Some useful 'constants'
 LITERAL_MAX_LENGTH = 15
 MAX_LENGTH = 14
 CENTER = (7,7)
+#   Stands for an empty square in a board position string
+EMPTY_SQUARE = '.'
+#   What ScrabbleBoard.unmake_move() needs to take a move back: the
+#   coordinates of its tiles, the anchor coordinates from before it, and
+#   the journal of the cross-check entries it changed
+MoveUndo = namedtuple('MoveUndo', ['coords', 'anchor_coords', 'cross_checks'])
 
 class ScrabbleSquare(object):
-    """This class represents one square on a Scrabble game board"""
+    """This class represents one square on a Scrabble game board
+
+    A square only describes its premium, so every board shares one square
+    per square type; which squares hold tiles is kept by the board.
+    """
+
+    __slots__ = ('square_type', '_is_premium_letter', '_is_premium_word')
 
     multiplier_by_square_type = {
         None: 1,
@@ -40,8 +57,6 @@ class ScrabbleSquare(object):
                                   or square_type == 'triple_letter')
         self._is_premium_word = (square_type == 'double_word'
                                 or square_type == 'triple_word')
-        self.available = True
-        self.played = False
 
     def is_premium_letter(self):
         return self._is_premium_letter
@@ -52,22 +67,6 @@ class ScrabbleSquare(object):
     def get_multiplier(self):
         return self.multiplier_by_square_type[self.square_type]
 
-    def is_available(self):
-        if not self.is_played():
-            return self.available
-        return False
-
-    def set_is_played(self):
-        """This renders the tile unusable for the rest of the game."""
-        self.played = True
-
-    def is_played(self):
-        return self.played
-
-    def set_availability(self, availability):
-        if not self.is_played():
-            self.available = availability
-
     def shorthand(self):
         if self.square_type is None:
             return '  '
@@ -112,56 +111,71 @@ class ScrabbleBoard(object):
         'tw': 'triple_word'
     }
 
-    def build_board(self):
+    @classmethod
+    def build_board(cls):
+        """Build the premium square layout, one shared square per type."""
+
+        squares = dict((stype, ScrabbleSquare(square_type=square_type))
+                       for stype, square_type in cls.square_type_hash.items())
         board = []
         #   This section builds the top half (excluding middle row)
-        for type_row in self.top_left_quadrant:
+        for type_row in cls.top_left_quadrant:
             row = []
             for stype in type_row:
-                row.append(ScrabbleSquare(
-                    square_type=self.square_type_hash[stype]))
+                row.append(squares[stype])
             for stype in type_row[-2::-1]:
-                row.append(ScrabbleSquare(
-                    square_type=self.square_type_hash[stype]))
+                row.append(squares[stype])
             board.append(row)
 
         #   This section builds the middle row
         mid_row = []
-        for stype in self.middle_row:
-            mid_row.append(ScrabbleSquare(
-                square_type=self.square_type_hash[stype]))
-        for stype in self.middle_row[-2::-1]:
-            mid_row.append(ScrabbleSquare(
-                square_type=self.square_type_hash[stype]))
+        for stype in cls.middle_row:
+            mid_row.append(squares[stype])
+        for stype in cls.middle_row[-2::-1]:
+            mid_row.append(squares[stype])
         board.append(mid_row)
 
         #   This section builds the bottom half (excluding mid. row)
-        for type_row in self.top_left_quadrant[::-1]:
+        for type_row in cls.top_left_quadrant[::-1]:
             row = []
             for stype in type_row:
-                row.append(ScrabbleSquare(
-                    square_type=self.square_type_hash[stype]))
+                row.append(squares[stype])
             for stype in type_row[-2::-1]:
-                row.append(ScrabbleSquare(
-                    square_type=self.square_type_hash[stype]))
+                row.append(squares[stype])
             board.append(row)
         return board
 
-    def __init__(self):
-        self.base_board = self.build_board()
-        self.player_board = [
-            [
-                '' for _ in range(LITERAL_MAX_LENGTH)
-            ] for _ in range(LITERAL_MAX_LENGTH)
-        ]
+    def __init__(self, dfa=None):
+        """
+        Keyword Arguments:
+        dfa -- The lexicon used to validate words. Defaults to the
+            process-wide lexicon from lexicon.get_lexicon(), so boards
+            never rebuild the dictionary themselves.
+        """
+        #   Every board shares the premium square layout built below the
+        #   class
+        self.base_board = self.layout
+        #   The tiles on the board. `player_board` reads and writes the same
+        #   letters as rows of strings, for code that indexes it directly.
+        self.core = BoardCore()
+        self.player_board = LetterRows(self.core)
         self.staged_letters_by_coord = {}
+        #   Empty squares the GUI has taken out of play with
+        #   set_availability(), such as those with tiles staged on them
+        self.unavailable_coords = set()
 
         #   `anchor_coords` will keep track of coordinates immediately
         #   adjacent to current tiles on the board. Initialize this to contain
         #   the board's center coordinate, because the very first hand MUST
         #   be played using this coordinate.
         self.anchor_coords = set([CENTER])
-        self.dfa = DFA()
+        self.dfa = dfa if dfa is not None else get_lexicon()
+        #   Cross-check masks and cross-word scores of the empty squares,
+        #   maintained incrementally by play_hand()
+        self.cross_checks = CrossCheckTable(self, self.dfa.dawg)
+        #   Move query results by position hash and rack, cleared by
+        #   play_hand()
+        self.position_cache = PositionCache()
 
     def set_letter(self, row, col, letter):
         # self.player_board[row][col] = letter
@@ -183,15 +197,16 @@ class ScrabbleBoard(object):
         self.staged_letters_by_coord (i.e. the location we're looking at is a
         tile placed by the player in the CURRENT turn. Previous turns that
         used a multiplier square "consume" the multiplier).
+
+        A blank, which is played as an uppercase letter, scores 0.
         """
 
         letter = self.get_letter_at_coord(row, col, letters_by_coord)
-        base_value = ScrabbleTile(letter=letter).get_value()
-        multiplier = 1
+        base_value = value_by_letter[letter]
         if (row, col) in letters_by_coord:
-            if self.base_board[row][col].is_premium_letter():
-                multiplier *= self.base_board[row][col].get_multiplier()
-        return base_value * multiplier
+            return base_value * self.letter_multipliers[
+                row * LITERAL_MAX_LENGTH + col]
+        return base_value
 
     def get_word_multiplier(self, row, col, letters_by_coord):
         """Get the word multiplier at (row, col) if there is one.
@@ -203,28 +218,20 @@ class ScrabbleBoard(object):
         """
 
         if (row, col) in letters_by_coord:
-            if self.base_board[row][col].is_premium_word():
-                multiplier = self.base_board[row][col].get_multiplier()
-                return multiplier
+            return self.word_multipliers[row * LITERAL_MAX_LENGTH + col]
         return 1
 
     def get_letter_at_coord(self, row, col, letters_by_coord):
         """This method gets the letter at `row`, `col`.
 
-        Since letters will not be immediately stored in `self.player_board`,
-        this method checks both `self.player_board` and `letters_by_coord` if
-        a letter exists at the given coordinate. Returns '' if no letter is
-        present.
+        Since letters will not be immediately stored on the board, this
+        method checks both the board and `letters_by_coord` if a letter
+        exists at the given coordinate. Returns '' if no letter is present.
         """
 
-        try:
-            if self.player_board[row][col]:
-                return self.player_board[row][col]
-            else:
-                if (row, col) in letters_by_coord:
-                    return letters_by_coord[row, col]
-        except IndexError:
-            return ''
+        if 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE:
+            return (self.core.letter(row, col)
+                    or letters_by_coord.get((row, col), ''))
         return ''
 
     def is_vertically_aligned(self, coords, letters_by_coord):
@@ -569,16 +576,73 @@ class ScrabbleBoard(object):
         #   Word is not legal. Return 0.
         return 0
 
+    def get_hands_legality_by_score(self, hands):
+        """Returns the score of each of `hands`, or 0 for illegal hands.
+
+        `hands` is a list of letters_by_coord dicts. The scores are those
+        get_hand_legality_by_score() gives for each hand, but the hands are
+        checked as one batch, sharing the cross-checks and word lookups
+        between them (see HandValidator). A hand with a tile off the board
+        or on a square that already holds a tile is illegal.
+        """
+
+        return HandValidator(self).scores(hands)
+
     def play_hand(self, letters_by_coord):
         score = self.get_hand_legality_by_score(letters_by_coord)
         if score:
-            for (row, col), letter in letters_by_coord.iteritems():
-                self.player_board[row][col] = letter
-                self.permanently_place_tile(row, col)
-            coords = [coord for coord in letters_by_coord]
-            self.update_anchor_coords(coords)
+            self.make_move(letters_by_coord)
+            #   The position the cached results were for is gone for good
+            self.position_cache.clear()
         return score
 
+    def make_move(self, letters_by_coord):
+        """Place the tiles of a legal move and return how to take them back.
+
+        Unlike play_hand(), the move is not validated, so it must already be
+        known to be legal, such as a move from a move generator. Returns a
+        MoveUndo entry for unmake_move(). Moves must be unmade in the
+        reverse of the order they were made in.
+        """
+
+        coords = list(letters_by_coord)
+        for (row, col), letter in letters_by_coord.items():
+            self.core.place(row, col, letter)
+        anchor_coords = self.anchor_coords
+        self.anchor_coords = set(anchor_coords)
+        self.update_anchor_coords(coords)
+        journal = []
+        self.cross_checks.update(coords, journal)
+        return MoveUndo(coords, anchor_coords, journal)
+
+    def unmake_move(self, undo):
+        """Take back the move that returned the MoveUndo entry `undo`."""
+
+        for row, col in undo.coords:
+            self.core.remove(row, col)
+        self.anchor_coords = undo.anchor_coords
+        self.cross_checks.restore(undo.cross_checks)
+
+    def clone(self):
+        """Get an independent copy of the board, sharing only its lexicon.
+
+        The copy is made attribute by attribute, without rebuilding the
+        squares or recomputing any cross-checks.
+        """
+
+        board = ScrabbleBoard.__new__(ScrabbleBoard)
+        board.base_board = self.base_board
+        board.unavailable_coords = set(self.unavailable_coords)
+        board.core = self.core.copy()
+        board.player_board = LetterRows(board.core)
+        board.staged_letters_by_coord = dict(self.staged_letters_by_coord)
+        board.anchor_coords = set(self.anchor_coords)
+        board.dfa = self.dfa
+        board.cross_checks = self.cross_checks.copy(board)
+        board.position_cache = PositionCache(self.position_cache.max_entries,
+                                             self.position_cache.max_size)
+        return board
+
     def update_anchor_coords(self, coords):
         """Help keep track of 'anchor' coordinates.
 
@@ -613,7 +677,7 @@ class ScrabbleBoard(object):
             adjacent = filter(
                 lambda c:
                     c not in coords
-                    and self.base_board[c[0]][c[1]].is_available(),
+                    and self.is_available(c[0], c[1]),
                     adjacent)
             return adjacent
 
@@ -636,18 +700,24 @@ class ScrabbleBoard(object):
             self.anchor_coords.discard(coord)
 
     def is_available(self, row, col):
-        if row > MAX_LENGTH or col > MAX_LENGTH:
+        if not (0 <= row <= MAX_LENGTH and 0 <= col <= MAX_LENGTH):
             return False
-        return self.base_board[row][col].is_available()
+        if (self.core.row_masks[row] >> col) & 1:
+            return False
+        return (row, col) not in self.unavailable_coords
 
     def is_played(self, row, col):
-        if row > MAX_LENGTH or col > MAX_LENGTH:
+        if not (0 <= row <= MAX_LENGTH and 0 <= col <= MAX_LENGTH):
             return False
-        return self.base_board[row][col].is_played()
+        return (self.core.row_masks[row] >> col) & 1 == 1
 
     def set_availability(self, row, col, availability):
-        if row <= MAX_LENGTH and col <= MAX_LENGTH:
-            self.base_board[row][col].set_availability(availability)
+        if (0 <= row <= MAX_LENGTH and 0 <= col <= MAX_LENGTH
+                and not self.is_played(row, col)):
+            if availability:
+                self.unavailable_coords.discard((row, col))
+            else:
+                self.unavailable_coords.add((row, col))
 
     def permanently_place_tile(self, row, col):
         """Permanently set tile's availability to False
@@ -656,6 +726,52 @@ class ScrabbleBoard(object):
         finalized. In other words, once a tile is placed and the 'turn'
         is done, no other tiles can be placed in that position for the
         duration of the game.
+
+        A square holding a tile is never available, so placing the tile
+        with make_move() is enough; this only takes an empty square out of
+        play.
         """
         if row <= MAX_LENGTH and col <= MAX_LENGTH:
-            self.base_board[row][col].set_is_played()
+            self.unavailable_coords.add((row, col))
+
+    def get_position(self):
+        """Get the tiles on the board as a compact, hashable position.
+
+        The position is a tuple of 15 strings, one per row, with
+        EMPTY_SQUARE for squares without a tile. It can be stored or sent
+        to another process and restored with set_position().
+        """
+
+        return tuple(self.core.row_string(row, EMPTY_SQUARE)
+                     for row in range(LITERAL_MAX_LENGTH))
+
+    def set_position(self, position):
+        """Replace the tiles on the board with those in `position`.
+
+        The anchor coordinates and cross-checks are rebuilt to match.
+        """
+
+        self.core.clear()
+        self.unavailable_coords = set()
+        for row, letters in enumerate(position):
+            for col, letter in enumerate(letters):
+                if letter != EMPTY_SQUARE:
+                    self.core.place(row, col, letter)
+
+        self.anchor_coords = set()
+        coords = self.core.occupied()
+        if coords:
+            self.update_anchor_coords(coords)
+        else:
+            self.anchor_coords.add(CENTER)
+        self.cross_checks.refresh()
+
+#   The premium square layout shared by every board, and the letter and word
+#   multiplier of each square, indexed by row * LITERAL_MAX_LENGTH + col
+ScrabbleBoard.layout = ScrabbleBoard.build_board()
+ScrabbleBoard.letter_multipliers = [
+    square.get_multiplier() if square.is_premium_letter() else 1
+    for row in ScrabbleBoard.layout for square in row]
+ScrabbleBoard.word_multipliers = [
+    square.get_multiplier() if square.is_premium_word() else 1
+    for row in ScrabbleBoard.layout for square in row]
@@ -8,19 +8,125 @@ from word import Word
 from scrabble_dfa import DFA
 import scrabble
 from collections import namedtuple
+import cProfile
+import itertools
+import os
+import time
 from player import Player
+from cross_checks import ACROSS, DOWN
+from move_generator import GaddagMoveGenerator, MoveGenerator
+from move_scorer import MoveScorer
+from move_ranking import top_moves
+from leave_table import Equity
+from search_stats import CountingDFA, SearchStats
+
+#   Move generators the AI can search with
+GENERATOR_DFS = 'dfs'
+GENERATOR_ANCHOR = 'anchor'
+GENERATOR_GADDAG = 'gaddag'
+
+#   How the AI picks the move it plays
+SEARCH_THRESHOLD = 'threshold'
+SEARCH_BEST = 'best'
+SEARCH_SIMULATE = 'simulate'
+#   Top moves SEARCH_SIMULATE compares by default
+SIMULATE_CANDIDATES = 4
+
+move_generator_by_mode = {
+    GENERATOR_ANCHOR: MoveGenerator,
+    GENERATOR_GADDAG: GaddagMoveGenerator
+}
+
+#   Numbers the profiles written by this process
+profile_numbers = itertools.count(1)
 
 class ScrabbleAI(Player):
     """This is the AI Class portion of scrabble
 
     This will be used to create AI responses to words played
     """
-    def __init__(self, board, tile_bag, dfa, threshold):
+    def __init__(self, board, tile_bag, dfa, threshold,
+                 generator=GENERATOR_ANCHOR, search=SEARCH_THRESHOLD,
+                 evaluate=None, workers=None, verbose=True,
+                 collect_stats=False, profile_dir=None, time_budget_ms=None,
+                 leaves=None, simulate_candidates=SIMULATE_CANDIDATES,
+                 simulate_iterations=None, simulate_plies=None):
+        """
+        Arguments:
+        dfa -- The lexicon to search. Pass None to share the board's.
+        threshold -- Any word scoring above this is played immediately.
+
+        Keyword Arguments:
+        generator -- How moves are found
+            Acceptable Values:
+                - GENERATOR_ANCHOR: enumerate all moves with MoveGenerator
+                - GENERATOR_GADDAG: enumerate all moves with
+                  GaddagMoveGenerator, which loads the GADDAG lexicon
+                - GENERATOR_DFS: the original per-anchor depth first search
+        search -- How the move to play is chosen
+            Acceptable Values:
+                - SEARCH_THRESHOLD: the first word beating `threshold`
+                - SEARCH_BEST: the best of all legal moves
+                - SEARCH_SIMULATE: the best of the top moves when each is
+                  played out against sampled opponent racks
+        evaluate -- Function valuing a Word for SEARCH_BEST and
+            find_best_words(). Defaults to the word's equity if `leaves`
+            is given, otherwise to its score.
+        leaves -- A leave_table.LeaveTable to value the tiles each move
+            keeps on the rack with
+        workers -- If set, find_best_words() searches the board with this
+            many worker processes (see parallel_search.ParallelSearch).
+            `evaluate` must then be picklable. SEARCH_SIMULATE runs its
+            rollouts in this many processes too.
+        verbose -- Print the AI's tiles as they change
+        collect_stats -- Count the work of every search in a SearchStats.
+            play_hand_with_stats() returns it with the word played, and it
+            stays in `last_stats` until the next search
+        profile_dir -- If set, every hand is played under cProfile and its
+            profile is dumped to this directory
+        simulate_candidates -- Top moves compared by SEARCH_SIMULATE
+        simulate_iterations -- Rollouts of every candidate. Defaults to
+            the Simulator's, which keep a move interactive.
+        simulate_plies -- Turns played after a candidate in each rollout.
+            Defaults to the Simulator's.
+        time_budget_ms -- If set, every search stops once it has run this
+            many milliseconds and the best word found so far is played.
+            Anchors are searched most promising first, and the budget is
+            checked between anchors. The search is always serial, and
+            cannot be combined with SEARCH_SIMULATE.
+        """
+        if time_budget_ms is not None and search == SEARCH_SIMULATE:
+            raise ValueError("A time budget cannot be combined with "
+                             "simulation search")
         super(ScrabbleAI, self).__init__(board, tile_bag)
-        print("Current AI tiles: ")
-        print([tile.get_letter() for tile in self.tiles])
-        self.dfa = dfa
+        self.verbose = verbose
+        if verbose:
+            print("Current AI tiles: ")
+            print([tile.get_letter() for tile in self.tiles])
+        self.dfa = dfa if dfa is not None else board.dfa
         self.threshold = threshold
+        self.generator = generator
+        self.search = search
+        self.evaluate = evaluate
+        self.leaves = leaves
+        self.workers = workers
+        self.parallel_search = None
+        self.simulator = None
+        self.simulate_candidates = simulate_candidates
+        self.simulate_iterations = simulate_iterations
+        self.simulate_plies = simulate_plies
+        self.collect_stats = collect_stats
+        self.profile_dir = profile_dir
+        self.last_stats = None
+        self.time_budget_ms = time_budget_ms
+        self.scorer = MoveScorer(board)
+        self.move_generator = None
+        if generator != GENERATOR_DFS:
+            self.move_generator = move_generator_by_mode[generator](board,
+                                                                    self.dfa)
+        #   Looks bingos up in the anagram index before any search
+        self.bingo_finder = self.move_generator or MoveGenerator(board,
+                                                                 self.dfa)
         self.indexes_horizontal = []
         self.indexes_vertical = []
 
@@ -30,40 +136,315 @@ class ScrabbleAI(Player):
         This function will take care of playing a hand from the
         AI's perspective
         """
-        word = self.find_acceptable_word([tile.get_letter() for tile in self.tiles])
+        return self.play_hand_with_stats()[0]
+
+    def play_hand_with_stats(self):
+        """ This function plays a hand like play_hand(), and returns
+        (word, stats): the word played, and the SearchStats of the search
+        that chose it, or None unless the AI collects stats
+        """
+        letters = [tile.get_letter() for tile in self.tiles]
+        if self.profile_dir is not None:
+            word = self.profile(self.choose_word, letters)
+        else:
+            word = self.choose_word(letters)
         super(ScrabbleAI, self).release_and_draw_tiles([l for l in word.get_letters_by_coord().values()])
         super(ScrabbleAI, self).increment_score(word.get_score())
-        print("Current AI tiles: ")
-        print([tile.get_letter() for tile in self.tiles])
-        return word
+        if self.verbose:
+            print("Current AI tiles: ")
+            print([tile.get_letter() for tile in self.tiles])
+        return word, self.last_stats
+
+    def choose_word(self, letters):
+        """ This function picks the word to play with the letters,
+        the way the AI's search mode says to
+        """
+        if self.time_budget_ms is not None:
+            return self.find_word_within_budget(letters)
+        if self.search == SEARCH_SIMULATE:
+            return self.find_simulated_word(letters)
+        if self.search == SEARCH_BEST:
+            best_words = self.find_best_words(letters, 1)
+            return best_words[0] if best_words else Word("", {}, 0)
+        return self.find_acceptable_word(letters)
+
+    def profile(self, func, *args):
+        """ This function calls func under cProfile and dumps the
+        profile into the AI's profile directory
+        """
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args)
+        finally:
+            profiler.dump_stats(os.path.join(
+                self.profile_dir, 'search-{}-{:04d}.prof'.format(
+                    os.getpid(), next(profile_numbers))))
 
     def find_acceptable_word(self, letters):
+        """ This functions job is to find an accepting word
+        The first generated word that beats the threshold is returned,
+        otherwise the best word generated
+        """
+        stats = SearchStats() if self.collect_stats else None
+        self.last_stats = stats
+        bingo = self.find_bingo(letters, stats)
+        if bingo.get_score() > self.threshold:
+            return bingo
+        if self.generator == GENERATOR_DFS:
+            word = self.find_acceptable_word_dfs(letters, stats=stats)
+            return bingo if bingo > word else word
+
+        start = time.time()
+        moves = self.move_generator.generate(letters, stats=stats)
+        if stats is not None:
+            stats.add_time('generate', time.time() - start)
+            start = time.time()
+        best_word = Word("", {}, 0)
+        for word in moves:
+            if word.get_score() > self.threshold:
+                best_word = word
+                break
+            if word > best_word:
+                best_word = word
+        if stats is not None:
+            stats.add_time('select', time.time() - start)
+        return best_word
+
+    def find_word_within_budget(self, letters):
+        """ This function searches the anchors, most promising first,
+        until the AI's time budget runs out. In threshold mode the first
+        word beating the threshold is played as soon as it is found;
+        otherwise the best word found in time is. The search carries on
+        past the deadline until some word is found, so the AI only passes
+        when it has no move
+        """
+        deadline = time.time() + self.time_budget_ms / 1000.0
+        stats = SearchStats() if self.collect_stats else None
+        self.last_stats = stats
+        bingo = self.find_bingo(letters, stats, deadline)
+        if (self.search == SEARCH_THRESHOLD
+                and bingo.get_score() > self.threshold):
+            return bingo
+        if self.generator == GENERATOR_DFS:
+            word = self.find_acceptable_word_dfs(letters, deadline, stats)
+            return bingo if bingo > word else word
+
+        start = time.time()
+        evaluate = None
+        if self.search == SEARCH_BEST:
+            evaluate = self.evaluation(letters)
+        best_words = [bingo] if bingo.get_word() else []
+        for moves in self.move_generator.generate_by_anchor(letters, stats):
+            if self.search == SEARCH_THRESHOLD:
+                beating = [word for word in moves
+                           if word.get_score() > self.threshold]
+                if beating:
+                    best_words = beating[:1]
+                    break
+            best_words = top_moves(best_words + moves, 1, evaluate)
+            if best_words and time.time() >= deadline:
+                break
+        if stats is not None:
+            stats.add_time('search', time.time() - start)
+        return best_words[0] if best_words else Word("", {}, 0)
+
+    def find_bingo(self, letters, stats=None, deadline=None):
+        """ This function looks up the best scoring move playing every
+        tile of the rack in the anagram index, so the searches that may
+        stop early never miss a bingo. Given a deadline, only the bingos
+        found by then are considered. Returns an empty Word if there is
+        none
+        """
+        start = time.time()
+        bingos = self.bingo_finder.find_bingos(letters, deadline)
+        if stats is not None:
+            stats.add_time('bingos', time.time() - start)
+        best_words = top_moves(bingos, 1)
+        return best_words[0] if best_words else Word("", {}, 0)
+
+    def find_simulated_word(self, letters):
+        """ This function plays the top candidate words out against
+        sampled opponent racks, and returns the one leading to the best
+        average spread
+        """
+        candidates = self.find_best_words(letters, self.simulate_candidates)
+        if len(candidates) < 2:
+            return candidates[0] if candidates else Word("", {}, 0)
+        ranking = self.get_simulator().simulate(self.scrabble_board,
+                                                letters, candidates)
+        return ranking[0][1]
+
+    def find_best_words(self, letters, k, evaluate=None):
+        """ This function finds the k best words for the letters
+        Every legal move is generated and ranked by `evaluate`, or the
+        AI's own evaluation if it has one, or the word's score. The
+        result is best first, and moves of equal value always come out
+        in the same order. The moves are looked up in the board's position
+        cache, so asking again on the same board and rack does not
+        search again
+        """
+        move_generator = self.move_generator
+        if move_generator is None:
+            move_generator = MoveGenerator(self.scrabble_board, self.dfa)
+        if evaluate is None:
+            evaluate = self.evaluation(letters)
+        stats = SearchStats() if self.collect_stats else None
+        self.last_stats = stats
+        start = time.time()
+        if self.workers:
+            #   The workers' counters stay in the workers; only the
+            #   time of the whole search is recorded
+            best_words = self.get_parallel_search().find_best_words(
+                self.scrabble_board, letters, k, evaluate)
+            if stats is not None:
+                stats.add_time('search', time.time() - start)
+            return best_words
+        if stats is None:
+            moves = move_generator.cached_moves(letters)
+        else:
+            #   Only a search has work to count
+            moves = move_generator.generate(letters, stats=stats)
+        if stats is not None:
+            stats.add_time('generate', time.time() - start)
+            start = time.time()
+        best_words = top_moves(moves, k, evaluate)
+        if stats is not None:
+            stats.add_time('select', time.time() - start)
+        return best_words
+
+    def evaluation(self, letters):
+        """ This function returns the AI's own way of valuing the moves
+        it can make with the letters, or None to value them by score
+        """
+        if self.evaluate is None and self.leaves is not None:
+            return Equity(self.leaves, letters)
+        return self.evaluate
+
+    def get_parallel_search(self):
+        """ This function returns the AI's process pool, starting it
+        the first time it is needed
+        """
+        if self.parallel_search is None:
+            #   Imported here because parallel_search imports scrabble,
+            #   which imports this module
+            from parallel_search import ParallelSearch
+            self.parallel_search = ParallelSearch(
+                self.workers,
+                move_generator_by_mode.get(self.generator, MoveGenerator),
+                self.dfa.words_file)
+        return self.parallel_search
+
+    def get_simulator(self):
+        """ This function returns the AI's Monte Carlo simulator,
+        starting it the first time it is needed
+        """
+        if self.simulator is None:
+            #   Imported here for the same reason as parallel_search
+            from simulation import (DEFAULT_ITERATIONS, DEFAULT_PLIES,
+                                    Simulator)
+            iterations = self.simulate_iterations
+            plies = self.simulate_plies
+            self.simulator = Simulator(
+                self.workers or 1,
+                DEFAULT_ITERATIONS if iterations is None else iterations,
+                DEFAULT_PLIES if plies is None else plies,
+                self.dfa.words_file)
+        return self.simulator
+
+    def close(self):
+        """ This function shuts down the AI's worker processes, if any
+        """
+        if self.parallel_search is not None:
+            self.parallel_search.close()
+            self.parallel_search = None
+        if self.simulator is not None:
+            self.simulator.close()
+            self.simulator = None
+
+    def find_acceptable_word_dfs(self, letters, deadline=None, stats=None):
         """ This functions job is to find an accepting word
         This will be done by looping through all of the coordinates
         that exist in anchor coordinates until a word is found that
-        beats the threshold
+        beats the threshold. Given a deadline (a time.time() value), the
+        most promising anchors are searched first, and the search stops
+        at the first anchor finished after the deadline that leaves a word
+        found. Given a
+        SearchStats, the search counts its work and times every anchor
+        into it
+        """
+
+        start = time.time()
+        try:
+            return self.search_anchors_dfs(letters, deadline, stats)
+        finally:
+            if stats is not None:
+                stats.add_time('search', time.time() - start)
+
+    def search_anchors_dfs(self, letters, deadline, stats):
+        """ This function runs the depth first search of
+        find_acceptable_word_dfs() over the anchors
         """
 
         best_word = Word("", {}, 0)
-        for coord in self.scrabble_board.anchor_coords :
+        anchor_coords = self.scrabble_board.anchor_coords
+        if deadline is not None:
+            anchor_coords = self.order_anchors(anchor_coords, len(letters))
+        for coord in anchor_coords :
 
             r = coord[0]
             c = coord[1]
 
             if not self.scrabble_board.is_played(r, c):
-                word = self.find_words_for_anchor((r, c), letters)
+                anchor_start = time.time()
+                word = self.find_words_for_anchor((r, c), letters, stats)
+                if stats is not None:
+                    stats.add_anchor_time((r, c, None),
+                                          time.time() - anchor_start)
                 if word.get_score() > self.threshold:
                     self.indexes_horizontal[:] = []
                     self.indexes_vertical[:] = []
                     return word
                 if word > best_word:
                     best_word = word
+                if (deadline is not None and best_word.get_word()
+                        and time.time() >= deadline):
+                    break
          
         self.indexes_horizontal[:] = []
         self.indexes_vertical[:] = []
         return best_word
 
-    def find_words_for_anchor(self, coord, letters):
+    def order_anchors(self, anchor_coords, reach):
+        """ This function sorts anchor coordinates by the payoff the
+        move scorer expects of them in either direction, best first
+        """
+        scorer = self.scorer
+        return sorted(anchor_coords, key=lambda coord: -max(
+            scorer.anchor_payoff(coord[0], coord[1], direction, reach)
+            for direction in (ACROSS, DOWN)))
+
+    def search_lexicon(self, stats):
+        """ This function returns the lexicon a depth first search reads:
+        the AI's own, or given a SearchStats, a wrapper counting the
+        lookups and acceptance tests made through it
+        """
+        if stats is None:
+            return self.dfa
+        return CountingDFA(self.dfa, stats)
+
+    def validate(self, letters_by_coord, stats):
+        """ This function scores a move on the board, 0 if it is
+        illegal, counting the call and any legal move into stats
+        """
+        score = self.scrabble_board.get_hand_legality_by_score(
+            letters_by_coord)
+        if stats is not None:
+            stats.validator_calls += 1
+            if score:
+                stats.moves += 1
+        return score
+
+    def find_words_for_anchor(self, coord, letters, stats=None):
         """ This function finds an acceptable/optimal word for an anchor
         This will be done by trying all of the words that can come out of it
         from right, left, down, and upward directions
@@ -72,12 +453,12 @@ class ScrabbleAI(Player):
         c = coord[1]
         best_word = Word("", {}, 0)
         if not self.scrabble_board.is_played(r, c):
-            lword = self.get_word_left(r, c, letters)
+            lword = self.get_word_left(r, c, letters, stats)
             if lword > best_word:
                 best_word = lword
                 if best_word.get_score() > self.threshold:
                     return best_word
-            word = self.get_word_up(r, c, letters)
+            word = self.get_word_up(r, c, letters, stats)
             if word > best_word:
                 best_word = word
                 if best_word.get_score() > self.threshold:
@@ -89,9 +470,6 @@ class ScrabbleAI(Player):
         """ This is a helper function to find a chunk of letters next to coordinate
         This is done by finding the letters below a coordinate
         """
-        #define a word and begin getting contiguous block
-
-        contig_block = ""
         row = coord[0] + 1
         col = coord[1]
 
@@ -100,23 +478,14 @@ class ScrabbleAI(Player):
 
             return ""
 
-        #loop through in downward direction and add to word if not ''
-        while row <= scrabble.MAX_LENGTH and self.scrabble_board.is_played(row, col) :
-
-            contig_block += self.scrabble_board.player_board[row][col]
-            row += 1
-
-        #urn the finished word
-
-        return contig_block
+        #read the run of letters below straight off the board's bitmasks
+        return self.scrabble_board.core.letters_down(coord[0], col)
 
     def get_contiguous_block_right(self, coord):
         """ This is a helper function to find a chunk of letters next to coordinate
         This is done by finding the letters to the right of a coordinate
         """
 
-        #define a word and begin getting contiguous block
-        contig_block = ""
         row = coord[0]
         col = coord[1] + 1
 
@@ -125,59 +494,38 @@ class ScrabbleAI(Player):
 
             return ""
 
-        #loop through in downward direction and add to word if not ''
-        while col <= scrabble.MAX_LENGTH and self.scrabble_board.is_played(row, col):
-
-            contig_block += self.scrabble_board.player_board[row][col]
-            col += 1
-
-        #return the finished word
-
-        return contig_block
+        #read the run of letters to the right straight off the board's bitmasks
+        return self.scrabble_board.core.letters_right(row, coord[1])
     def get_contiguous_block_up(self, coord):
         """ This is a helper function to find a chunk of letters next to coordinate
         This is done by finding the letters above a coordinate
         """
 
-        #define a word and begin getting contiguous block
-        contig_block = ""
         row = coord[0] - 1
         col = coord[1]
 
         if row > scrabble.MAX_LENGTH or col > scrabble.MAX_LENGTH or row < 0 or col < 0:
             return ""
 
-        #loop through in upward direction and add to word if not ''
-        while row >= 0 and self.scrabble_board.is_played(row, col):
-
-            contig_block = self.scrabble_board.player_board[row][col] + contig_block
-            row -= 1
-
-        #return the finished word
-        return contig_block
+        #read the run of letters above straight off the board's bitmasks
+        return self.scrabble_board.core.letters_up(coord[0], col)
 
     def get_contiguous_block_left(self, coord):
         """ This is a helper function to find a chunk of letters next to coordinate
         This is done by finding the letters to the left of a coordinate
         """
 
-        #define a word and begin getting contiguous block
-        contig_block = ""
         row = coord[0]
         col = coord[1] - 1
 
         if row > scrabble.MAX_LENGTH or col > scrabble.MAX_LENGTH or row < 0 or col < 0:
             return ""
 
-        #loop through in leftward direction and add to word if not ''
-        while col >= 0 and self.scrabble_board.is_played(row, col):
-            contig_block = self.scrabble_board.player_board[row][col] + contig_block
-            col -= 1
-
-        #return the finished word
-        return contig_block
+        #read the run of letters to the left straight off the board's bitmasks
+        return self.scrabble_board.core.letters_left(row, coord[1])
 
-    def get_word_right(self, row, col, letters, state, letters_by_coords, end_col):
+    def get_word_right(self, row, col, letters, state, letters_by_coords, end_col,
+                       stats=None):
         """ This function finds a word to the right of a coordinate
         This is done by a depth first search of the dfa with checks at each point
         run into
@@ -191,12 +539,15 @@ class ScrabbleAI(Player):
         #accepting or not greater than threshold continue the search, with a new entry
         #in letters_by_coords
 
+        if stats is not None:
+            stats.nodes += 1
         if row < 0 or row > scrabble.MAX_LENGTH or col < 0 or col > scrabble.MAX_LENGTH:
             return Word("", {}, 0)
+        dfa = self.search_lexicon(stats)
 
         best_word = Word("", {}, 0)
         if self.scrabble_board.is_played(row, col):
-            return self.get_word_right(row, col + 1, letters, state + self.scrabble_board.player_board[row][col], dict(letters_by_coords), end_col)
+            return self.get_word_right(row, col + 1, letters, state + self.scrabble_board.core.letter(row, col), dict(letters_by_coords), end_col, stats)
         slice_except = -1
         down = self.get_contiguous_block_down((row, col))
         up = self.get_contiguous_block_up((row, col))
@@ -205,38 +556,38 @@ class ScrabbleAI(Player):
         for letter in letters:
             slice_except += 1
             try:
-                self.dfa.dfa[state + letter]
+                dfa.dfa[state + letter]
                 modified_letter_dict = dict(letters_by_coords)
                 modified_letter_dict[(row, col)] = letter
                 if down != "":
 
                     if up != "":
-                        if not self.dfa.accepts(up + letter + down):
+                        if not dfa.accepts(up + letter + down):
                             continue
-                    if not self.dfa.accepts(letter + down):
+                    if not dfa.accepts(letter + down):
                         continue
 
                 if up != "":
 
-                    if not self.dfa.accepts(up + letter):
+                    if not dfa.accepts(up + letter):
                         continue
 
                 if right != "":
 
-                    self.dfa.dfa[state + letter + right]
+                    dfa.dfa[state + letter + right]
                     letter += right
                     col += len(right)
 
                 if col >= end_col:
 
-                    score = self.scrabble_board.get_hand_legality_by_score(modified_letter_dict)
+                    score = self.validate(modified_letter_dict, stats)
                     if score > best_word.get_score() and state + letter != '':
                         best_word = Word(state + letter, dict(modified_letter_dict), score)
 
                     if score >= self.threshold:
                         return best_word
 
-                word = self.get_word_right(row, col + 1, letters[:slice_except] + letters[slice_except+1:], state + letter, dict(modified_letter_dict), end_col)
+                word = self.get_word_right(row, col + 1, letters[:slice_except] + letters[slice_except+1:], state + letter, dict(modified_letter_dict), end_col, stats)
 
                 if word.get_score() >= self.threshold and word.get_word():
                     return word
@@ -249,16 +600,20 @@ class ScrabbleAI(Player):
 
         return best_word
 
-    def get_word_down(self, row, col, letters, state, letters_by_coords, end_row):
+    def get_word_down(self, row, col, letters, state, letters_by_coords, end_row,
+                      stats=None):
         """ This function finds a word below a coordinate
         This is done through depth first DFA search with checks at every point
         """
 
+        if stats is not None:
+            stats.nodes += 1
         if row < 0 or row > scrabble.MAX_LENGTH or col < 0 or col > scrabble.MAX_LENGTH:
             return Word("",{}, 0)
+        dfa = self.search_lexicon(stats)
         best_word = Word("", {}, 0)
         if self.scrabble_board.is_played(row, col):
-            return self.get_word_down(row + 1, col, letters, state + self.scrabble_board.player_board[row][col], dict(letters_by_coords), end_row)
+            return self.get_word_down(row + 1, col, letters, state + self.scrabble_board.core.letter(row, col), dict(letters_by_coords), end_row, stats)
         slice_except = -1
         left = self.get_contiguous_block_left((row, col))
         right = self.get_contiguous_block_right((row, col))
@@ -268,33 +623,33 @@ class ScrabbleAI(Player):
 
             try:
 
-                self.dfa.dfa[state + letter]
+                dfa.dfa[state + letter]
                 modified_letter_dict = dict(letters_by_coords)
                 modified_letter_dict[(row, col)] = letter
 
                 if right != "":
 
                     if left != "":
-                        if not self.dfa.accepts(left + letter + right):
+                        if not dfa.accepts(left + letter + right):
                             continue
-                    if not self.dfa.accepts(letter + right):
+                    if not dfa.accepts(letter + right):
                         continue
 
                 if left != "":
 
-                    if not self.dfa.accepts(left + letter):
+                    if not dfa.accepts(left + letter):
                         continue
 
                 if down != "":
 
-                    self.dfa.dfa[state + letter + down]
+                    dfa.dfa[state + letter + down]
                     letter += down
                     
                     col += len(down)
 
                 if row >= end_row:
 
-                    score = self.scrabble_board.get_hand_legality_by_score(modified_letter_dict)
+                    score = self.validate(modified_letter_dict, stats)
 
                     if score > best_word.get_score() and state + letter != '':
 
@@ -303,7 +658,7 @@ class ScrabbleAI(Player):
                     if score >= self.threshold:
                         return best_word
 
-                word = self.get_word_down(row + 1, col, letters[:slice_except] + letters[slice_except+1:], state + letter, dict(modified_letter_dict), end_row)
+                word = self.get_word_down(row + 1, col, letters[:slice_except] + letters[slice_except+1:], state + letter, dict(modified_letter_dict), end_row, stats)
 
                 if word.get_score() > self.threshold and word.get_word():
                     return word
@@ -316,11 +671,13 @@ class ScrabbleAI(Player):
 
         return best_word
 
-    def get_word_left(self, row, col, letters):
+    def get_word_left(self, row, col, letters, stats=None):
         """ This function finds a word to the left of a coordinate
         This is done through backwards iteration to the length of hand
         to search the dfa
         """
+        if stats is not None:
+            stats.nodes += 1
         best_word = Word("", {}, 0)
         for i in range(0, len(letters)):
             if self.scrabble_board.is_played(row, col - i):
@@ -328,18 +685,20 @@ class ScrabbleAI(Player):
             if (row, col - i) in self.indexes_horizontal:
                 continue
             self.indexes_horizontal.append((row, col - i))
-            word = self.get_word_right(row, col - i, letters, self.get_contiguous_block_left((row, col - i)), {}, col)
+            word = self.get_word_right(row, col - i, letters, self.get_contiguous_block_left((row, col - i)), {}, col, stats)
             if word > best_word:
                 best_word = word
             if best_word.get_score() > self.threshold:
                 return best_word
         return best_word
 
-    def get_word_up(self, row, col, letters):
+    def get_word_up(self, row, col, letters, stats=None):
         """ This function finds a word below a coordinate
         This is done by iterating in reverse regarding the length of the word
         with the destination being the anchor point and then a DFA search
         """
+        if stats is not None:
+            stats.nodes += 1
         best_word = Word("", {}, 0)
         for i in range(0, len(letters)):
             if self.scrabble_board.is_played(row - i, col):
@@ -347,7 +706,7 @@ class ScrabbleAI(Player):
             if (row - i, col) in self.indexes_vertical:
                 continue
             self.indexes_vertical.append((row -i, col))
-            word = self.get_word_down(row - i, col, letters, self.get_contiguous_block_up((row - i, col)), {}, row)
+            word = self.get_word_down(row - i, col, letters, self.get_contiguous_block_up((row - i, col)), {}, row, stats)
             if word > best_word:
                 best_word = word
             if best_word.get_score() > self.threshold:
@@ -0,0 +1,338 @@
+"""
+File:   scrabble_dawg.py
+
+A minimized DAWG (directed acyclic word graph) used as the Scrabble lexicon.
+"""
+
+import ctypes
+import os
+import string
+import struct
+import sys
+from array import array
+
+from mapped_image import (HEADER_PREFIX, ImageError, file_digest,
+                          load_image, map_arrays, map_image, pack_header,
+                          write_image)
+
+ALPHABET = string.ascii_lowercase
+#   Bitmask with one bit set for every letter of the alphabet
+ALL_LETTERS_MASK = (1 << len(ALPHABET)) - 1
+#   Returned by transitions that do not exist in the graph
+NO_STATE = -1
+
+index_by_letter = dict((letter, i) for i, letter in enumerate(ALPHABET))
+
+#   Binary lexicon image layout: a fixed header followed by the arrays
+#   edge_offsets, edge_masks, edge_targets (int32), then accept and
+#   edge_labels (uint8), all in the byte order recorded in the header.
+IMAGE_VERSION = 1
+#   HEADER_PREFIX, then states, edges, source sha1
+IMAGE_HEADER = struct.Struct(HEADER_PREFIX + 'II20s')
+
+
+class LexiconImageError(ImageError):
+    """Exception that may be raised when loading a lexicon image
+
+    Raise this exception when a file is not a lexicon image, or was written
+    by a different version of this module or for a different byte order.
+    """
+    pass
+
+
+def popcount(mask):
+    """Return the number of bits set in `mask`."""
+
+    return bin(mask).count('1')
+
+
+class DAWG(object):
+    """A minimized directed acyclic word graph stored in flat arrays
+
+    States are integers, and the root state is always 0. The outgoing edges
+    of state `s` occupy the slice edge_offsets[s]:edge_offsets[s + 1] of the
+    `edge_labels` and `edge_targets` arrays, sorted by label. Labels are letter
+    indexes (0 for 'a' through 25 for 'z'). `edge_masks[s]` has bit `label`
+    set for every outgoing edge of `s`, which gives O(1) membership tests and
+    lets an edge's position be computed by counting the lower bits.
+    `accept[s]` is 1 if a word ends at state `s`.
+    """
+
+    #   Maps the characters of the words in the graph to edge labels
+    label_by_letter = index_by_letter
+    #   Identifies images of this kind of graph
+    image_magic = b'SCRBDAWG'
+    image_extension = '.dawg'
+
+    def __init__(self, edge_offsets, edge_labels, edge_targets,
+                 edge_masks, accept):
+        self.edge_offsets = edge_offsets
+        self.edge_labels = edge_labels
+        self.edge_targets = edge_targets
+        self.edge_masks = edge_masks
+        self.accept = accept
+        self.root = 0
+        #   SHA-1 of the word list the graph was built from, if known
+        self.source_digest = None
+        #   The mmap backing the arrays when loaded from an image
+        self.image = None
+
+    @classmethod
+    def from_file(cls, words_file):
+        """Build a DAWG from a word list with one word per line."""
+
+        with open(words_file, 'r') as words:
+            dawg = cls.from_words(word.strip().lower() for word in words)
+        dawg.source_digest = file_digest(words_file)
+        return dawg
+
+    @classmethod
+    def from_words(cls, words):
+        """Build a graph from an iterable of lowercase words.
+
+        This uses the incremental construction for sorted input described by
+        Daciuk et al., so only the path of the most recently added word is
+        ever unminimized. Input that is not sorted is sorted first.
+        """
+
+        label_by_letter = cls.label_by_letter
+        words = [word for word in words if word]
+        if any(words[i] > words[i + 1] for i in range(len(words) - 1)):
+            words.sort()
+
+        #   Build-time nodes are indexes into these two lists
+        children = [{}]
+        final = [False]
+        register = {}
+        #   (parent, label, child) for the nodes on the path of the previous
+        #   word that have not been checked against `register` yet
+        unchecked = []
+
+        def minimize(down_to):
+            while len(unchecked) > down_to:
+                parent, label, child = unchecked.pop()
+                key = (final[child], tuple(sorted(children[child].items())))
+                if key in register:
+                    children[parent][label] = register[key]
+                    #   The duplicate is unreachable now; drop its edges
+                    children[child] = None
+                else:
+                    register[key] = child
+
+        previous = ''
+        for word in words:
+            if word == previous:
+                continue
+            common = 0
+            for a, b in zip(word, previous):
+                if a != b:
+                    break
+                common += 1
+            minimize(common)
+
+            node = unchecked[-1][2] if unchecked else 0
+            for letter in word[common:]:
+                child = len(children)
+                children.append({})
+                final.append(False)
+                children[node][label_by_letter[letter]] = child
+                unchecked.append((node, label_by_letter[letter], child))
+                node = child
+            final[node] = True
+            previous = word
+        minimize(0)
+
+        return cls._flatten(children, final)
+
+    @classmethod
+    def _flatten(cls, children, final):
+        """Renumber the reachable build-time nodes into flat arrays."""
+
+        state_by_node = {0: 0}
+        order = [0]
+        for node in order:
+            for label in sorted(children[node]):
+                child = children[node][label]
+                if child not in state_by_node:
+                    state_by_node[child] = len(order)
+                    order.append(child)
+
+        edge_offsets = array('i', [0])
+        edge_labels = array('B')
+        edge_targets = array('i')
+        edge_masks = array('i')
+        accept = array('B')
+        for node in order:
+            mask = 0
+            for label in sorted(children[node]):
+                edge_labels.append(label)
+                edge_targets.append(state_by_node[children[node][label]])
+                mask |= 1 << label
+            edge_offsets.append(len(edge_labels))
+            edge_masks.append(mask)
+            accept.append(1 if final[node] else 0)
+        return cls(edge_offsets, edge_labels, edge_targets, edge_masks, accept)
+
+    def save(self, image_file):
+        """Write the graph to `image_file` as a binary lexicon image."""
+
+        header = pack_header(IMAGE_HEADER, self.image_magic, IMAGE_VERSION,
+                             len(self), self.num_edges(),
+                             self.source_digest or b'\0' * 20)
+        write_image(image_file, header, [
+            (self.edge_offsets, 'i'),
+            (self.edge_masks, 'i'),
+            (self.edge_targets, 'i'),
+            (self.accept, 'B'),
+            (self.edge_labels, 'B')
+        ])
+
+    @classmethod
+    def load(cls, image_file):
+        """Map a binary lexicon image written by save().
+
+        The file is mapped copy-on-write and never written to, so every
+        process that loads the same image shares its physical pages.
+        Raises LexiconImageError if the file is not a usable image.
+        """
+
+        image, (num_states, num_edges, digest) = map_image(
+            image_file, IMAGE_HEADER, cls.image_magic, IMAGE_VERSION,
+            LexiconImageError, 'a lexicon image')
+        layout = [
+            (ctypes.c_int32, num_states + 1),
+            (ctypes.c_int32, num_states),
+            (ctypes.c_int32, num_edges),
+            (ctypes.c_uint8, num_states),
+            (ctypes.c_uint8, num_edges)
+        ]
+        (edge_offsets, edge_masks, edge_targets, accept,
+         edge_labels) = map_arrays(image, image_file, IMAGE_HEADER.size,
+                                   layout, error=LexiconImageError)
+
+        dawg = cls(edge_offsets, edge_labels, edge_targets, edge_masks, accept)
+        dawg.source_digest = digest
+        dawg.image = image
+        return dawg
+
+    def __len__(self):
+        """Return the number of states in the graph."""
+
+        return len(self.accept)
+
+    def num_edges(self):
+        return len(self.edge_labels)
+
+    def next_state(self, state, label):
+        """Follow the edge labelled `label` out of `state`.
+
+        Returns NO_STATE if there is no such edge.
+        """
+
+        mask = self.edge_masks[state]
+        bit = 1 << label
+        if not mask & bit:
+            return NO_STATE
+        return self.edge_targets[self.edge_offsets[state]
+                                 + popcount(mask & (bit - 1))]
+
+    def walk(self, letters, state=0):
+        """Follow the edges spelled by `letters`, starting from `state`.
+
+        Returns NO_STATE as soon as a transition is missing.
+        """
+
+        label_by_letter = self.label_by_letter
+        for letter in letters:
+            label = label_by_letter.get(letter)
+            if label is None:
+                return NO_STATE
+            state = self.next_state(state, label)
+            if state == NO_STATE:
+                return NO_STATE
+        return state
+
+    def edges(self, state):
+        """Return a list of (label, target) pairs for the edges of `state`."""
+
+        start = self.edge_offsets[state]
+        end = self.edge_offsets[state + 1]
+        return list(zip(self.edge_labels[start:end],
+                        self.edge_targets[start:end]))
+
+    def edge_mask(self, state):
+        return self.edge_masks[state]
+
+    def is_accept(self, state):
+        return self.accept[state] == 1
+
+    def has_prefix(self, prefix):
+        return self.walk(prefix) != NO_STATE
+
+    def accepts(self, word):
+        state = self.walk(word)
+        return state != NO_STATE and self.accept[state] == 1
+
+    def __contains__(self, word):
+        return self.accepts(word)
+
+
+def default_image_file(words_file, graph_class=DAWG):
+    return os.path.splitext(words_file)[0] + graph_class.image_extension
+
+
+def compile_lexicon(words_file, image_file=None, graph_class=DAWG):
+    """Build a graph from `words_file` and save it as a lexicon image."""
+
+    dawg = graph_class.from_file(words_file)
+    dawg.save(image_file or default_image_file(words_file, graph_class))
+    return dawg
+
+
+def load_lexicon(words_file, image_file=None, graph_class=DAWG):
+    """Load the graph for `words_file`, preferring its prebuilt image.
+
+    The image is used only if its recorded checksum matches the current
+    contents of `words_file`. A missing, corrupt or stale image is rebuilt
+    from the word list and rewritten in place when the directory is writable.
+    """
+
+    digest = file_digest(words_file)
+    return load_image(
+        image_file or default_image_file(words_file, graph_class),
+        graph_class.load, lambda dawg: dawg.source_digest == digest,
+        lambda: graph_class.from_file(words_file))
+
+
+def describe_graph(dawg):
+    return "{} states, {} edges".format(len(dawg), dawg.num_edges())
+
+
+def compile_main(argv, graph_class=DAWG, describe=describe_graph):
+    """Compile the word list named by `argv` into an image of
+    `graph_class`, and report what was written.
+
+    `argv` is [program, words_file, image_file], where both files are
+    optional; `describe(lexicon)` summarizes the lexicon built.
+    """
+
+    words_file = argv[1] if len(argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'words.txt')
+    image_file = argv[2] if len(argv) > 2 else None
+    lexicon = compile_lexicon(words_file, image_file, graph_class)
+    print("Wrote {} ({})".format(
+        image_file or default_image_file(words_file, graph_class),
+        describe(lexicon)))
+
+
+def main(argv):
+    """Compile a word list into a lexicon image.
+
+    Usage: python scrabble_dawg.py [words_file [image_file]]
+    """
+
+    compile_main(argv)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,4 +1,9 @@
-import string
+import os
+import threading
+
+from anagram_index import AnagramIndex
+from scrabble_dawg import NO_STATE, index_by_letter, load_lexicon
+from scrabble_gaddag import GADDAG
 
 value_by_letter = {
     'a':1,
@@ -29,53 +34,84 @@ value_by_letter = {
     'z':10
 }
 
+WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'words.txt')
+
+class PrefixTransitions(object):
+    """Read-only view of a DAWG keyed by prefix strings
+
+    Indexing with a prefix returns the DAWG state reached by that prefix and
+    raises KeyError if no word starts with it. This keeps the old
+    `dfa.dfa[prefix]` lookups working without storing every prefix.
+    """
+
+    def __init__(self, dawg):
+        self.dawg = dawg
+
+    def __getitem__(self, prefix):
+        #   Blanks on the board are uppercase letters
+        state = self.dawg.walk(prefix.lower())
+        if state == NO_STATE:
+            raise KeyError(prefix)
+        return state
+
+    def __contains__(self, prefix):
+        return self.dawg.walk(prefix.lower()) != NO_STATE
+
 class DFA(object):
     """The DFA used for Scrabble
 
     The DFA is used to determine whether or not a word is legal in the game of
-    Scrabble.
+    Scrabble. It is backed by a minimized DAWG, so every prefix of every word
+    is a state in the graph rather than a key in a dictionary.
     """
-    def __init__(self):
-        self.dfa = self.build_dfa()
-
-    def build_dfa(self):
-        words_file = "words.txt"
-        dfa = {}
-        dfa[""] = {}
-        for letter in string.ascii_lowercase:
-            dfa[""][letter] = letter
-
-        with open(words_file, 'r') as words:
-            for word in words:
-                dfa  = self.add_word_to_dfa(dfa, word.strip())
-        return dfa
-
-    def add_word_to_dfa(self, dfa, word):
-        current_state = ""
-        for letter in word:
-            try:
-                state_transitions = dfa[current_state]
-            except KeyError:
-                dfa[current_state] = {}
-                dfa[current_state][letter] = current_state + letter
-                current_state = current_state + letter
-            else:
-                try:
-                    current_state = state_transitions[letter]
-                except KeyError:
-                    dfa[current_state][letter] = current_state + letter
-                    current_state = current_state + letter
-        try:
-            dfa[current_state]
-            dfa[current_state]['accept'] = True
-        except KeyError:
-            dfa[current_state] = {'accept':True}
-        return dfa
+    def __init__(self, words_file=WORDS_FILE):
+        self.words_file = words_file
+        self.dawg = self.build_dawg()
+        self.dfa = PrefixTransitions(self.dawg)
+        #   The GADDAG is several times larger than the DAWG and only some
+        #   move generators need it, so it is loaded on first use.
+        self.gaddag = None
+        self.load_lock = threading.Lock()
+        #   Likewise the anagram index, which only bingo lookups use
+        self.anagrams = None
+
+    def build_dawg(self):
+        """Load the DAWG from its prebuilt image, or build it from scratch."""
+
+        return load_lexicon(self.words_file)
+
+    def get_gaddag(self):
+        """Return the GADDAG for the same word list, loading it if needed."""
+
+        if self.gaddag is None:
+            with self.load_lock:
+                if self.gaddag is None:
+                    self.gaddag = load_lexicon(self.words_file,
+                                               graph_class=GADDAG)
+        return self.gaddag
+
+    def get_anagrams(self):
+        """Return the AnagramIndex of the word list, loading it if needed."""
+
+        if self.anagrams is None:
+            with self.load_lock:
+                if self.anagrams is None:
+                    self.anagrams = load_lexicon(self.words_file,
+                                                 graph_class=AnagramIndex)
+        return self.anagrams
+
+    def transition(self, state, letter):
+        """Return the state reached from `state` on `letter`, or NO_STATE."""
+
+        label = index_by_letter.get(letter.lower())
+        if label is None:
+            return NO_STATE
+        return self.dawg.next_state(state, label)
+
+    def has_prefix(self, prefix):
+        return self.dawg.has_prefix(prefix.lower())
 
     def accepts(self, word):
         #   Make sure the word is lowercase -- that is how the DFA is built
-        word = word.lower()
-        # print("Word: {}".format(word))
-        if word in self.dfa:
-            return 'accept' in self.dfa[word]
-        return False
+        return self.dawg.accepts(word.lower())
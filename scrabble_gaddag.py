@@ -0,0 +1,65 @@
+"""
+File:   scrabble_gaddag.py
+
+A GADDAG (Gordon, "A Faster Scrabble Move Generation Algorithm", 1994) used
+to generate moves outwards from an anchor in both directions.
+"""
+
+import sys
+
+from scrabble_dawg import ALPHABET, DAWG, compile_main
+
+#   Marks the switch from reading leftwards to reading rightwards. It sorts
+#   after 'z', so it gets the label following the letters.
+SEPARATOR = '{'
+SEPARATOR_LABEL = len(ALPHABET)
+
+
+class GADDAG(DAWG):
+    """A minimized GADDAG stored in the same flat arrays as a DAWG
+
+    For every word x1...xn and every split point 1 <= i <= n, the graph holds
+    the path
+
+        xi xi-1 ... x1 SEPARATOR xi+1 ... xn
+
+    (without the separator when i = n). Starting from the letter on an anchor
+    square, a move is read leftwards until the separator and then rightwards,
+    so any placement through the anchor is found from the anchor itself.
+    """
+
+    label_by_letter = dict((letter, i)
+                           for i, letter in enumerate(ALPHABET + SEPARATOR))
+    image_magic = b'SCRBGDDG'
+    image_extension = '.gaddag'
+
+    @classmethod
+    def from_words(cls, words):
+        """Build a GADDAG from an iterable of lowercase words."""
+
+        paths = []
+        for word in words:
+            if not word:
+                continue
+            paths.append(word[::-1])
+            for i in range(1, len(word)):
+                paths.append(word[i - 1::-1] + SEPARATOR + word[i:])
+        return super(GADDAG, cls).from_words(paths)
+
+    def accepts(self, word):
+        """Check whether `word` is in the lexicon."""
+
+        return super(GADDAG, self).accepts(word[::-1])
+
+
+def main(argv):
+    """Compile a word list into a GADDAG lexicon image.
+
+    Usage: python scrabble_gaddag.py [words_file [image_file]]
+    """
+
+    compile_main(argv, GADDAG)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,12 +1,13 @@
 import sys
 import time
 
+import tkSimpleDialog
 import ttk
 from Tkinter import *
 from collections import namedtuple
 
 from scrabble import ScrabbleBoard
-from tile import ScrabbleTileBag
+from tile import BLANK, ScrabbleTileBag
 from player import Player
 from scrabble_ai import ScrabbleAI
 SCORE_AREA_FONT = ("Verdana", 14, "bold")
@@ -22,6 +23,10 @@ AI_THRESHOLD = {
     2: 30,
     3: 1000
 }
+#   The longest the AI may think about a move, in milliseconds, at any
+#   difficulty. None leaves the difficulty's threshold as its only stopping
+#   rule; set a number to opt in to the time-budgeted search.
+AI_TIME_BUDGET_MS = None
 
 class ScrabbleApp(Tk):
 
@@ -209,6 +214,23 @@ class GamePageFrame(Frame):
             self.status_bar.config(
                 text="Invalid word.", fg=INVALID_COLOR)
 
+    def ask_blank_letter(self):
+        """Ask which letter a blank is played as.
+
+        Returns the letter in lowercase, which is how the GUI shows a blank,
+        or None if no letter was given.
+        """
+
+        letter = tkSimpleDialog.askstring("Blank tile",
+                                          "Play the blank as which letter?",
+                                          parent=self)
+        if letter is None or len(letter.strip()) != 1:
+            return None
+        letter = letter.strip().lower()
+        if not 'a' <= letter <= 'z':
+            return None
+        return letter
+
     def board_clicked(self, row, col):
         color = self.board.tile_label_by_coords[row, col].cget('bg').lower()
         if self.board.scrabble_board.is_available(row, col):
@@ -216,11 +238,18 @@ class GamePageFrame(Frame):
             #   placed there)
             letter = self.rack.get_selected_letter()
             if letter is not None:
+                #   Tiles are shown in uppercase and blanks in lowercase, the
+                #   other way round from the board
+                shown = letter
+                if letter == BLANK:
+                    shown = self.ask_blank_letter()
+                    if shown is None:
+                        return
                 self.board.tile_label_by_coords[row, col].configure(bg='yellow',
-                                                                    text=letter)
-                self.board.set_letter_played(row, col, letter)
+                                                                    text=shown)
+                self.board.set_letter_played(row, col, shown)
                 letters_by_coord = {
-                    coord: letter.lower()
+                    coord: letter.swapcase()
                     for coord, letter
                     in self.board.letters_played_in_hand.iteritems()
                 }
@@ -240,13 +269,15 @@ class GamePageFrame(Frame):
             removed_letter = self.board.letters_played_in_hand[row, col]
             self.board.remove_letter_at_coord(row, col)
             letters_by_coord = {
-                coord: letter.lower()
+                coord: letter.swapcase()
                 for coord, letter
                 in self.board.letters_played_in_hand.iteritems()
             }
             score = self.board.scrabble_board.get_hand_legality_by_score(
                         letters_by_coord)
             self.set_word_status(score)
+            if removed_letter.islower():
+                removed_letter = BLANK
             self.rack.return_letter(removed_letter)
 
     def place_word(self, letters_by_coord):
@@ -254,7 +285,7 @@ class GamePageFrame(Frame):
             row, col = key
             color = self.board.tile_label_by_coords[row, col].cget('bg').lower()
             self.board.tile_label_by_coords[row, col].configure(bg='yellow',
-                                                                text=value.upper())
+                                                                text=value.swapcase())
             # self.board.set_letter_played(row, col, value.upper())
             # self.board.scrabble_board.set_availability(row, col, False)
         print("Playing hand with letters_by_coord: {}".format(letters_by_coord))
@@ -263,7 +294,7 @@ class GamePageFrame(Frame):
     def human_play_hand(self):
         letters_by_coord = self.board.get_letters_by_coord()
         letters_by_coord = {
-            coord: letter.lower()
+            coord: letter.swapcase()
             for coord, letter in letters_by_coord.iteritems()
         }
         score, letters = self.board.human.play_hand(
@@ -309,7 +340,8 @@ class GameBoardFrame(Frame):
         self.scrabble_board = ScrabbleBoard()
         self.tile_bag = ScrabbleTileBag()
         self.human = Player(self.scrabble_board, self.tile_bag)
-        self.scrabble_ai = ScrabbleAI(self.scrabble_board, self.tile_bag, self.scrabble_board.dfa, 20)
+        self.scrabble_ai = ScrabbleAI(self.scrabble_board, self.tile_bag, self.scrabble_board.dfa, 20,
+                                      time_budget_ms=AI_TIME_BUDGET_MS)
         self.tile_frames = []
         self.tile_label_by_coords = {}
         self.letters_played_in_hand = {}
@@ -0,0 +1,178 @@
+"""
+File:   search_stats.py
+
+Opt-in counters and timers for the AI's move search.
+
+Nothing here runs unless a search is handed a SearchStats. The move
+generators then rebind the closures of that one search to the counting
+wrappers in this module, and the DFS search passes the stats down its
+recursive helpers and reads the lexicon through a CountingDFA. No search
+changes the board, the lexicon or any other object it shares, so a search
+without stats runs the same code it always did.
+"""
+
+import time
+
+#   The counters every SearchStats has, in the order they are reported
+COUNTERS = (
+    'nodes',                #   Search nodes expanded
+    'lookups',              #   Lexicon transitions and edge lists read
+    'accepts',              #   Word acceptance tests
+    'cross_check_hits',     #   Rack letters a cross-check let through
+    'cross_check_misses',   #   Rack letters a cross-check ruled out
+    'validator_calls',      #   Calls to get_hand_legality_by_score()
+    'moves'                 #   Legal moves found
+)
+
+
+class SearchStats(object):
+    """Counters and timers describing one or more move searches
+
+    Counters are plain attributes named in COUNTERS. `phase_seconds` maps a
+    phase name (such as 'generate' or 'select') to the time spent in it, and
+    `anchor_seconds` maps (row, col, direction) to the time spent searching
+    from that anchor. The DFS search does not search by direction, so its
+    anchors have a direction of None.
+    """
+
+    def __init__(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.phase_seconds = {}
+        self.anchor_seconds = {}
+
+    def add_time(self, phase, seconds):
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0) + seconds
+
+    def add_anchor_time(self, anchor, seconds):
+        self.anchor_seconds[anchor] = (self.anchor_seconds.get(anchor, 0)
+                                       + seconds)
+
+    def merge(self, other):
+        """Add the counts and times of another SearchStats to this one."""
+
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for phase, seconds in other.phase_seconds.items():
+            self.add_time(phase, seconds)
+        for anchor, seconds in other.anchor_seconds.items():
+            self.add_anchor_time(anchor, seconds)
+
+    def slowest_anchors(self, count=5):
+        """Get the `count` anchors that took longest, slowest first."""
+
+        return sorted(self.anchor_seconds.items(),
+                      key=lambda item: item[1], reverse=True)[:count]
+
+    def to_dict(self):
+        """Get the stats as JSON-serializable values."""
+
+        result = dict((name, getattr(self, name)) for name in COUNTERS)
+        result['phase_seconds'] = dict(
+            (phase, round(seconds, 6))
+            for phase, seconds in self.phase_seconds.items())
+        result['anchor_seconds'] = dict(
+            ('{},{},{}'.format(row, col,
+                               '' if direction is None else direction),
+             round(seconds, 6))
+            for (row, col, direction), seconds
+            in self.anchor_seconds.items())
+        return result
+
+    def __str__(self):
+        return ', '.join('{}: {}'.format(name, getattr(self, name))
+                         for name in COUNTERS)
+
+
+def count_calls(func, stats, counter):
+    """Wrap `func` to add one to `stats.<counter>` every time it is called."""
+
+    def counted(*args):
+        setattr(stats, counter, getattr(stats, counter) + 1)
+        return func(*args)
+    return counted
+
+
+def time_anchor(func, stats, anchor_of):
+    """Wrap `func` to time each call as the anchor `anchor_of(*args)`."""
+
+    def timed(*args):
+        start = time.time()
+        try:
+            return func(*args)
+        finally:
+            stats.add_anchor_time(anchor_of(*args), time.time() - start)
+    return timed
+
+
+class CountingGraph(object):
+    """A lexicon graph (DAWG or GADDAG) that counts next_state() calls"""
+
+    def __init__(self, graph, stats):
+        self.graph = graph
+        self.stats = stats
+
+    def next_state(self, state, label):
+        self.stats.lookups += 1
+        return self.graph.next_state(state, label)
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+
+class CountingAccept(object):
+    """A lexicon graph's `accept` array that counts the states tested"""
+
+    def __init__(self, accept, stats):
+        self.accept = accept
+        self.stats = stats
+
+    def __getitem__(self, state):
+        self.stats.accepts += 1
+        return self.accept[state]
+
+
+class CountingTransitions(object):
+    """A DFA's prefix transitions that count every lookup"""
+
+    def __init__(self, transitions, stats):
+        self.transitions = transitions
+        self.stats = stats
+
+    def __getitem__(self, prefix):
+        self.stats.lookups += 1
+        return self.transitions[prefix]
+
+    def __contains__(self, prefix):
+        self.stats.lookups += 1
+        return prefix in self.transitions
+
+
+class CountingDFA(object):
+    """A DFA that counts the lookups and acceptance tests made through it
+
+    The DFS search only tests whole words to check the words it forms
+    across its own, so each acceptance test is also counted as a
+    cross-check hit or miss.
+    """
+
+    def __init__(self, dfa, stats):
+        self.wrapped = dfa
+        self.stats = stats
+        self.dfa = CountingTransitions(dfa.dfa, stats)
+
+    def accepts(self, word):
+        self.stats.accepts += 1
+        accepted = self.wrapped.accepts(word)
+        if accepted:
+            self.stats.cross_check_hits += 1
+        else:
+            self.stats.cross_check_misses += 1
+        return accepted
+
+    def transition(self, state, letter):
+        self.stats.lookups += 1
+        return self.wrapped.transition(state, letter)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
@@ -0,0 +1,282 @@
+"""
+File:   self_play.py
+
+Headless AI-vs-AI games, for regression testing the AI's strength and speed.
+
+Usage: python self_play.py [--games N] [--workers N] [--seed N]
+                           [--player SPEC]... [--output FILE]
+
+Each --player SPEC configures one ScrabbleAI with comma separated key=value
+pairs, for example "threshold=30,generator=gaddag,search=best"; add
+"stats=1" to record each of that player's searches, or "budget=MS" to give
+it a time budget per move. With "search=best,leaves=1" a player picks moves
+by equity, valuing the tiles it keeps with the leave table. Games are
+written to the output as JSON Lines, one object per game, as they finish.
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+import lexicon
+from scrabble import ScrabbleBoard
+from scrabble_ai import (GENERATOR_ANCHOR, GENERATOR_DFS, GENERATOR_GADDAG,
+                         SEARCH_BEST, SEARCH_SIMULATE, SEARCH_THRESHOLD,
+                         ScrabbleAI)
+from scrabble_dfa import WORDS_FILE
+from leave_table import get_leave_table
+from tile import ScrabbleTileBag
+
+#   The AI the GUI plays against
+DEFAULT_PLAYER = {
+    'threshold': 20,
+    'generator': GENERATOR_ANCHOR,
+    'search': SEARCH_THRESHOLD,
+    'stats': 0,
+    'budget': None,
+    'leaves': 0
+}
+
+#   Accepted values of each player option, or the type to convert it to
+player_options = {
+    'threshold': int,
+    'generator': (GENERATOR_ANCHOR, GENERATOR_DFS, GENERATOR_GADDAG),
+    'search': (SEARCH_THRESHOLD, SEARCH_BEST, SEARCH_SIMULATE),
+    'stats': int,
+    'budget': int,
+    'leaves': int
+}
+
+#   The lexicon of a worker process, set up by init_worker()
+worker_state = {}
+
+
+class IllegalMoveError(ValueError):
+    """Exception that may be raised when an AI plays an illegal move
+
+    Raise this exception when the board rejects a move that an AI chose,
+    which means the AI's move generation or scoring is broken.
+    """
+    pass
+
+
+def parse_player(spec):
+    """Turn a "key=value,key=value" player spec into ScrabbleAI options."""
+
+    player = dict(DEFAULT_PLAYER)
+    for option in spec.split(','):
+        if not option.strip():
+            continue
+        key, _, value = option.partition('=')
+        key = key.strip()
+        value = value.strip()
+        if key not in player_options:
+            raise ValueError("Unknown player option '{}'".format(key))
+        accepted = player_options[key]
+        if isinstance(accepted, tuple):
+            if value not in accepted:
+                raise ValueError("'{}' must be one of: {}".format(
+                    key, ', '.join(accepted)))
+            player[key] = value
+        else:
+            player[key] = accepted(value)
+    #   ScrabbleAI would refuse this too, but only once the games had started
+    if player['budget'] is not None and player['search'] == SEARCH_SIMULATE:
+        raise ValueError("'budget' cannot be combined with search={}".format(
+            SEARCH_SIMULATE))
+    return player
+
+
+def play_game(players, seed, dfa=None, max_turns=None, profile_dir=None):
+    """Play one game between ScrabbleAIs and return its record.
+
+    Arguments:
+    players -- ScrabbleAI options for each player, in turn order
+    seed -- Seeds the tile bag, so a game can be replayed exactly
+
+    Keyword Arguments:
+    dfa -- The lexicon to play with. Defaults to the shared one.
+    max_turns -- Stop the game after this many turns, if it is still going
+    profile_dir -- Directory to dump a cProfile profile of every move to
+
+    Players with the 'stats' option set have their SearchStats recorded
+    with each of their moves.
+
+    The game ends when the bag is empty and a player has played out their
+    rack, or when every player has gone twice in a row without scoring.
+    """
+
+    if dfa is None:
+        dfa = lexicon.get_lexicon()
+    start = time.time()
+    board = ScrabbleBoard(dfa)
+    tile_bag = ScrabbleTileBag(seed)
+    ais = [ScrabbleAI(board, tile_bag, None, player['threshold'],
+                      generator=player['generator'], search=player['search'],
+                      verbose=False, collect_stats=bool(player['stats']),
+                      profile_dir=profile_dir,
+                      time_budget_ms=player['budget'],
+                      leaves=get_leave_table() if player['leaves'] else None)
+           for player in players]
+
+    moves = []
+    scoreless_turns = 0
+    turn = 0
+    while scoreless_turns < 2 * len(ais):
+        if max_turns is not None and turn >= max_turns:
+            break
+        player = turn % len(ais)
+        ai = ais[player]
+        move_start = time.time()
+        word, stats = ai.play_hand_with_stats()
+        seconds = time.time() - move_start
+        letters_by_coord = word.get_letters_by_coord()
+        if letters_by_coord:
+            score = board.play_hand(letters_by_coord)
+            if score != word.get_score():
+                raise IllegalMoveError(
+                    "Player {} played {} for {} but the board scored {}"
+                    .format(player, word.get_word(), word.get_score(), score))
+        move = {
+            'player': player,
+            'word': word.get_word(),
+            'score': word.get_score(),
+            'tiles': [[row, col, letter] for (row, col), letter
+                      in sorted(letters_by_coord.items())],
+            'ms': round(seconds * 1e3, 3)
+        }
+        if stats is not None:
+            move['stats'] = stats.to_dict()
+        moves.append(move)
+        turn += 1
+        scoreless_turns = 0 if word.get_score() else scoreless_turns + 1
+        if not ai.tiles and tile_bag.num_tiles == 0:
+            break
+
+    for ai in ais:
+        ai.close()
+    scores = [ai.get_score() for ai in ais]
+    best = max(scores)
+    return {
+        'seed': seed,
+        'players': players,
+        'scores': scores,
+        'winner': scores.index(best) if scores.count(best) == 1 else None,
+        'racks': [''.join(ai.get_letters()) for ai in ais],
+        'turns': turn,
+        'seconds': round(time.time() - start, 4),
+        'moves': moves
+    }
+
+
+def init_worker(words_file, profile_dir=None):
+    """Load the lexicon of a worker process."""
+
+    worker_state['dfa'] = lexicon.get_lexicon(words_file)
+    worker_state['profile_dir'] = profile_dir
+
+
+def play_task(task):
+    """Play one game in a worker process.
+
+    `task` is (game, players, seed, max_turns); the game's record is
+    returned with its number added.
+    """
+
+    game, players, seed, max_turns = task
+    record = play_game(players, seed, worker_state['dfa'], max_turns,
+                       worker_state['profile_dir'])
+    record['game'] = game
+    return record
+
+
+def play_games(players, games, seed=0, workers=1, words_file=WORDS_FILE,
+               max_turns=None, profile_dir=None):
+    """Play `games` games and yield each game's record as it finishes.
+
+    Game i is seeded with `seed` + i, and the turn order is rotated every
+    game so no player always goes first. With more than one worker, games are
+    played in a process pool and come out in the order they finish.
+    """
+
+    tasks = [(game, players[game % len(players):]
+              + players[:game % len(players)], seed + game, max_turns)
+             for game in range(games)]
+    #   Load the lexicon before any pool forks, so the workers inherit it
+    init_worker(words_file, profile_dir)
+    if workers <= 1:
+        for task in tasks:
+            yield play_task(task)
+        return
+    pool = multiprocessing.Pool(workers, init_worker,
+                                (words_file, profile_dir))
+    try:
+        for record in pool.imap_unordered(play_task, tasks):
+            yield record
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Play headless games between AI players.")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--workers', type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=None)
+    parser.add_argument('--player', action='append', default=[],
+                        help="player options, e.g. threshold=30,search=best "
+                             "(give once per player; defaults to two of the "
+                             "GUI's AI)")
+    parser.add_argument('--words', default=WORDS_FILE,
+                        help="word list to play with")
+    parser.add_argument('--output', default='-',
+                        help="JSON Lines file to write (default: stdout)")
+    parser.add_argument('--profile-dir', default=None,
+                        help="dump a cProfile profile of every move here")
+    args = parser.parse_args(argv)
+
+    try:
+        players = [parse_player(spec) for spec in args.player]
+    except ValueError as e:
+        parser.error(str(e))
+    while len(players) < 2:
+        players.append(dict(DEFAULT_PLAYER))
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    wins = [0] * len(players)
+    totals = [0] * len(players)
+    start = time.time()
+    try:
+        for record in play_games(players, args.games, args.seed,
+                                 args.workers, args.words,
+                                 max_turns=args.max_turns,
+                                 profile_dir=args.profile_dir):
+            output.write(json.dumps(record, sort_keys=True) + '\n')
+            output.flush()
+            #   Turn order rotates, so map seats back to the player specs
+            shift = record['game'] % len(players)
+            for seat, score in enumerate(record['scores']):
+                player = (seat + shift) % len(players)
+                totals[player] += score
+                if record['winner'] == seat:
+                    wins[player] += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.time() - start
+    for player, spec in enumerate(players):
+        sys.stderr.write("player {} {}: {} wins, mean score {:.1f}\n".format(
+            player, json.dumps(spec, sort_keys=True), wins[player],
+            float(totals[player]) / max(args.games, 1)))
+    sys.stderr.write("{} games in {:.1f} s ({:.2f} games/sec)\n".format(
+        args.games, elapsed, args.games / elapsed if elapsed else 0.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+File:   simulation.py
+
+Monte Carlo move selection: candidate moves are compared by playing each one
+out a few plies against sampled opponent racks.
+"""
+
+import multiprocessing
+import random
+
+import lexicon
+from move_generator import MoveGenerator
+from move_ranking import top_moves
+from scrabble import ScrabbleBoard
+from scrabble_dfa import WORDS_FILE
+from tile import ScrabbleTileBag, tile_letter, unseen_counts
+
+#   Tiles on a full rack
+RACK_SIZE = 7
+#   Rollouts of one candidate handed to a worker at a time
+ROLLOUTS_PER_TASK = 8
+
+#   The board and move generator of a worker process, set up by init_worker()
+worker_state = {}
+#   Default rollouts of each candidate, and turns played in each. A rollout
+#   costs a move generation per ply, so with ScrabbleAI's four candidates
+#   these keep a move to about a second under Python 2.
+DEFAULT_ITERATIONS = 8
+DEFAULT_PLIES = 1
+
+
+def unseen_letters(board, rack):
+    """Get the letters of the tiles a player cannot see.
+
+    These are the tiles in the bag and on the opponents' racks: every tile
+    of the game, less those on the board and on the player's own rack.
+    """
+
+    counts = unseen_counts([chr(code) for code in board.core.letters if code],
+                           rack)
+    return [letter for letter in sorted(counts)
+            for _ in range(max(counts[letter], 0))]
+
+
+def remove_letters(rack, letters):
+    """Take the tiles played as `letters` off `rack`, a list of letters."""
+
+    for letter in letters:
+        rack.remove(tile_letter(letter))
+
+
+def rollout(board, generator, candidate, rack, unseen, plies, rnd):
+    """Play `candidate` out and return the spread it leads to.
+
+    The opponent's rack is drawn at random from `unseen`, and both sides
+    refill from what is left, then take turns playing their top scoring
+    move for `plies` more turns, starting with the opponent. The spread is
+    the candidate's player's points less the opponent's. Every move is
+    made with ScrabbleBoard.make_move() and unmade again before returning,
+    so `board` is left as it was.
+    """
+
+    bag = ScrabbleTileBag(rnd=rnd, letters=unseen)
+    racks = [list(rack), bag.draw_letters(RACK_SIZE)]
+
+    letters_by_coord = candidate.get_letters_by_coord()
+    undos = [board.make_move(letters_by_coord)]
+    spread = candidate.get_score()
+    remove_letters(racks[0], letters_by_coord.values())
+    racks[0] += bag.draw_letters(RACK_SIZE - len(racks[0]))
+
+    for ply in range(plies):
+        player = (ply + 1) % 2
+        best = top_moves(generator.generate(racks[player]), 1)
+        if not best:
+            continue
+        word = best[0]
+        letters_by_coord = word.get_letters_by_coord()
+        undos.append(board.make_move(letters_by_coord))
+        spread += word.get_score() if player == 0 else -word.get_score()
+        remove_letters(racks[player], letters_by_coord.values())
+        racks[player] += bag.draw_letters(RACK_SIZE - len(racks[player]))
+
+    for undo in reversed(undos):
+        board.unmake_move(undo)
+    return spread
+
+
+def rollout_state(words_file):
+    """Make the board and move generator that rollouts are played with,
+    as a dict for run_rollouts()."""
+
+    dfa = lexicon.get_lexicon(words_file)
+    board = ScrabbleBoard(dfa)
+    return {
+        'board': board,
+        'position': board.get_position(),
+        'generator': MoveGenerator(board, dfa)
+    }
+
+
+def init_worker(words_file):
+    """Set up a worker process's board and move generator."""
+
+    worker_state.update(rollout_state(words_file))
+
+
+def simulate_task(task):
+    """Run a batch of rollouts of one candidate in a worker process."""
+
+    return run_rollouts(task, worker_state)
+
+
+def run_rollouts(task, state):
+    """Run a batch of rollouts of one candidate with `state`, from
+    rollout_state().
+
+    `task` is (position, candidate index, candidate, rack, unseen, plies,
+    seed, rollouts). Returns (candidate index, total spread, rollouts).
+    """
+
+    (position, index, candidate, rack, unseen, plies,
+     seed, rollouts) = task
+    board = state['board']
+    if position != state['position']:
+        board.set_position(position)
+        state['position'] = position
+    generator = state['generator']
+    rnd = random.Random(seed)
+    total = 0
+    for _ in range(rollouts):
+        total += rollout(board, generator, candidate, rack, unseen, plies,
+                         rnd)
+    return index, total, rollouts
+
+
+class Simulator(object):
+    """Ranks candidate moves by the mean spread of simulated continuations
+
+    Each candidate is played out `iterations` times. Batches of rollouts
+    are seeded by their place in the sequence rather than by candidate, so
+    every candidate faces the same sampled opponent racks and draws, and
+    their differences are not drowned out by the luck of the draw.
+
+    With one worker the rollouts run in this process, on a board of the
+    Simulator's own. With more they run in a process pool. The pool
+    forks after the lexicon is loaded, so the workers share its pages
+    copy-on-write, and each task carries only the board's compact position.
+    A worker only sets its board up from the position when it differs from
+    the last one it simulated, and plays every rollout on that board with
+    make_move() and unmake_move(), so no rollout copies or rebuilds a
+    board.
+    """
+
+    def __init__(self, workers=1, iterations=DEFAULT_ITERATIONS,
+                 plies=DEFAULT_PLIES, words_file=WORDS_FILE, seed=0):
+        """
+        Keyword Arguments:
+        workers -- Number of worker processes; 1 simulates in this process
+        iterations -- Rollouts of every candidate
+        plies -- Turns played after the candidate in each rollout
+        words_file -- The word list of the lexicon, as in get_lexicon()
+        seed -- Seeds the first simulation; later ones continue from it
+        """
+
+        self.workers = workers
+        self.iterations = iterations
+        self.plies = plies
+        self.rnd = random.Random(seed)
+        lexicon.get_lexicon(words_file)
+        self.pool = None
+        #   The rollouts' board and generator, when they run in this process
+        self.state = None
+        if workers > 1:
+            self.pool = multiprocessing.Pool(workers, init_worker,
+                                             (words_file,))
+        else:
+            self.state = rollout_state(words_file)
+
+    def tasks(self, board, rack, candidates):
+        """Split the rollouts of every candidate into worker tasks."""
+
+        position = board.get_position()
+        unseen = unseen_letters(board, rack)
+        rack = list(rack)
+        seeds = [self.rnd.getrandbits(32)
+                 for _ in range(0, self.iterations, ROLLOUTS_PER_TASK)]
+        tasks = []
+        for index, candidate in enumerate(candidates):
+            for batch, seed in enumerate(seeds):
+                rollouts = min(ROLLOUTS_PER_TASK,
+                               self.iterations - batch * ROLLOUTS_PER_TASK)
+                tasks.append((position, index, candidate, rack, unseen,
+                              self.plies, seed, rollouts))
+        return tasks
+
+    def simulate(self, board, rack, candidates):
+        """Return (mean spread, word) for every candidate, best first.
+
+        `candidates` are Words playable on `board` with `rack`.
+        """
+
+        if not candidates:
+            return []
+        tasks = self.tasks(board, rack, candidates)
+        if self.pool is not None:
+            results = self.pool.imap_unordered(simulate_task, tasks)
+        else:
+            results = (run_rollouts(task, self.state) for task in tasks)
+        totals = [0] * len(candidates)
+        counts = [0] * len(candidates)
+        for index, total, rollouts in results:
+            totals[index] += total
+            counts[index] += rollouts
+        ranking = [(float(totals[index]) / counts[index], index)
+                   for index in range(len(candidates))]
+        #   Ties go to the candidate ranked higher going in
+        ranking.sort(key=lambda entry: (-entry[0], entry[1]))
+        return [(spread, candidates[index]) for spread, index in ranking]
+
+    def close(self):
+        """Shut the worker processes down."""
+
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
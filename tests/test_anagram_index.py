@@ -0,0 +1,58 @@
+"""
+File:   test_anagram_index.py
+
+Lookups in the anagram index, with and without blanks.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from itertools import combinations_with_replacement
+
+from anagram_index import AnagramIndex
+from scrabble_dawg import ALPHABET
+
+WORDS = ['ab', 'ba', 'bad', 'dab', 'cab', 'abed', 'bead', 'bade', 'zebra',
+         'braze', 'ooze', 'zoo', 'a', 'aa', 'qi']
+
+
+class AnagramIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = AnagramIndex.from_words(WORDS)
+
+    def test_words(self):
+        self.assertEqual(sorted(self.index.words('dba')), ['bad', 'dab'])
+        self.assertEqual(self.index.words('xyz'), [])
+
+    def test_blank_words_match_every_fill(self):
+        rnd = random.Random(0)
+        for _ in range(200):
+            letters = [rnd.choice('abdeoqrz') for _ in range(rnd.randint(0, 4))]
+            for blanks in range(3):
+                expected = []
+                for fill in combinations_with_replacement(ALPHABET, blanks):
+                    words = self.index.words(letters + list(fill))
+                    if words:
+                        expected.append((''.join(fill), words))
+                self.assertEqual(self.index.blank_words(letters, blanks),
+                                 expected)
+
+    def test_saved_image(self):
+        image_dir = tempfile.mkdtemp()
+        try:
+            image_file = os.path.join(image_dir, 'words.anagrams')
+            self.index.save(image_file)
+            index = AnagramIndex.load(image_file)
+            self.assertEqual(sorted(index.words('abde')),
+                             ['abed', 'bade', 'bead'])
+            self.assertEqual(index.blank_words(['z', 'o'], 2),
+                             self.index.blank_words(['z', 'o'], 2))
+        finally:
+            shutil.rmtree(image_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
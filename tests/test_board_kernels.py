@@ -0,0 +1,70 @@
+"""
+File:   test_board_kernels.py
+
+The whole-board kernels, with and without NumPy, against the square by
+square code they stand in for.
+"""
+
+import unittest
+
+from benchmark import load_corpus
+from board_core import BOARD_SIZE
+from board_kernels import HAVE_NUMPY, cross_tables, move_direction, score_moves
+from cross_checks import ACROSS, DOWN
+from move_generator import MoveGenerator
+from scrabble import ScrabbleBoard
+
+#   An early and a late corpus position
+POSITIONS = ['seed0-move4', 'seed1-move32']
+RACK = list('etaoin ')
+
+
+class BoardKernelsTest(unittest.TestCase):
+
+    def setUp(self):
+        position_by_name = dict((name, position) for name, position, _
+                                in load_corpus())
+        self.boards = []
+        for name in POSITIONS:
+            board = ScrabbleBoard()
+            board.set_position(position_by_name[name])
+            self.boards.append(board)
+
+    def assert_scores(self, use_numpy):
+        for board in self.boards:
+            words = MoveGenerator(board, memo_lines=False).generate(RACK)
+            moves = [(word.get_letters_by_coord(),
+                      move_direction(board, word.get_letters_by_coord()))
+                     for word in words]
+            self.assertEqual(score_moves(board, moves, use_numpy),
+                             [word.get_score() for word in words])
+
+    def assert_cross_tables(self, use_numpy):
+        for board in self.boards:
+            table = board.cross_checks
+            for direction in (ACROSS, DOWN):
+                masks, scores = cross_tables(board, direction,
+                                             table.compute_mask, use_numpy)
+                for row in range(BOARD_SIZE):
+                    for col in range(BOARD_SIZE):
+                        table.refresh_square(row, col, direction)
+                self.assertEqual(list(masks), list(table.masks[direction]))
+                self.assertEqual(list(scores), list(table.scores[direction]))
+
+    def test_score_moves_python(self):
+        self.assert_scores(False)
+
+    @unittest.skipUnless(HAVE_NUMPY, "NumPy is not installed")
+    def test_score_moves_numpy(self):
+        self.assert_scores(True)
+
+    def test_cross_tables_python(self):
+        self.assert_cross_tables(False)
+
+    @unittest.skipUnless(HAVE_NUMPY, "NumPy is not installed")
+    def test_cross_tables_numpy(self):
+        self.assert_cross_tables(True)
+
+
+if __name__ == '__main__':
+    unittest.main()
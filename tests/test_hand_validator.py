@@ -0,0 +1,69 @@
+"""
+File:   test_hand_validator.py
+
+Batch validation of hands against validating them one at a time.
+"""
+
+import unittest
+
+from benchmark import load_corpus
+from board_core import BOARD_SIZE
+from board_kernels import move_direction
+from hand_validator import HandValidator
+from move_generator import MoveGenerator
+from scrabble import ScrabbleBoard
+
+
+def shifted(letters_by_coord, rows, cols):
+    return dict(((row + rows, col + cols), letter)
+                for (row, col), letter in letters_by_coord.items())
+
+
+class HandValidatorTest(unittest.TestCase):
+
+    def corpus_hands(self):
+        """Yield (board, hands) for every corpus position, the hands being
+        the moves found there and those moves shifted a square, most of
+        them illegal."""
+
+        for _, position, rack in load_corpus():
+            board = ScrabbleBoard()
+            board.set_position(position)
+            moves = [word.get_letters_by_coord() for word
+                     in MoveGenerator(board, memo_lines=False).generate(rack)]
+            hands = list(moves)
+            for letters_by_coord in moves:
+                for rows, cols in ((0, 1), (1, 0)):
+                    hand = shifted(letters_by_coord, rows, cols)
+                    if all(row < BOARD_SIZE and col < BOARD_SIZE
+                           and not board.core.is_occupied(row, col)
+                           for row, col in hand):
+                        hands.append(hand)
+            yield board, hands
+
+    def test_batch_matches_single(self):
+        both_ways = 0
+        for board, hands in self.corpus_hands():
+            validator = HandValidator(board)
+            batch = board.get_hands_legality_by_score(hands)
+            for letters_by_coord, score in zip(hands, batch):
+                self.assertEqual(
+                    score, board.get_hand_legality_by_score(letters_by_coord))
+                if not score:
+                    continue
+                self.assertEqual(validator.direction(letters_by_coord),
+                                 move_direction(board, letters_by_coord))
+                if len(letters_by_coord) == 1:
+                    (row, col), = letters_by_coord
+                    core = board.core
+                    if ((core.run_left(row, col) or core.run_right(row, col))
+                            and (core.run_up(row, col)
+                                 or core.run_down(row, col))):
+                        both_ways += 1
+        #   Single tiles joining words both ways are where the rules of
+        #   the two paths could differ
+        self.assertGreater(both_ways, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
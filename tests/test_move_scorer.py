@@ -0,0 +1,46 @@
+"""
+File:   test_move_scorer.py
+
+The incremental scores of generated moves against the board's validator.
+"""
+
+import random
+import unittest
+
+from move_generator import GaddagMoveGenerator, MoveGenerator
+from scrabble import ScrabbleBoard
+from tile import num_tiles_by_letter
+
+#   Every tile of the bag, blanks included, to draw test racks from
+BAG_LETTERS = ''.join(sorted(letter * count for letter, count
+                             in num_tiles_by_letter.items()))
+
+
+class MoveScorerTest(unittest.TestCase):
+
+    def assert_scores_match(self, board, generator, rack):
+        """Check every move `generator` finds with `rack` scores what the
+        validator gives it."""
+
+        for word in generator.generate(rack):
+            expected = board.get_hand_legality_by_score(
+                word.get_letters_by_coord())
+            self.assertEqual(word.get_score(), expected,
+                             "{} scored {}, validator {}".format(
+                                 word.get_word(), word.get_score(), expected))
+
+    def test_generated_scores_match_validator(self):
+        rnd = random.Random(0)
+        board = ScrabbleBoard()
+        generators = [MoveGenerator(board), GaddagMoveGenerator(board)]
+        for _ in range(20):
+            rack = [rnd.choice(BAG_LETTERS) for _ in range(7)]
+            for generator in generators:
+                self.assert_scores_match(board, generator, rack)
+            moves = generators[0].generate(rack)
+            if moves:
+                board.play_hand(rnd.choice(moves).get_letters_by_coord())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+File:   test_position_cache.py
+
+Eviction from the position cache by entries and by size.
+"""
+
+import unittest
+
+from move_generator import MoveGenerator
+from position_cache import PositionCache
+from scrabble import ScrabbleBoard
+
+
+class PositionCacheTest(unittest.TestCase):
+
+    def test_evicts_beyond_max_entries(self):
+        cache = PositionCache(max_entries=2)
+        for key in 'abc':
+            cache.put(key, key)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_evicts_beyond_max_size(self):
+        cache = PositionCache(max_entries=10, max_size=10)
+        cache.put('a', 'a', 4)
+        cache.put('b', 'b', 4)
+        cache.get('a')
+        cache.put('c', 'c', 4)
+        #   'b' was the least recently used
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.size, 8)
+        cache.put('a', 'a', 6)
+        self.assertEqual(cache.size, 10)
+        self.assertEqual(sorted(cache.entries), ['a', 'c'])
+
+    def test_skips_entries_over_max_size(self):
+        cache = PositionCache(max_size=10)
+        cache.put('a', 'a', 4)
+        cache.put('b', 'b', 11)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(cache.size, 4)
+
+    def test_clear_resets_size(self):
+        cache = PositionCache(max_size=10)
+        cache.put('a', 'a', 4)
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(cache.invalidations, 1)
+
+    def test_board_cache_bounded_by_moves(self):
+        board = ScrabbleBoard()
+        board.position_cache = PositionCache(max_size=25000)
+        generator = MoveGenerator(board, memo_lines=False)
+        racks = [list('aeinst '), list('etaoin '), list('rstlne '),
+                 list('qzxjk  ')]
+        for rack in racks:
+            moves = generator.cached_moves(rack)
+            self.assertLessEqual(board.position_cache.size, 25000)
+            self.assertEqual(
+                sum(len(moves) for moves, _
+                    in board.position_cache.entries.values()),
+                board.position_cache.size)
+        self.assertGreater(board.position_cache.evictions, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+File:   test_scrabble_ai.py
+
+The AI's searches under a time budget.
+"""
+
+import time
+import unittest
+
+from benchmark import load_corpus
+from scrabble import ScrabbleBoard
+from scrabble_ai import (GENERATOR_ANCHOR, GENERATOR_DFS, GENERATOR_GADDAG,
+                         SEARCH_BEST, SEARCH_THRESHOLD, ScrabbleAI)
+from tile import ScrabbleTileBag
+
+#   A late corpus position, where a rack with both blanks has many moves
+POSITION = 'seed1-move32'
+BLANK_RACK = ['o', 'e', 'o', 'z', 'r', ' ', ' ']
+#   Racks with blanks, whose bingo lookups are the slowest
+BLANK_RACKS = [BLANK_RACK, list('aeinr  '), list('etaoin ')]
+BUDGET_MS = 20
+#   Time a search may take beyond its budget and its longest anchor, for
+#   the work between anchors and a slow machine
+SLACK_MS = 30
+
+
+class TimeBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        position = dict((name, position) for name, position, _
+                        in load_corpus())[POSITION]
+        self.board = ScrabbleBoard()
+        self.board.set_position(position)
+
+    def make_ai(self, generator, search, time_budget_ms):
+        return ScrabbleAI(self.board, ScrabbleTileBag(0), None, 1000,
+                          generator=generator, search=search, verbose=False,
+                          collect_stats=True, time_budget_ms=time_budget_ms)
+
+    def test_move_found_after_deadline(self):
+        for generator in (GENERATOR_ANCHOR, GENERATOR_GADDAG, GENERATOR_DFS):
+            for search in (SEARCH_THRESHOLD, SEARCH_BEST):
+                #   The deadline has passed before the search starts
+                ai = self.make_ai(generator, search, 0)
+                word = ai.choose_word(BLANK_RACK)
+                self.assertTrue(word.get_word(), "{}/{} passed".format(
+                    generator, search))
+                self.assertEqual(self.board.get_hand_legality_by_score(
+                    word.get_letters_by_coord()), word.get_score())
+
+    def test_budget_includes_bingos(self):
+        #   The budget is only checked between anchors, so a search may
+        #   overrun it by one anchor, but no more
+        for generator in (GENERATOR_ANCHOR, GENERATOR_GADDAG, GENERATOR_DFS):
+            ai = self.make_ai(generator, SEARCH_BEST, BUDGET_MS)
+            #   Load the lexicon images before timing
+            ai.choose_word(BLANK_RACK)
+            for rack in BLANK_RACKS:
+                start = time.time()
+                ai.choose_word(rack)
+                elapsed_ms = (time.time() - start) * 1000
+                longest_anchor_ms = 1000 * max(
+                    ai.last_stats.anchor_seconds.values())
+                self.assertLessEqual(
+                    elapsed_ms, BUDGET_MS + longest_anchor_ms + SLACK_MS,
+                    "{} took {:.1f}ms with {!r}".format(
+                        generator, elapsed_ms, ''.join(rack)))
+
+
+if __name__ == '__main__':
+    unittest.main()
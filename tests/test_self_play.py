@@ -0,0 +1,30 @@
+"""
+File:   test_self_play.py
+
+Parsing of self-play player specs.
+"""
+
+import unittest
+
+from scrabble_ai import SEARCH_BEST
+from self_play import parse_player
+
+
+class ParsePlayerTest(unittest.TestCase):
+
+    def test_options(self):
+        player = parse_player('threshold=30, search=best,budget=50')
+        self.assertEqual(player['threshold'], 30)
+        self.assertEqual(player['search'], SEARCH_BEST)
+        self.assertEqual(player['budget'], 50)
+
+    def test_unknown_option(self):
+        self.assertRaises(ValueError, parse_player, 'speed=3')
+
+    def test_budget_with_simulation(self):
+        self.assertRaises(ValueError, parse_player,
+                          'search=simulate,budget=50')
+
+
+if __name__ == '__main__':
+    unittest.main()
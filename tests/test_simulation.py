@@ -0,0 +1,54 @@
+"""
+File:   test_simulation.py
+
+Monte Carlo simulation in a single process.
+"""
+
+import unittest
+
+import simulation
+from move_generator import MoveGenerator
+from move_ranking import top_moves
+from scrabble import ScrabbleBoard
+from simulation import Simulator
+
+RACK = list('retains')
+
+
+class SimulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.board = ScrabbleBoard()
+        self.board.play_hand({(7, 5): 'q', (7, 6): 'a', (7, 7): 't'})
+        self.candidates = top_moves(MoveGenerator(self.board).generate(RACK),
+                                    3)
+
+    def test_ranks_every_candidate(self):
+        position = self.board.get_position()
+        with Simulator(iterations=4) as simulator:
+            ranking = simulator.simulate(self.board, RACK, self.candidates)
+        self.assertEqual(sorted(id(word) for _, word in ranking),
+                         sorted(id(word) for word in self.candidates))
+        spreads = [spread for spread, _ in ranking]
+        self.assertEqual(spreads, sorted(spreads, reverse=True))
+        self.assertEqual(self.board.get_position(), position)
+
+    def test_single_worker_keeps_its_own_state(self):
+        simulation.worker_state.clear()
+        with Simulator(iterations=4) as simulator:
+            simulator.simulate(self.board, RACK, self.candidates)
+            self.assertIsNot(simulator.state['board'], self.board)
+        self.assertEqual(simulation.worker_state, {})
+
+    def test_same_seed_same_ranking(self):
+        rankings = []
+        for _ in range(2):
+            with Simulator(iterations=4, seed=1) as simulator:
+                rankings.append([
+                    (spread, word.get_word()) for spread, word
+                    in simulator.simulate(self.board, RACK, self.candidates)])
+        self.assertEqual(rankings[0], rankings[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
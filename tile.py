@@ -4,6 +4,11 @@ File:   tile.py
 """
 
 import random
+import string
+
+#   The letter of a blank tile on a rack. Once played, a blank is stored as
+#   the letter it stands for in uppercase.
+BLANK = ' '
 
 value_by_letter = {
     'a':1,
@@ -34,13 +39,22 @@ value_by_letter = {
     'z':10,
     ' ':0
 }
+#   A blank scores nothing, whatever letter it is played as
+for letter in string.ascii_lowercase:
+    value_by_letter[letter.upper()] = 0
+
+#   Face value of each letter, indexed by the letter's character code, for
+#   scoring letters stored as bytes
+value_by_code = [0] * 256
+for letter, value in value_by_letter.items():
+    value_by_code[ord(letter)] = value
 
 num_tiles_by_letter = {
-    'a':10,
+    'a':9,
     'b':2,
     'c':2,
     'd':4,
-    'e':13,
+    'e':12,
     'f':2,
     'g':3,
     'h':2,
@@ -62,7 +76,7 @@ num_tiles_by_letter = {
     'x':1,
     'y':2,
     'z':1,
-    ' ':0   # Blank tiles will not be used.
+    ' ':2
 }
 
 class ExchangeTileError(ValueError):
@@ -81,29 +95,94 @@ class OutOfTilesError(ValueError):
     """
     pass
 
+def tile_letter(letter):
+    """Get the rack letter of the tile played as `letter`.
+
+    This is `letter` itself, or BLANK for a blank played as an uppercase
+    letter.
+    """
+
+    return BLANK if letter.isupper() else letter
+
+
+def unseen_counts(board_letters, rack):
+    """Count the tiles a player cannot see, by letter.
+
+    These are the tiles in the bag and on the opponents' racks: every tile
+    of the game, less those on the board (`board_letters`) and on the
+    player's own `rack`.
+    """
+
+    counts = dict(num_tiles_by_letter)
+    for letter in board_letters:
+        counts[tile_letter(letter)] -= 1
+    for letter in rack:
+        counts[letter] -= 1
+    return counts
+
+
 class ScrabbleTileBag(object):
-    """A bag of Tile objects"""
+    """A bag of Tile objects
+
+    The bag is a multiset: `count_by_letter` holds the number of tiles of
+    each letter left, and `bag` holds the tiles themselves in no particular
+    order. A tile is drawn by swapping a randomly chosen tile with the last
+    one and popping it, so every draw is O(1) and no shuffling is needed.
 
-    def __init__(self):
-        bag = []
-        for letter, num_tiles in num_tiles_by_letter.iteritems():
-            for _ in range(num_tiles):
-                bag.append(ScrabbleTile(letter))
-        random.shuffle(bag)
-        self.bag = bag
-        self.num_tiles = 100
+    Draws come from the bag's own random.Random stream, so two bags made
+    with the same seed deal the same tiles, whatever else uses `random`.
+    """
+
+    def __init__(self, seed=None, rnd=None, letters=None):
+        """
+        Keyword Arguments:
+        seed -- Seeds the bag's random stream. Defaults to an unpredictable
+            seed.
+        rnd -- A random.Random to draw with instead, such as one shared
+            with a simulation
+        letters -- The letters of the tiles to fill the bag with. Defaults
+            to a full set of tiles.
+        """
+
+        self.rnd = rnd if rnd is not None else random.Random(seed)
+        if letters is None:
+            #   Letters in sorted order, so a seed deals the same tiles
+            #   under every Python version
+            letters = [letter for letter in sorted(num_tiles_by_letter)
+                       for _ in range(num_tiles_by_letter[letter])]
+        self.count_by_letter = dict.fromkeys(num_tiles_by_letter, 0)
+        for letter in letters:
+            self.count_by_letter[letter] += 1
+        self.bag = [ScrabbleTile(letter) for letter in letters]
+
+    @property
+    def num_tiles(self):
+        return len(self.bag)
+
+    def draw_tile(self):
+        """Take one random tile out of the bag."""
+
+        bag = self.bag
+        idx = int(self.rnd.random() * len(bag))
+        tile = bag[idx]
+        bag[idx] = bag[-1]
+        bag.pop()
+        self.count_by_letter[tile.letter] -= 1
+        return tile
 
     def draw_tiles(self, amount):
-        if self.num_tiles == 0:
+        if not self.bag:
             raise OutOfTilesError("No tiles left")
-        tiles = []
-        for _ in range(amount):
-            if self.num_tiles == 0:
-                return tiles
-            idx = random.randint(0, self.num_tiles - 1)
-            tiles.append(self.bag.pop(idx))
-            self.num_tiles -= 1
-        return tiles
+        return [self.draw_tile() for _ in range(min(amount, len(self.bag)))]
+
+    def draw_letters(self, amount):
+        """Draw up to `amount` tiles and return their letters.
+
+        Unlike draw_tiles(), an empty bag just gives no letters.
+        """
+
+        return [self.draw_tile().letter
+                for _ in range(min(amount, len(self.bag)))]
 
     def exchange_tiles(self, tiles_to_discard):
         if len(tiles_to_discard) > self.num_tiles:
@@ -112,22 +191,52 @@ class ScrabbleTileBag(object):
                              + " cannot be greater than "
                              + "'num_tiles': {}".format(self.num_tiles)))
         else:
-            new_tiles = draw_tiles(len(tiles_to_discard))
-            self.bag = self.bag + tiles_to_discard
-            random.shuffle(self.bag)
+            #   Draw before the discards go back, so none are drawn again
+            new_tiles = self.draw_tiles(len(tiles_to_discard))
+            for tile in tiles_to_discard:
+                self.bag.append(tile)
+                self.count_by_letter[tile.letter] += 1
             return new_tiles
-    
+
+    def letters(self):
+        """Get the letters of the tiles left in the bag, sorted."""
+
+        return [letter for letter in sorted(self.count_by_letter)
+                for _ in range(self.count_by_letter[letter])]
+
 class ScrabbleTile(object):
     """Represents a Scrabble tile
 
     Tile is a class representing a Scrabble tile with very limited
     functionality, i.e. getting the value of and/or the letter on
     the tile.
+
+    Tiles are immutable and there is only one tile per letter:
+    ScrabbleTile(letter) always returns the same shared object, so a tile bag
+    holds 100 references to at most 27 tiles.
     """
 
-    def __init__(self, letter=None):
-        self.letter = letter
-        self.value = value_by_letter[letter]
+    __slots__ = ('letter', 'value')
+
+    #   The shared tile of each letter
+    tile_by_letter = {}
+
+    def __new__(cls, letter=None):
+        try:
+            return cls.tile_by_letter[letter]
+        except KeyError:
+            pass
+        tile = object.__new__(cls)
+        object.__setattr__(tile, 'letter', letter)
+        object.__setattr__(tile, 'value', value_by_letter[letter])
+        cls.tile_by_letter[letter] = tile
+        return tile
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ScrabbleTile is immutable")
+
+    def __reduce__(self):
+        return (ScrabbleTile, (self.letter,))
 
     def __str__(self):
         return "Letter {}; {} points".format(self.letter, self.value)
@@ -1,12 +1,20 @@
-class Word:
+class Word(object):
     """A logically dumb property bag for a word.
 
     This class can be used to hold useful information about a word that
     could potentially be used on a Scrabble board. Operator overloads are also
     provided for easy comparison between two word objects, based on each
     object's score.
+
+    Move generators make a Word for every legal move, so Words are slotted
+    to keep them small.
     """
 
+    __slots__ = ('word', 'letters_by_coord', 'score')
+
+    #   Words compare by score, so they cannot be hashed
+    __hash__ = None
+
     def __init__(self, word, letters_by_coord, score):
         self.word = word
         self.letters_by_coord = letters_by_coord
@@ -21,6 +29,9 @@ class Word:
     def get_score(self):
         return self.score
 
+    def __reduce__(self):
+        return (Word, (self.word, self.letters_by_coord, self.score))
+
     #   Built-in method overrides and operator overloads
 
     def __str__(self):